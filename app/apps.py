@@ -1,6 +1,32 @@
+import threading
 from django.apps import AppConfig
+from django.core.exceptions import ImproperlyConfigured
 
 
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from django.conf import settings
+        if settings.BASEROW_WEBHOOK_SECRET and settings.BASEROW_CACHE['ENABLED'] and settings.BASEROW_CACHE['BACKEND'] == 'locmem':
+            # A webhook event reaches one worker, the others would keep serving the rows it changed
+            raise ImproperlyConfigured('BASEROW_WEBHOOK_SECRET needs BASEROW_CACHE_BACKEND=django with a CACHES entry shared by all workers')
+        if settings.METRICS['ENABLED'] and not settings.METRICS['TOKEN'] and not settings.DEBUG:
+            raise ImproperlyConfigured('METRICS_ENABLED needs a METRICS_TOKEN when DEBUG is off')
+        if settings.BASEROW_WARM_UP:
+            from .baserow_client import tables
+            # Resolve tables off the boot path so a slow Baserow never delays serving
+            threading.Thread(target=tables.warm_up, daemon=True).start()
+        if settings.BASEROW_MIRROR['ENABLED']:
+            from .baserow_client import baserow, mirror
+            baserow.write_listeners.append(mirror.apply_write)
+        if settings.MATERIALIZED_REPORTS['ENABLED']:
+            from .baserow_client import baserow
+            from .baserow_client.materialized import engine
+            baserow.write_listeners.append(engine.apply_write)
+        from . import metrics
+        from .baserow_client import accounting
+        # The listeners check METRICS themselves
+        accounting.call_listeners.append(metrics.observe_baserow)
+        accounting.cache_listeners.append(metrics.observe_cache)
@@ -1,7 +1,38 @@
+from inventory import settings
 from inventory.settings import BASEROW_TOKEN, BASEROW_TABLE_MAP
-from baserowapi import Baserow
+from .aio import AsyncClient
+from .cache import RowCache
+from .client import Client
+from .registry import TableRegistry
+from .resilience import BaserowUnavailable, Resilience
 
-baserow = Baserow(url='https://baserow.kimpalao.com', token=BASEROW_TOKEN)
+cache = RowCache.from_settings(settings.BASEROW_CACHE, BASEROW_TABLE_MAP) if settings.BASEROW_CACHE['ENABLED'] else None
+resilience = Resilience.from_settings(settings.BASEROW_RESILIENCE)
+if settings.BASEROW_BACKEND == 'memory':
+    # Only loaded for offline tests and benchmarks
+    from .memory import MemoryBaserow
+    baserow = MemoryBaserow.from_file(
+        settings.BASEROW_MEMORY_DATA,
+        BASEROW_TABLE_MAP,
+        cache=cache,
+        latency=settings.BASEROW_MEMORY_LATENCY / 1000,
+        resilience=resilience,
+    )
+else:
+    baserow = Client(
+        url=settings.BASEROW_URL,
+        token=BASEROW_TOKEN,
+        pool_size=settings.BASEROW_POOL_SIZE,
+        pool_block=settings.BASEROW_POOL_BLOCK,
+        connect_timeout=settings.BASEROW_CONNECT_TIMEOUT,
+        read_timeout=settings.BASEROW_READ_TIMEOUT,
+        cache=cache,
+        resilience=resilience,
+    )
+# A snapshot taken from Baserow would not match the field IDs of the memory tables
+snapshot = settings.BASEROW_SCHEMA_SNAPSHOT if settings.BASEROW_BACKEND != 'memory' else None
+tables = TableRegistry(baserow, BASEROW_TABLE_MAP, snapshot)
+async_baserow = AsyncClient(baserow, max_concurrency=settings.BASEROW_POOL_SIZE)
 
 def get_baserow_operator(op):
     match op:
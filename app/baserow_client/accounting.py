@@ -0,0 +1,74 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+class Usage:
+    """
+    Baserow calls made while handling one request.
+
+    `calls` and `duration` (seconds) only cover requests that reached
+    Baserow, reads answered by the row cache are counted in `cache_hits`.
+    Calls fanned out to other threads record into the same Usage.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.duration = 0.0
+        self.cache_hits = 0
+        self.methods = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, duration: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.duration += duration
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+_usage = contextvars.ContextVar('baserow_usage', default=None)
+
+# Called with (endpoint, method, seconds, failed) after every call to Baserow
+call_listeners = []
+# Called with (endpoint, hit) after every row cache lookup
+cache_listeners = []
+
+def current() -> Usage:
+    return _usage.get()
+
+@contextmanager
+def track():
+    """
+    Collect the Baserow calls made inside the block into the Usage it yields.
+    """
+    usage = Usage()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+@contextmanager
+def timed(endpoint: str, method: str):
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        duration = time.perf_counter() - start
+        usage = _usage.get()
+        if usage is not None:
+            usage.record(method, duration)
+        for listener in call_listeners:
+            listener(endpoint, method, duration, failed)
+
+def cache_lookup(endpoint: str, hit: bool) -> None:
+    usage = _usage.get()
+    if usage is not None and hit:
+        usage.record_hit()
+    for listener in cache_listeners:
+        listener(endpoint, hit)
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import weakref
+import requests
+from asgiref.sync import sync_to_async
+from . import accounting
+from .client import Client
+from .pagination import MAX_PAGE_SIZE, Page, past_the_end
+from .rows import SlimRow, decode_row, decode_rows
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+class AsyncClient:
+    """
+    asyncio front end to a sync `Client`, for views that fetch several things at once.
+
+    Requests go through the client's row cache, accounting and write
+    listeners like sync ones do. They are sent with httpx when it is
+    installed and `client` talks HTTP, with the client's rate limit, retries
+    and circuit breaker, otherwise (the memory backend, or no httpx) the sync
+    client sends them from a worker thread. At most
+    `max_concurrency` requests per event loop are in flight at once.
+    """
+
+    def __init__(self, client: Client, max_concurrency: int=10):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        # Semaphores and httpx clients can only be used from the event loop that created them
+        self._loops = weakref.WeakKeyDictionary()
+
+    @property
+    def uses_httpx(self) -> bool:
+        return httpx is not None and type(self.client).perform_request is Client.perform_request
+
+    async def make_api_request(self, endpoint: str, method: str='GET', data=None):
+        if not self.uses_httpx:
+            async with self._state().semaphore:
+                return await sync_to_async(self.client.make_api_request, thread_sensitive=False)(endpoint, method, data)
+
+        cache = self.client.cache
+        key = None
+        if method == 'GET' and cache is not None:
+            # Cache backends such as Redis, Memcached or the database block, keep them off the event loop
+            key = await sync_to_async(cache.key, thread_sensitive=False)(endpoint)
+        if key is not None:
+            response = await sync_to_async(cache.get, thread_sensitive=False)(key)
+            accounting.cache_lookup(endpoint, response is not None)
+            if response is not None:
+                return response
+
+        try:
+            async with self._state().semaphore:
+                with accounting.timed(endpoint, method):
+                    response = await self._send(endpoint, method, data)
+        finally:
+            if method != 'GET' and cache is not None:
+                await sync_to_async(cache.invalidate_request, thread_sensitive=False)(endpoint, method, data)
+
+        if method == 'GET':
+            if cache is not None:
+                await sync_to_async(cache.set, thread_sensitive=False)(key, response)
+        else:
+            for listener in self.client.write_listeners:
+                await sync_to_async(listener)(endpoint, method, data, response)
+        return response
+
+    async def get_row(self, table, row_id: int) -> SlimRow:
+        await self.resolve(table)
+        response = await self.make_api_request(f'/api/database/rows/table/{table.id}/{row_id}/?user_field_names=true')
+        return decode_row(table, response)
+
+    async def fetch_page(self, table, query: str, page: int, size: int) -> dict:
+        url = f'/api/database/rows/table/{table.id}/?user_field_names=true&page={page}&size={size}'
+        if query:
+            url = f'{url}&{query}'
+        return await self.make_api_request(url)
+
+    async def get_rows(self, table, query: str='') -> list:
+        """
+        Every row of `table` matching `query`, fetching the pages after the first concurrently.
+        """
+        await self.resolve(table)
+        first = await self.fetch_page(table, query, 1, MAX_PAGE_SIZE)
+        pages = -(-first['count'] // MAX_PAGE_SIZE)
+        rest = await asyncio.gather(*(self.fetch_page(table, query, page, MAX_PAGE_SIZE) for page in range(2, pages + 1)))
+        return decode_rows(table, [row for response in [first, *rest] for row in response['results']])
+
+    async def get_page(self, table, page: int=0, size: int=5, query: str='') -> Page:
+        """
+        Async `pagination.get_page`, downloading the Baserow pages of a large window concurrently.
+        """
+        await self.resolve(table)
+        if size <= 0:
+            return Page([], (await self.fetch_page(table, query, 1, 1))['count'])
+
+        if size <= MAX_PAGE_SIZE:
+            chunk, first, last = size, page + 1, page + 1
+        else:
+            chunk = MAX_PAGE_SIZE
+            first = page * size // chunk + 1
+            last = ((page + 1) * size - 1) // chunk + 1
+
+        responses = await asyncio.gather(
+            *(self.fetch_page(table, query, baserow_page, chunk) for baserow_page in range(first, last + 1)),
+            return_exceptions=True,
+        )
+        rows = []
+        count = None
+        for baserow_page, response in zip(range(first, last + 1), responses):
+            if isinstance(response, BaseException):
+                # Baserow answers pages past the end with a 404 instead of an empty list
+                if baserow_page == 1 or not past_the_end(response):
+                    raise response
+                break
+            count = response['count']
+            rows.extend(response['results'])
+            if not response.get('next'):
+                break
+
+        if count is None:
+            return Page([], (await self.fetch_page(table, query, 1, 1))['count'])
+
+        offset = page * size - (first - 1) * chunk
+        return Page(decode_rows(table, rows[offset:offset + size]), count)
+
+    async def resolve(self, table) -> None:
+        """
+        Load the field metadata of `table` off the event loop, row parsing needs it.
+        """
+        if table._fields is None:
+            await sync_to_async(lambda: table.fields, thread_sensitive=False)()
+
+    async def _send(self, endpoint: str, method: str, data):
+        url = self.client.url + endpoint
+        resilience = self.client.resilience
+        attempt = 0
+        while True:
+            await asyncio.sleep(resilience.admit())
+            try:
+                response = await self._state().http.request(method, url, json=data)
+            except httpx.TransportError as e:
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                delay = resilience.retry_delay(method, url, attempt, error=e, sent=sent)
+            else:
+                delay = resilience.retry_delay(method, url, attempt, response.status_code, response.headers.get('Retry-After'))
+                if delay is None:
+                    break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if response.status_code in self.client.ERROR_MESSAGES:
+            message = self.client.ERROR_MESSAGES[response.status_code].format(url=url)
+            logger.error(message)
+            # The sync client raises the same
+            raise requests.exceptions.HTTPError(message, response=response)
+        return self.client.parse_response(response, method, url)
+
+    def _state(self) -> '_LoopState':
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self)
+        return state
+
+class _LoopState:
+    def __init__(self, client: AsyncClient):
+        self.semaphore = asyncio.Semaphore(client.max_concurrency)
+        self.http = None
+        if client.uses_httpx:
+            connect, read = client.client.timeout
+            self.http = httpx.AsyncClient(
+                headers=client.client.headers,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=client.max_concurrency, max_keepalive_connections=client.max_concurrency),
+            )
@@ -1,10 +1,11 @@
-from . import baserow, BASEROW_TABLE_MAP
+from . import tables
+from .batch import create_rows
 
 class AssignmentLog:
-    table = baserow.get_table(BASEROW_TABLE_MAP['ASSIGNMENT_LOG'])
+    table = tables.lazy('ASSIGNMENT_LOG')
 
     @staticmethod
-    def assign(user: int, hardware: int=None, software: int=None, assignment_type: int=1):
+    def new_row(user: int, hardware: int=None, software: int=None, assignment_type: int=1) -> dict:
         row = {
             'user': [user],
             'assignment_type': [assignment_type],
@@ -13,4 +14,26 @@ class AssignmentLog:
             row['hardware_instance'] = [hardware]
         if software:
             row['software_instance'] = [software]
-        return AssignmentLog.table.add_row(row)
\ No newline at end of file
+        return row
+
+    @staticmethod
+    def assign(user: int, hardware: int=None, software: int=None, assignment_type: int=1):
+        return AssignmentLog.table.add_row(AssignmentLog.new_row(user, hardware, software, assignment_type))
+
+    @staticmethod
+    def reassign_rows(current: int, new: int, hardware: int=None, software: int=None) -> list:
+        """
+        Log rows for moving an instance from the `current` assignee to the `new` one, either may be None.
+        """
+        if current == new:
+            return []
+        rows = []
+        if new:
+            rows.append(AssignmentLog.new_row(new, hardware, software))
+        if current:
+            rows.append(AssignmentLog.new_row(current, hardware, software, assignment_type=2))
+        return rows
+
+    @staticmethod
+    def assign_many(rows: list) -> list:
+        return create_rows(AssignmentLog.table, rows)
@@ -0,0 +1,38 @@
+from .fanout import fan_out
+
+# Baserow rejects batch requests with more items than this
+BATCH_SIZE = 200
+
+def chunks(items: list, size: int=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def create_rows(table, rows: list) -> list:
+    """
+    Create rows through Baserow's batch endpoint, returning their IDs in the given order.
+
+    Batches are sent in parallel.
+    """
+    responses = fan_out.map(lambda chunk: table.client.make_api_request(
+        f'/api/database/rows/table/{table.id}/batch/?user_field_names=true',
+        method='POST',
+        data={'items': chunk},
+    ), chunks(rows))
+    return [item['id'] for response in responses for item in response['items']]
+
+def update_rows(table, rows: list) -> None:
+    """
+    Patch rows through Baserow's batch endpoint. Each row needs its `id` and only the fields to change.
+    """
+    fan_out.map(lambda chunk: table.client.make_api_request(
+        f'/api/database/rows/table/{table.id}/batch/?user_field_names=true',
+        method='PATCH',
+        data={'items': chunk},
+    ), chunks(rows))
+
+def delete_rows(table, ids: list) -> None:
+    fan_out.map(lambda chunk: table.client.make_api_request(
+        f'/api/database/rows/table/{table.id}/batch-delete/',
+        method='POST',
+        data={'items': chunk},
+    ), chunks(ids))
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from django.utils.module_loading import import_string
+
+ROW_ENDPOINT = re.compile(r'/api/database/rows/table/(\d+)/(?:(\d+)/|(batch)/|(batch-delete)/)?$')
+
+def parse_row_endpoint(endpoint: str):
+    """
+    Split a row endpoint into (table ID, row ID, is batch, is batch delete, query string), or None for other endpoints.
+    """
+    url = urllib.parse.urlparse(endpoint)
+    match = ROW_ENDPOINT.search(url.path)
+    if match is None:
+        return None
+    table_id, row_id, batch, batch_delete = match.groups()
+    return int(table_id), int(row_id) if row_id else None, bool(batch), bool(batch_delete), url.query
+
+def transitive_dependents(dependents: dict) -> dict:
+    """
+    Close a {table: [tables reading from it]} map over lookups of lookups,
+    e.g. a STATUS edit also reaches HARDWARE through HARDWARE_INSTANCE.
+    """
+    closed = {}
+    for table in dependents:
+        seen = []
+        pending = list(dependents[table])
+        while pending:
+            dependent = pending.pop(0)
+            if dependent != table and dependent not in seen:
+                seen.append(dependent)
+                pending.extend(dependents.get(dependent, []))
+        closed[table] = seen
+    return closed
+
+class LocMemBackend:
+    """
+    Per-process LRU cache with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int=2048, **options):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float=None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: list) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class DjangoCacheBackend:
+    """
+    Stores entries in one of the CACHES aliases, e.g. a Redis cache shared by all workers.
+    """
+
+    def __init__(self, alias: str='default', **options):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    def get(self, key: str):
+        return self.cache.get(key)
+
+    def set(self, key: str, value, ttl: float=None) -> None:
+        self.cache.set(key, value, ttl)
+
+    def delete_many(self, keys: list) -> None:
+        self.cache.delete_many(keys)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+BACKENDS = {
+    'locmem': LocMemBackend,
+    'django': DjangoCacheBackend,
+}
+
+class RowCache:
+    """
+    Read-through cache for Baserow row GETs, keyed by table and row ID or by
+    table and normalized query string.
+
+    Every table has a version token that is part of its query keys, every
+    row a version token that is part of its row key, and every table an
+    epoch token that is part of all its keys. A write to a table replaces its
+    version and the versions of the rows it wrote. The epochs of dependent
+    tables are replaced too, because their lookups and formulas read from it.
+    Tokens are random, so an evicted token can never bring old entries back.
+    """
+
+    def __init__(self, backend, ttls: dict, dependents: dict=None):
+        self.backend = backend
+        self.ttls = ttls
+        self.dependents = dependents or {}
+
+    @staticmethod
+    def from_settings(config: dict, table_map: dict) -> 'RowCache':
+        backend = config.get('BACKEND', 'locmem')
+        backend_class = BACKENDS[backend] if backend in BACKENDS else import_string(backend)
+        backend = backend_class(**{key.lower(): value for key, value in config.get('OPTIONS', {}).items()})
+        ttls = {table_map[name]: ttl for name, ttl in config.get('TTL', {}).items() if name in table_map and ttl}
+        dependents = {
+            table_map[name]: [table_map[dependent] for dependent in dependent_names if dependent in table_map]
+            for name, dependent_names in transitive_dependents(config.get('DEPENDENTS', {})).items() if name in table_map
+        }
+        return RowCache(backend, ttls, dependents)
+
+    def key(self, endpoint: str):
+        """
+        The key the response to GET `endpoint` is cached under, or None when it is not cached.
+
+        Take it before sending the request and store the response under it,
+        so a response read before a write can not be stored as fresh after it.
+        """
+        parsed = parse_row_endpoint(endpoint)
+        if parsed is None:
+            return None
+        table_id, row_id, batch, batch_delete, query = parsed
+        if table_id not in self.ttls or batch or batch_delete:
+            return None
+
+        epoch = self._token(f'epoch:{table_id}')
+        if row_id:
+            return f"baserow:row:{table_id}:{epoch}:{row_id}:{self._token(f'version:{table_id}:{row_id}', self.ttls[table_id])}"
+        normalized = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(query, keep_blank_values=True)))
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        return f"baserow:query:{table_id}:{epoch}:{self._token(f'version:{table_id}')}:{digest}"
+
+    def get(self, key: str):
+        if key is None:
+            return None
+        value = self.backend.get(key)
+        # Cached as JSON so every hit hands out objects the caller is free to mutate
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, response) -> None:
+        if key is not None and isinstance(response, (dict, list)):
+            self.backend.set(key, json.dumps(response), self.ttls[int(key.split(':')[2])])
+
+    def invalidate(self, table_id: int, row_ids: list=None, dependents: bool=True) -> None:
+        if table_id in self.ttls:
+            # Row tokens only need to outlive the entries keyed by them, a lost token is a miss
+            for row_id in row_ids or []:
+                self.backend.set(f'baserow:version:{table_id}:{row_id}', uuid.uuid4().hex, self.ttls[table_id])
+        self.backend.set(f'baserow:version:{table_id}', uuid.uuid4().hex)
+        if dependents:
+            self.invalidate_dependents(table_id)
+
+    def invalidate_dependents(self, table_id: int) -> None:
+        for dependent in self.dependents.get(table_id, []):
+            self.backend.set(f'baserow:epoch:{dependent}', uuid.uuid4().hex)
+
+    def invalidate_request(self, endpoint: str, method: str, data=None) -> None:
+        parsed = parse_row_endpoint(endpoint)
+        if parsed is None:
+            return
+        table_id, row_id, batch, batch_delete = parsed[:4]
+        row_ids = []
+        if row_id:
+            row_ids = [row_id]
+        elif batch_delete and data:
+            row_ids = list(data.get('items', []))
+        elif batch and data:
+            row_ids = [item['id'] for item in data.get('items', []) if 'id' in item]
+        self.invalidate(table_id, row_ids)
+
+    def _token(self, name: str, ttl: float=None) -> str:
+        token = self.backend.get(f'baserow:{name}')
+        if token is None:
+            token = uuid.uuid4().hex
+            self.backend.set(f'baserow:{name}', token, ttl)
+        return token
@@ -0,0 +1,58 @@
+from .batch import create_rows, delete_rows, update_rows
+
+def link_ids(value) -> list:
+    return [link['id'] for link in value or []]
+
+def _normalize(value):
+    if isinstance(value, list):
+        return [v['id'] if isinstance(v, dict) else v for v in value]
+    if value is None:
+        return ''
+    return str(value)
+
+class ChangeSet:
+    """
+    Collects the creates, updates and deletes needed to turn the current child
+    rows of a record into the submitted ones, then applies them in batches.
+
+    `current` is the raw JSON of the rows that belong to the record. Updates
+    and deletes for rows outside of it are ignored, and updates only carry the
+    fields whose value actually changed.
+    """
+
+    def __init__(self, current):
+        self.current = {row['id']: row for row in current}
+        self.creates = []
+        self.updates = []
+        self.deletes = []
+
+    def create(self, values: dict) -> None:
+        self.creates.append(values)
+
+    def update(self, row_id: int, values: dict) -> bool:
+        row = self.current.get(row_id)
+        if row is None:
+            return False
+        changed = {
+            field: value for field, value in values.items()
+            if _normalize(row.get(field)) != _normalize(value)
+        }
+        if changed:
+            self.updates.append({'id': row_id, **changed})
+        return True
+
+    def delete(self, row_id: int) -> bool:
+        if row_id not in self.current:
+            return False
+        self.deletes.append(row_id)
+        return True
+
+    def apply(self, table) -> list:
+        """
+        Apply the changes and return the IDs of the created rows, in the order they were added.
+        """
+        if self.deletes:
+            delete_rows(table, self.deletes)
+        if self.updates:
+            update_rows(table, self.updates)
+        return create_rows(table, self.creates)
@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from baserowapi import Baserow
+from . import accounting
+from .resilience import Resilience
+
+logger = logging.getLogger(__name__)
+
+class Client(Baserow):
+    """
+    Baserow client that keeps one pooled keep-alive session per worker process.
+
+    The session is shared by the worker's threads, so `pool_size` should be at
+    least the number of threads a worker runs. A forked worker never reuses the
+    sockets it inherited from its parent.
+
+    Row reads go through `cache` when one is given, and every row write
+    invalidates the entries it may have changed. Callables in
+    `write_listeners` get (endpoint, method, data, response) after each
+    successful write. Calls that reach Baserow are recorded in the
+    `accounting` usage of the current request, and go through `resilience`
+    for rate limiting, retries and circuit breaking.
+    """
+
+    def __init__(self, url: str, token: str, pool_size: int=10, pool_block: bool=False,
+                 connect_timeout: float=3.05, read_timeout: float=10, cache=None, resilience: Resilience=None):
+        self.resilience = resilience or Resilience()
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.write_listeners = []
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+        super().__init__(url=url, token=token)
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None or self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    self._session = self._new_session()
+                    self._session_pid = os.getpid()
+        return self._session
+
+    @session.setter
+    def session(self, value):
+        # Baserow.__init__ assigns a plain session, ours are built on demand
+        pass
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block,
+            max_retries=0,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(getattr(self, 'headers', {}))
+        session.headers['Connection'] = 'keep-alive'
+        return session
+
+    def perform_request(self, method, url, headers, data=None, timeout=None, files=None):
+        """
+        Send one request and return the response whatever its status, `_request` interprets it.
+        """
+        if files:
+            headers = {key: value for key, value in headers.items() if key != 'Content-Type'}
+            return self.session.post(url, headers=headers, files=files, timeout=self.timeout)
+        return self.session.request(method, url, headers=headers, json=data, timeout=self.timeout)
+
+    def make_api_request(self, endpoint, method='GET', data=None, *args, **kwargs):
+        if method == 'GET':
+            if self.cache is None:
+                return self._request(endpoint, method, data, *args, **kwargs)
+            key = self.cache.key(endpoint)
+            response = self.cache.get(key)
+            accounting.cache_lookup(endpoint, response is not None)
+            if response is None:
+                response = self._request(endpoint, method, data, *args, **kwargs)
+                self.cache.set(key, response)
+            return response
+
+        try:
+            response = self._request(endpoint, method, data, *args, **kwargs)
+        finally:
+            # Also after a failure, Baserow may have applied part of a batch
+            if self.cache is not None:
+                self.cache.invalidate_request(endpoint, method, data)
+        for listener in self.write_listeners:
+            listener(endpoint, method, data, response)
+        return response
+
+    def _request(self, endpoint, method, data, headers=None, timeout=None, files=None):
+        url = self.url + endpoint
+        headers = self.get_combined_headers(headers)
+        with accounting.timed(endpoint, method):
+            attempt = 0
+            while True:
+                time.sleep(self.resilience.admit())
+                try:
+                    response = self.perform_request(method, url, headers, data, timeout, files)
+                except requests.exceptions.RequestException as e:
+                    delay = self.resilience.retry_delay(method, url, attempt, error=e, sent=not _never_sent(e))
+                else:
+                    delay = self.resilience.retry_delay(method, url, attempt, response.status_code, response.headers.get('Retry-After'))
+                    if delay is None:
+                        break
+                time.sleep(delay)
+                attempt += 1
+
+        if response.status_code in self.ERROR_MESSAGES:
+            message = self.ERROR_MESSAGES[response.status_code].format(url=url)
+            logger.error(message)
+            raise requests.exceptions.HTTPError(message, response=response)
+        return self.parse_response(response, method, url)
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """
+    Whether the request failed before reaching Baserow, so it is safe to retry whatever its method.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,87 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from inventory import settings
+
+class FanOut:
+    """
+    Runs independent Baserow calls of one request in parallel, for sync (WSGI) workers.
+
+    The threads are shared by the whole worker process, so at most
+    `max_workers` calls are in flight per process however many requests fan
+    out, and a single `map` or `run` keeps at most `per_request` of them in
+    flight. Calls see the context variables of the caller, so they are
+    accounted to its request. A call that fans out itself runs its calls
+    inline, pool threads never wait on the pool.
+
+    Errors are raised deterministically: every started call finishes before
+    `map` returns or raises, calls not started yet are skipped after a
+    failure, and the error raised is the one of the first failing call in
+    argument order, not the first to fail in time.
+    """
+
+    def __init__(self, max_workers: int=8, per_request: int=4):
+        self.max_workers = max_workers
+        self.per_request = per_request
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def map(self, fn, items) -> list:
+        """
+        `[fn(item) for item in items]`, with the calls made in parallel.
+        """
+        items = list(items)
+        if len(items) <= 1 or min(self.max_workers, self.per_request) <= 1 or getattr(self._local, 'inside', False):
+            return [fn(item) for item in items]
+
+        executor = self._get_executor()
+        results = [None] * len(items)
+        errors = {}
+        pending = {}
+        next_index = 0
+        while True:
+            while next_index < len(items) and len(pending) < self.per_request and not errors:
+                # A context can only be entered by one thread at a time, every call gets its own copy
+                context = contextvars.copy_context()
+                pending[executor.submit(context.run, self._call, fn, items[next_index])] = next_index
+                next_index += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    errors[index] = e
+
+        if errors:
+            raise errors[min(errors)]
+        return results
+
+    def run(self, *calls) -> list:
+        """
+        Call every argument without arguments in parallel, returning their results in order.
+        """
+        return self.map(lambda call: call(), calls)
+
+    def _call(self, fn, item):
+        self._local.inside = True
+        try:
+            return fn(item)
+        finally:
+            self._local.inside = False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive a fork, a forked worker starts its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='baserow-fanout')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+fan_out = FanOut(settings.BASEROW_FANOUT_WORKERS, settings.BASEROW_FANOUT_PER_REQUEST)
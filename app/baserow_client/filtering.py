@@ -0,0 +1,96 @@
+import re
+
+DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def cell_text(value) -> str:
+    """
+    Display text of a raw Baserow cell, the way Baserow compares text filters against it.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, list):
+        return ', '.join(cell_text(item) for item in value)
+    if isinstance(value, dict):
+        return cell_text(value.get('value'))
+    return str(value)
+
+def cell_ids(value) -> list:
+    if not isinstance(value, list):
+        return []
+    return [item['id'] for item in value if isinstance(item, dict) and 'id' in item]
+
+def cell_date(value) -> str:
+    match = DATE.search(cell_text(value))
+    return match.group() if match else ''
+
+def is_true(value: str) -> bool:
+    return value.strip().lower() in ('1', 'true', 'yes', 'on', 'checked')
+
+def _equal(cell, value: str) -> bool:
+    if isinstance(cell, bool):
+        return cell == is_true(value)
+    return cell_text(cell) == value
+
+def _compare_dates(compare):
+    def matches(cell, value):
+        cell, value = cell_date(cell), cell_date(value)
+        return bool(cell) and bool(value) and compare(cell, value)
+    return matches
+
+OPERATORS = {
+    'equal': _equal,
+    'not_equal': lambda cell, value: not _equal(cell, value),
+    'contains': lambda cell, value: value.lower() in cell_text(cell).lower(),
+    'contains_not': lambda cell, value: value.lower() not in cell_text(cell).lower(),
+    'empty': lambda cell, value: cell in (None, '', [], False),
+    'not_empty': lambda cell, value: cell not in (None, '', [], False),
+    'boolean': lambda cell, value: bool(cell) == is_true(value),
+    'link_row_has': lambda cell, value: value.isdigit() and int(value) in cell_ids(cell),
+    'link_row_has_not': lambda cell, value: not value.isdigit() or int(value) not in cell_ids(cell),
+    'date_equal': _compare_dates(lambda cell, value: cell == value),
+    'date_not_equal': lambda cell, value: cell_date(cell) != cell_date(value),
+    'date_before': _compare_dates(lambda cell, value: cell < value),
+    'date_before_or_equal': _compare_dates(lambda cell, value: cell <= value),
+    'date_after': _compare_dates(lambda cell, value: cell > value),
+    'date_after_or_equal': _compare_dates(lambda cell, value: cell >= value),
+}
+
+def supports(filters: tuple) -> bool:
+    return all(operator in OPERATORS for _, operator, _ in filters)
+
+def filter_rows(rows, filters: tuple) -> list:
+    """
+    Raw rows matching all (field, operator, value) `filters`, evaluated like Baserow would.
+    """
+    checks = [(field, OPERATORS[operator], value) for field, operator, value in filters]
+    return [row for row in rows if all(check(row.get(field), value) for field, check, value in checks)]
+
+def sort_key(value) -> tuple:
+    """
+    Key ordering raw cells like Baserow: empty and boolean cells, then numbers, then text.
+    """
+    if isinstance(value, bool) or value is None:
+        return (0, int(bool(value)), '')
+    if isinstance(value, (int, float)):
+        return (1, value, '')
+    text = cell_text(value)
+    try:
+        number = float(text)
+    except ValueError:
+        number = None
+    # NaN compares false to everything, it sorts as text
+    if number is None or number != number:
+        return (2, 0, text.lower())
+    return (1, number, '')
+
+def sort_rows(rows: list, order_by: tuple) -> list:
+    """
+    Sort raw rows by `order_by` ('+field' / '-field'), then by Baserow's default row order.
+    """
+    rows = sorted(rows, key=lambda row: (float(row.get('order') or 0), row['id']))
+    for key in reversed(order_by):
+        field = key.lstrip('+-')
+        rows.sort(key=lambda row: sort_key(row.get(field)), reverse=key.startswith('-'))
+    return rows
@@ -1,7 +1,9 @@
-from . import baserow, BASEROW_TABLE_MAP
+from . import tables
+from .batch import create_rows, delete_rows
+from .query import linked_ids
 
 class Hardware:
-    table = baserow.get_table(BASEROW_TABLE_MAP['HARDWARE'])
+    table = tables.lazy('HARDWARE')
 
     @staticmethod
     def create(name: str, brand: str, type: str, model_number: str, description: str, instances: list):
@@ -13,19 +15,32 @@ class Hardware:
             'description': description,
         })
 
-        for instance in instances:
-            HardwareInstance.create(new_row.id, instance['serial_number'], instance['procurement_date'], instance.get('status', None))
+        create_rows(HardwareInstance.table, [
+            HardwareInstance.new_row(new_row.id, instance['serial_number'], instance['procurement_date'], instance.get('status', None))
+            for instance in instances
+        ])
 
         return new_row
 
+    @staticmethod
+    def delete(pk: int, cascade: bool=False):
+        # The instances are found while they still link to the hardware, and only deleted once it is gone
+        instances = linked_ids(HardwareInstance.table, 'hardware', pk) if cascade else []
+        delete_rows(Hardware.table, [pk])
+        delete_rows(HardwareInstance.table, instances)
+
 class HardwareInstance:
-    table = baserow.get_table(BASEROW_TABLE_MAP['HARDWARE_INSTANCE'])
+    table = tables.lazy('HARDWARE_INSTANCE')
 
     @staticmethod
-    def create(hardware: int, serial_number: str, procurement_date: str, status: str=None):
-        return HardwareInstance.table.add_row({
+    def new_row(hardware: int, serial_number: str, procurement_date: str, status: str=None) -> dict:
+        return {
             'hardware': [hardware],
             'serial_number': serial_number,
             'procurement_date': procurement_date,
             'status': [status] if status else [],
-        })
\ No newline at end of file
+        }
+
+    @staticmethod
+    def create(hardware: int, serial_number: str, procurement_date: str, status: str=None):
+        return HardwareInstance.table.add_row(HardwareInstance.new_row(hardware, serial_number, procurement_date, status))
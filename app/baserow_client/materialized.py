@@ -0,0 +1,222 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import replace
+from django.db import connection
+from inventory import settings
+from inventory.settings import BASEROW_TABLE_MAP
+from . import mirror, tables
+from .cache import parse_row_endpoint, transitive_dependents
+from .filtering import filter_rows, sort_rows, supports
+from .pagination import Page, iter_rows
+from .query import ListQuery
+from .rows import decode_rows
+
+logger = logging.getLogger(__name__)
+
+class MaterializedReport:
+    """
+    In-memory result set of a report: the rows of table `table_name` matching
+    the search filters `filters()` returns, limited to the columns in `fields`.
+
+    Rows written through this worker's client are added, updated or dropped
+    as the writes happen. A write to a table the report's lookups and
+    formulas read from makes the next read recompute the rows, so do new
+    filters (e.g. a date filter on the next day). After `max_age` seconds a
+    read still gets the rows in memory while a background thread recomputes
+    them, which also picks up changes made by other workers or in Baserow.
+    """
+
+    def __init__(self, table_name: str, filters, fields, max_age: float=None):
+        self.table_name = table_name
+        self.filters = filters
+        self.fields = fields
+        self.max_age = max_age if max_age is not None else settings.MATERIALIZED_REPORTS['MAX_AGE']
+        self._rows = None
+        self._ordered = None
+        self._query_filters = None
+        self._computed_at = 0
+        self._stale = False
+        self._version = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+
+    def query_filters(self) -> tuple:
+        """
+        The report's filters as compiled (field, operator, value) tuples.
+        """
+        return ListQuery.parse(json.dumps({'filters': self.filters()})).filters
+
+    def rows(self) -> list:
+        """
+        Raw JSON of the report's rows in Baserow's default order. Callers must not mutate them.
+        """
+        query_filters = self.query_filters()
+        if self._rows is None or self._stale or self._query_filters != query_filters:
+            with self._compute_lock:
+                if self._rows is None or self._stale or self._query_filters != query_filters:
+                    self._compute(query_filters)
+        elif time.monotonic() - self._computed_at > self.max_age:
+            self._refresh_in_background()
+
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sort_rows(list(self._rows.values()), ())
+            return self._ordered
+
+    def page(self, query: ListQuery) -> Page:
+        """
+        The page of the report the list view would return for search `query`,
+        or None when answering needs columns or filters it does not have.
+
+        Like the report views, the report's own filters replace those of
+        `query` on the same fields. Raises InvalidQuery like the list view.
+        """
+        table = tables.get(self.table_name)
+        query_filters = self.query_filters()
+        replaced = {field for field, _, _ in query_filters}
+        filters = tuple(f for f in query.filters if f[0] not in replaced)
+        # Unknown fields are refused exactly like the list view refuses them
+        replace(query, filters=tuple(sorted(filters + query_filters))).compile(table)
+
+        referenced = {field for field, _, _ in filters} | {key.lstrip('+-') for key in query.order_by}
+        if not supports(filters) or not referenced <= set(self.fields.names(table) or table.field_names):
+            return None
+
+        rows = self.rows()
+        if filters:
+            rows = filter_rows(rows, filters)
+        if query.order_by:
+            rows = sort_rows(rows, query.order_by)
+        window = rows[query.page * query.size:(query.page + 1) * query.size]
+        return Page(decode_rows(table, window), len(rows))
+
+    def apply(self, rows: list, deleted: list) -> None:
+        """
+        Bring the result set up to date with `rows` written to the report's
+        table, as Baserow returned them, and the rows deleted from it.
+        """
+        table = tables.get(self.table_name)
+        with self._lock:
+            self._version += 1
+            if self._rows is None:
+                return
+            filters = self._query_filters
+            # Rows that do not hold every filtered column can not be matched, e.g. field ID keyed webhook rows
+            if not supports(filters) or any(field not in row for row in rows for field, _, _ in filters):
+                self._stale = True
+                return
+            for row_id in deleted:
+                self._rows.pop(row_id, None)
+            for row in rows:
+                if filter_rows([row], filters):
+                    self._rows[row['id']] = self.fields.apply(table, row)
+                else:
+                    self._rows.pop(row['id'], None)
+            self._ordered = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._stale = True
+
+    def _compute(self, query_filters: tuple) -> None:
+        table = tables.get(self.table_name)
+        version = self._version
+        if settings.BASEROW_MIRROR['ENABLED'] and supports(query_filters) and mirror.is_synced(table):
+            rows = mirror.get_rows(table, (), query_filters)
+        else:
+            query = ListQuery(filters=query_filters).compile(table)
+            rows = iter_rows(table, self.fields.extend(table, query))
+        rows = {row['id']: self.fields.apply(table, row) for row in rows}
+        with self._lock:
+            self._rows = rows
+            self._ordered = None
+            self._query_filters = query_filters
+            self._computed_at = time.monotonic()
+            # A write made while computing may be missing from the rows, the next read computes them again
+            self._stale = self._version != version
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            with self._compute_lock:
+                self._compute(self.query_filters())
+        except Exception:
+            # The rows in memory keep being served, the next read past max_age tries again
+            logger.exception(f'Could not recompute a report on {self.table_name}')
+        finally:
+            self._computed_at = max(self._computed_at, time.monotonic())
+            self._refreshing = False
+            connection.close()
+
+class ReportEngine:
+    """
+    The materialized reports by name, kept current by the writes the client makes.
+    """
+
+    def __init__(self, dependents: dict=None):
+        # Tables whose lookups and formulas read from the key table, by BASEROW_TABLE_MAP name
+        self.dependents = transitive_dependents(dependents if dependents is not None else settings.BASEROW_CACHE['DEPENDENTS'])
+        self.reports = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, table_name: str, filters, fields) -> MaterializedReport:
+        report = self.reports.get(name)
+        if report is None:
+            with self._lock:
+                if name not in self.reports:
+                    self.reports[name] = MaterializedReport(table_name, filters, fields)
+                report = self.reports[name]
+        return report
+
+    def apply_write(self, endpoint: str, method: str, data, response) -> None:
+        """
+        Client write listener applying rows written through the API to the reports.
+        """
+        parsed = parse_row_endpoint(endpoint)
+        if parsed is None:
+            return
+        table_id, row_id, batch, batch_delete, query = parsed
+        try:
+            if batch_delete:
+                self.apply_rows(table_id, [], data['items'])
+            elif method == 'DELETE':
+                self.apply_rows(table_id, [], [row_id])
+            elif 'user_field_names=true' in query:
+                self.apply_rows(table_id, response['items'] if batch else [response], [])
+            else:
+                self.invalidate(table_id)
+        except Exception:
+            logger.exception(f'Could not apply {method} {endpoint} to the materialized reports')
+            self.invalidate(table_id)
+
+    def apply_rows(self, table_id: int, rows: list, deleted: list) -> None:
+        for report in self._reports_on(table_id):
+            report.apply(rows, deleted)
+        self._invalidate_dependents(table_id)
+
+    def invalidate(self, table_id: int) -> None:
+        for report in self._reports_on(table_id):
+            report.invalidate()
+        self._invalidate_dependents(table_id)
+
+    def _reports_on(self, table_id: int) -> list:
+        return [report for report in list(self.reports.values()) if BASEROW_TABLE_MAP.get(report.table_name) == table_id]
+
+    def _invalidate_dependents(self, table_id: int) -> None:
+        names = [name for name, id in BASEROW_TABLE_MAP.items() if id == table_id]
+        dependents = {dependent for name in names for dependent in self.dependents.get(name, [])}
+        for report in list(self.reports.values()):
+            if report.table_name in dependents:
+                report.invalidate()
+
+engine = ReportEngine()
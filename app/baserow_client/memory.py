@@ -0,0 +1,479 @@
+import copy
+import functools
+import datetime
+import json
+import re
+import threading
+import time
+import urllib.parse
+import requests
+from .client import Client
+from .filtering import OPERATORS, cell_text, filter_rows, sort_rows
+
+# Field types Baserow computes itself and refuses writes to
+READ_ONLY_TYPES = {'formula', 'lookup', 'count', 'rollup', 'last_modified', 'created_on', 'autonumber', 'uuid'}
+
+ROWS_ENDPOINT = re.compile(r'^/api/database/rows/table/(\d+)/(?:(\d+)/|(batch)/|(batch-delete)/)?$')
+FIELDS_ENDPOINT = re.compile(r'^/api/database/fields/table/(\d+)/$')
+TOKEN = re.compile(r"\s*(?:(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|(?P<number>\d+(?:\.\d+)?)|(?P<name>[a-z_]+)|(?P<punct>[(),]))", re.I)
+
+# Baserow refuses list requests with a `size` above this
+MAX_PAGE_SIZE = 200
+
+class BaserowError(Exception):
+    def __init__(self, status: int, error: str, detail: str=''):
+        super().__init__(detail or error)
+        self.status = status
+        self.error = error
+        self.detail = detail
+
+@functools.lru_cache(maxsize=None)
+def parse_formula(formula: str):
+    tokens = []
+    position = 0
+    while position < len(formula.rstrip()):
+        match = TOKEN.match(formula, position)
+        if match is None:
+            raise BaserowError(400, 'ERROR_WITH_FORMULA', f'Can not parse formula {formula!r}')
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+
+    def expression(i):
+        kind, value = tokens[i]
+        if kind == 'string':
+            return ('literal', re.sub(r'\\(.)', r'\1', value[1:-1])), i + 1
+        if kind == 'number':
+            return ('literal', value), i + 1
+        if kind == 'name' and i + 1 < len(tokens) and tokens[i + 1] == ('punct', '('):
+            args, i = [], i + 2
+            while tokens[i] != ('punct', ')'):
+                arg, i = expression(i)
+                args.append(arg)
+                if tokens[i] == ('punct', ','):
+                    i += 1
+            return ('call', value.lower(), args), i + 1
+        raise BaserowError(400, 'ERROR_WITH_FORMULA', f'Unexpected {value!r} in formula {formula!r}')
+
+    node, end = expression(0)
+    if end != len(tokens):
+        raise BaserowError(400, 'ERROR_WITH_FORMULA', f'Unexpected input after formula {formula!r}')
+    return node
+
+class MemoryBaserow(Client):
+    """
+    Client that answers Baserow's REST API from in-memory tables instead of a server.
+
+    Requests still go through `Client.make_api_request`, so the row cache,
+    write listeners and baserowapi's own parsing behave as they do against
+    Baserow. `data` maps BASEROW_TABLE_MAP names to `{'fields': [...],
+    'rows': [...]}`. Fields take Baserow's field metadata, except that link,
+    lookup and formula fields refer to tables and fields by name
+    (`link_row_table`, `link_row_related_field`, `through_field_name`,
+    `target_field_name`). Formulas support `field`, `lookup`, `join`,
+    `concat`, `totext`, `isblank` and `if`.
+
+    Every request sleeps `latency` seconds before it is answered, to stand in
+    for the round trip to Baserow, and is counted in `request_count`.
+    """
+
+    def __init__(self, data: dict, table_map: dict, cache=None, latency: float=0, resilience=None):
+        self.data = data
+        self.table_map = table_map
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.RLock()
+        super().__init__(url='memory://baserow', token='memory', cache=cache, resilience=resilience)
+        self.reset()
+
+    @staticmethod
+    def from_file(path: str, table_map: dict, cache=None, latency: float=0, resilience=None) -> 'MemoryBaserow':
+        with open(path) as f:
+            return MemoryBaserow(json.load(f), table_map, cache, latency, resilience)
+
+    def reset(self) -> None:
+        """
+        Drop every change and go back to the rows in `data`.
+        """
+        with self._lock:
+            self.tables = {}
+            self.names = {}
+            field_ids = iter(range(1, 1_000_000))
+            for name, table in self.data.items():
+                if name not in self.table_map:
+                    continue
+                table_id = self.table_map[name]
+                fields = []
+                for order, field in enumerate(table['fields']):
+                    field = {'id': next(field_ids), 'order': order, 'primary': order == 0, **field}
+                    field['read_only'] = field['type'] in READ_ONLY_TYPES
+                    fields.append(field)
+                self.tables[table_id] = {'fields': {field['name']: field for field in fields}, 'rows': {}, 'next_id': 1}
+                self.names[name] = table_id
+
+            self._version = 0
+            self._serialized = {}
+            # Links are set once every row exists, so tables can be listed in any order
+            created = []
+            for name, table_id in self.names.items():
+                fields = self.tables[table_id]['fields']
+                for values in self.data[name].get('rows', []):
+                    self.tables[table_id]['next_id'] = values.get('id', self.tables[table_id]['next_id'])
+                    plain = {key: value for key, value in values.items() if key in fields and fields[key]['type'] != 'link_row'}
+                    created.append((table_id, self._create(table_id, self._prepare(table_id, plain)), values))
+            for table_id, row, values in created:
+                fields = self.tables[table_id]['fields']
+                links = {key: value for key, value in values.items() if key in fields and fields[key]['type'] == 'link_row'}
+                self._update(table_id, row, self._prepare(table_id, links))
+        if self.cache is not None:
+            self.cache.backend.clear()
+
+    def perform_request(self, method, url, headers, data=None, timeout=None, files=None):
+        endpoint = url[len(self.url):] if url.startswith(self.url) else url
+        path, _, query = endpoint.partition('?')
+        params = dict(urllib.parse.parse_qsl(query, keep_blank_values=True))
+        # Round trip the body like `requests` would, so unserializable payloads fail here too
+        data = json.loads(json.dumps(data)) if data is not None else None
+
+        response = requests.Response()
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json'
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            with self._lock:
+                self.request_count += 1
+                status, body = self._dispatch(method, path, params, data)
+        except BaserowError as e:
+            status, body = e.status, {'error': e.error, 'detail': e.detail}
+        response.status_code = status
+        response._content = json.dumps(body).encode() if body is not None else b''
+        return response
+
+    def _dispatch(self, method: str, path: str, params: dict, data):
+        match = FIELDS_ENDPOINT.match(path)
+        if match and method == 'GET':
+            table_id = self._table_id(match.group(1))
+            return 200, [self._field_metadata(table_id, field) for field in self.tables[table_id]['fields'].values()]
+
+        match = ROWS_ENDPOINT.match(path)
+        if match is None:
+            raise BaserowError(404, 'ERROR_NOT_FOUND', f'No endpoint {method} {path}')
+        table_id = self._table_id(match.group(1))
+        row_id, batch, batch_delete = match.group(2), match.group(3), match.group(4)
+        user_field_names = params.get('user_field_names', '').lower() in ('true', '1')
+
+        if batch_delete and method == 'POST':
+            rows = [self._row(table_id, row_id) for row_id in data.get('items', [])]
+            for row in rows:
+                self._delete(table_id, row['id'])
+            return 204, None
+        if batch and method == 'POST':
+            items = [self._prepare(table_id, item) for item in data.get('items', [])]
+            rows = [self._create(table_id, item) for item in items]
+            return 200, {'items': [self._serialize(table_id, row, user_field_names) for row in rows]}
+        if batch and method == 'PATCH':
+            items = [(self._row(table_id, item.get('id', 0)), self._prepare(table_id, item)) for item in data.get('items', [])]
+            rows = [self._update(table_id, row, item) for row, item in items]
+            return 200, {'items': [self._serialize(table_id, row, user_field_names) for row in rows]}
+        if row_id and method == 'GET':
+            return 200, self._serialize(table_id, self._row(table_id, row_id), user_field_names)
+        if row_id and method == 'PATCH':
+            row = self._row(table_id, row_id)
+            row = self._update(table_id, row, self._prepare(table_id, data or {}))
+            return 200, self._serialize(table_id, row, user_field_names)
+        if row_id and method == 'DELETE':
+            self._delete(table_id, self._row(table_id, row_id)['id'])
+            return 204, None
+        if not row_id and method == 'POST':
+            row = self._create(table_id, self._prepare(table_id, data or {}))
+            return 200, self._serialize(table_id, row, user_field_names)
+        if not row_id and method == 'GET':
+            return 200, self._list(table_id, path, params, user_field_names)
+        raise BaserowError(405, 'ERROR_METHOD_NOT_ALLOWED', f'{method} is not allowed on {path}')
+
+    # Reads
+
+    def _list(self, table_id: int, path: str, params: dict, user_field_names: bool) -> dict:
+        fields = self.tables[table_id]['fields']
+        rows = self._serialized_rows(table_id)
+
+        filters = []
+        for key, value in params.items():
+            match = re.match(r'^filter__(.+)__([a-z_]+)$', key)
+            if match is None:
+                continue
+            field, operator = self._field_name(table_id, match.group(1)), match.group(2)
+            if operator not in OPERATORS:
+                raise BaserowError(400, 'ERROR_VIEW_FILTER_TYPE_DOES_NOT_EXIST', f'Unknown filter type {operator}')
+            filters.append((field, operator, value))
+        if params.get('filter_type', 'AND').upper() == 'OR' and filters:
+            rows = [row for row in rows if any(filter_rows([row], (f,)) for f in filters)]
+        else:
+            rows = filter_rows(rows, tuple(filters))
+
+        search = params.get('search', '').lower()
+        if search:
+            rows = [row for row in rows if any(search in cell_text(row[name]).lower() for name in fields)]
+
+        order_by = tuple(
+            f"{key[0] if key[0] in '+-' else '+'}{self._field_name(table_id, key.lstrip('+-'))}"
+            for key in params.get('order_by', '').split(',') if key.strip('+-')
+        )
+        rows = sort_rows(rows, order_by)
+
+        try:
+            page = int(params.get('page', 1))
+            size = int(params.get('size', 100))
+        except ValueError:
+            raise BaserowError(400, 'ERROR_QUERY_PARAMETER_VALIDATION', 'page and size must be integers')
+        if size < 1 or size > MAX_PAGE_SIZE:
+            raise BaserowError(400, 'ERROR_PAGE_SIZE_LIMIT', f'size must be between 1 and {MAX_PAGE_SIZE}')
+        if page < 1 or (page > 1 and (page - 1) * size >= len(rows)):
+            raise BaserowError(404, 'ERROR_INVALID_PAGE', f'Page {page} does not exist')
+
+        window = rows[(page - 1) * size:page * size]
+        include = self._projection(table_id, params)
+
+        def page_url(number):
+            return f"{path}?{urllib.parse.urlencode({**params, 'page': number})}"
+
+        return {
+            'count': len(rows),
+            'next': page_url(page + 1) if page * size < len(rows) else None,
+            'previous': page_url(page - 1) if page > 1 else None,
+            'results': [self._output(table_id, row, user_field_names, include) for row in window],
+        }
+
+    def _serialized_rows(self, table_id: int) -> list:
+        """
+        Every row of the table with lookups and formulas computed, rebuilt after any write.
+        """
+        version, rows = self._serialized.get(table_id, (None, None))
+        if version != self._version:
+            rows = [self._computed(table_id, row) for row in self.tables[table_id]['rows'].values()]
+            self._serialized[table_id] = (self._version, rows)
+        return rows
+
+    def _serialize(self, table_id: int, row: dict, user_field_names: bool) -> dict:
+        return self._output(table_id, self._computed(table_id, row), user_field_names)
+
+    def _output(self, table_id: int, row: dict, user_field_names: bool, include: set=None) -> dict:
+        fields = self.tables[table_id]['fields']
+        output = {'id': row['id'], 'order': row['order']}
+        for name, field in fields.items():
+            if include is None or name in include:
+                output[name if user_field_names else f"field_{field['id']}"] = copy.deepcopy(row[name])
+        return output
+
+    def _projection(self, table_id: int, params: dict):
+        include = params.get('include')
+        exclude = params.get('exclude')
+        names = set(self.tables[table_id]['fields'])
+        if include:
+            names = {self._field_name(table_id, name) for name in include.split(',')}
+        if exclude:
+            names -= {self._field_name(table_id, name) for name in exclude.split(',')}
+        return names if include or exclude else None
+
+    def _computed(self, table_id: int, row: dict) -> dict:
+        computed = {'id': row['id'], 'order': row['order']}
+        for name, field in self.tables[table_id]['fields'].items():
+            computed[name] = self._value(table_id, row, field)
+        return computed
+
+    def _value(self, table_id: int, row: dict, field: dict):
+        if field['type'] == 'link_row':
+            target = self.names.get(field.get('link_row_table'))
+            if target is None:
+                return [{'id': row_id, 'value': str(row_id)} for row_id in row.get(field['name'], [])]
+            target_rows = self.tables[target]['rows']
+            primary = self._primary(target)
+            return [
+                {'id': row_id, 'value': cell_text(self._value(target, target_rows[row_id], primary))}
+                for row_id in row.get(field['name'], []) if row_id in target_rows
+            ]
+        if field['type'] == 'lookup':
+            return self._lookup(table_id, row, field['through_field_name'], field['target_field_name'])
+        if field['type'] == 'formula':
+            return self._evaluate(parse_formula(field['formula']), table_id, row)
+        if field['type'] == 'count':
+            return str(len(self._value(table_id, row, self.tables[table_id]['fields'][field['through_field_name']])))
+        return row.get(field['name'])
+
+    def _lookup(self, table_id: int, row: dict, through: str, target_field: str) -> list:
+        link = self.tables[table_id]['fields'][through]
+        target = self.names.get(link.get('link_row_table'))
+        if target is None:
+            return []
+        target_rows = self.tables[target]['rows']
+        field = self.tables[target]['fields'][target_field]
+        return [
+            {'id': row_id, 'value': self._value(target, target_rows[row_id], field)}
+            for row_id in row.get(through, []) if row_id in target_rows
+        ]
+
+    # Formulas
+
+    def _evaluate(self, node, table_id: int, row: dict):
+        if node[0] == 'literal':
+            return node[1]
+        _, function, args = node
+        if function == 'if':
+            condition = self._evaluate(args[0], table_id, row)
+            return self._evaluate(args[1] if condition else args[2], table_id, row)
+
+        values = [self._evaluate(arg, table_id, row) for arg in args]
+        if function == 'field':
+            return self._value(table_id, row, self.tables[table_id]['fields'][values[0]])
+        if function == 'lookup':
+            return self._lookup(table_id, row, values[0], values[1])
+        if function == 'join':
+            return (values[1] if len(values) > 1 else '').join(cell_text(item) for item in values[0])
+        if function == 'concat':
+            return ''.join(cell_text(value) for value in values)
+        if function == 'totext':
+            return cell_text(values[0])
+        if function == 'isblank':
+            return values[0] in (None, '', [])
+        raise BaserowError(400, 'ERROR_WITH_FORMULA', f'Unsupported formula function {function}')
+
+    # Writes
+    #
+    # Every value is checked by _prepare before the first row changes, so a
+    # rejected batch leaves the tables untouched like it does in Baserow.
+
+    def _prepare(self, table_id: int, values: dict) -> dict:
+        """
+        `values` keyed by field name with links resolved to row IDs, or a 400 for anything Baserow would refuse.
+        """
+        prepared = {}
+        for key, value in values.items():
+            if key in ('id', 'order'):
+                continue
+            field = self.tables[table_id]['fields'][self._field_name(table_id, key)]
+            if field['read_only']:
+                raise BaserowError(400, 'ERROR_REQUEST_BODY_VALIDATION', f"Field {field['name']} is read only")
+            if field['type'] == 'link_row':
+                value = self._link_ids(field, value)
+            elif field['type'] == 'boolean':
+                value = value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+            prepared[field['name']] = value
+        return prepared
+
+    def _link_ids(self, field: dict, value) -> list:
+        target = self.names.get(field.get('link_row_table'))
+        ids = []
+        for item in value or []:
+            if isinstance(item, dict):
+                item = item.get('id')
+            if isinstance(item, str) and not item.isdigit() and target is not None:
+                # Baserow also accepts the primary field value of the linked row
+                primary = self._primary(target)
+                matches = [r['id'] for r in self.tables[target]['rows'].values() if cell_text(r.get(primary['name'])) == item]
+                if not matches:
+                    raise BaserowError(400, 'ERROR_REQUEST_BODY_VALIDATION', f"No row {item!r} to link in {field['name']}")
+                item = matches[0]
+            try:
+                item = int(item)
+            except (TypeError, ValueError):
+                raise BaserowError(400, 'ERROR_REQUEST_BODY_VALIDATION', f"Invalid link {item!r} in {field['name']}")
+            if target is not None and item not in self.tables[target]['rows']:
+                raise BaserowError(400, 'ERROR_REQUEST_BODY_VALIDATION', f"Row {item} does not exist for {field['name']}")
+            if item not in ids:
+                ids.append(item)
+        return ids
+
+    def _create(self, table_id: int, values: dict) -> dict:
+        table = self.tables[table_id]
+        row = {'id': table['next_id'], 'order': f"{table['next_id']}.00000000000000000000"}
+        table['next_id'] += 1
+        for name, field in table['fields'].items():
+            if field['type'] == 'boolean':
+                row[name] = False
+            elif field['type'] == 'link_row':
+                row[name] = []
+            elif field['type'] not in READ_ONLY_TYPES:
+                row[name] = None
+        table['rows'][row['id']] = row
+        return self._update(table_id, row, values, stamp_created=True)
+
+    def _update(self, table_id: int, row: dict, values: dict, stamp_created: bool=False) -> dict:
+        fields = self.tables[table_id]['fields']
+        for name, value in values.items():
+            if fields[name]['type'] == 'link_row':
+                self._set_link(row, fields[name], value)
+            else:
+                row[name] = value
+
+        now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        for name, field in fields.items():
+            if field['type'] == 'last_modified' or (stamp_created and field['type'] == 'created_on'):
+                row[name] = now
+        self._version += 1
+        return row
+
+    def _set_link(self, row: dict, field: dict, ids: list) -> None:
+        old = row.get(field['name'], [])
+        row[field['name']] = ids
+        target = self.names.get(field.get('link_row_table'))
+        related = field.get('link_row_related_field')
+        if target is None or not related:
+            return
+        # Keep the other side of the link in step
+        target_rows = self.tables[target]['rows']
+        for target_id in set(old) | set(ids):
+            linked = target_rows[target_id].setdefault(related, []) if target_id in target_rows else None
+            if linked is None:
+                continue
+            if target_id in ids and row['id'] not in linked:
+                linked.append(row['id'])
+            elif target_id not in ids and row['id'] in linked:
+                linked.remove(row['id'])
+
+    def _delete(self, table_id: int, row_id: int) -> None:
+        del self.tables[table_id]['rows'][row_id]
+        # Links to deleted rows disappear from both sides, like in Baserow
+        for table in self.tables.values():
+            for field in table['fields'].values():
+                if field['type'] == 'link_row' and self.names.get(field.get('link_row_table')) == table_id:
+                    for row in table['rows'].values():
+                        if row_id in row.get(field['name'], []):
+                            row[field['name']].remove(row_id)
+        self._version += 1
+
+    # Helpers
+
+    def _table_id(self, table_id: str) -> int:
+        if int(table_id) not in self.tables:
+            raise BaserowError(404, 'ERROR_TABLE_DOES_NOT_EXIST', f'Table {table_id} does not exist')
+        return int(table_id)
+
+    def _row(self, table_id: int, row_id) -> dict:
+        row = self.tables[table_id]['rows'].get(int(row_id))
+        if row is None:
+            raise BaserowError(404, 'ERROR_ROW_DOES_NOT_EXIST', f'Row {row_id} does not exist')
+        return row
+
+    def _primary(self, table_id: int) -> dict:
+        return next(field for field in self.tables[table_id]['fields'].values() if field['primary'])
+
+    def _field_name(self, table_id: int, key: str) -> str:
+        fields = self.tables[table_id]['fields']
+        if key in fields:
+            return key
+        for name, field in fields.items():
+            if key == f"field_{field['id']}":
+                return name
+        raise BaserowError(400, 'ERROR_FIELD_DOES_NOT_EXIST', f'Field {key} does not exist')
+
+    def _field_metadata(self, table_id: int, field: dict) -> dict:
+        metadata = {key: value for key, value in field.items() if key not in ('link_row_table', 'link_row_related_field')}
+        metadata['table_id'] = table_id
+        if field['type'] == 'link_row':
+            metadata['link_row_table_id'] = self.names.get(field.get('link_row_table'))
+            metadata['link_row_related_field_id'] = None
+            related = field.get('link_row_related_field')
+            if related and metadata['link_row_table_id'] is not None:
+                metadata['link_row_related_field_id'] = self.tables[metadata['link_row_table_id']]['fields'][related]['id']
+        return metadata
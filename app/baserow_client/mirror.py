@@ -0,0 +1,242 @@
+import logging
+from django.db import connection, transaction
+from django.db.models import F, FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from inventory import settings
+from inventory.settings import BASEROW_TABLE_MAP
+from ..models import MirrorCursor, MirrorLink, MirrorRow, MirrorValue
+from . import tables
+from .cache import parse_row_endpoint
+from .filtering import OPERATORS, cell_date, cell_ids, cell_text, is_true, sort_key, supports
+from .pagination import Page, iter_rows
+from .rows import decode_rows
+
+logger = logging.getLogger(__name__)
+
+# SQLite refuses statements with more bound parameters than this
+DELETE_CHUNK = 500
+# Operators matching exactly the rows their counterpart does not
+NEGATED = {'not_equal': 'equal', 'contains_not': 'contains', 'not_empty': 'empty', 'link_row_has_not': 'link_row_has'}
+VALUE_COLUMNS = ('row', 'table_id', 'field', 'text', 'folded', 'date', 'boolean', 'truthy', 'empty', 'sort_kind', 'sort_number', 'sort_text')
+LINK_COLUMNS = ('row', 'table_id', 'field', 'linked_id')
+DATE_LOOKUPS = {
+    'date_equal': 'date',
+    'date_before': 'date__lt',
+    'date_before_or_equal': 'date__lte',
+    'date_after': 'date__gt',
+    'date_after_or_equal': 'date__gte',
+}
+
+def mirrored_table_ids() -> set:
+    return {BASEROW_TABLE_MAP[name] for name in settings.BASEROW_MIRROR['TABLES'] if name in BASEROW_TABLE_MAP}
+
+def serves(view) -> bool:
+    """
+    Whether BASEROW_MIRROR lists `view` among the views that read from the mirror.
+
+    Views are listed by the name of their sync class, which the Async* views extend.
+    """
+    return settings.BASEROW_MIRROR['ENABLED'] and any(cls.__name__ in settings.BASEROW_MIRROR['VIEWS'] for cls in type(view).__mro__)
+
+def is_synced(table) -> bool:
+    return table.id in mirrored_table_ids() and MirrorCursor.objects.filter(table_id=table.id).exists()
+
+def can_answer(table, filters: tuple) -> bool:
+    return supports(filters) and is_synced(table)
+
+def row_queryset(table, order_by: tuple=(), filters: tuple=()):
+    """
+    QuerySet of the mirrored rows of `table` matching `filters`, sorted by
+    `order_by`, both evaluated by the database on the rows' indexed cells.
+    """
+    queryset = MirrorRow.objects.filter(table_id=table.id)
+    for field, operator, value in filters:
+        queryset = queryset.filter(_matches(table.id, field, operator, value))
+
+    ordering = []
+    for i, key in enumerate(order_by):
+        alias = f'sort_{i}'
+        queryset = queryset.alias(**{alias: FilteredRelation('values', condition=Q(values__field=key.lstrip('+-')))})
+        # Rows holding no cell for the field sort like an empty cell
+        for column, empty in zip(('sort_kind', 'sort_number', 'sort_text'), sort_key(None)):
+            expression = Coalesce(F(f'{alias}__{column}'), Value(empty), output_field=MirrorValue._meta.get_field(column))
+            ordering.append(expression.desc() if key.startswith('-') else expression.asc())
+    return queryset.order_by(*ordering, 'position', 'row_id')
+
+def get_rows(table, order_by: tuple=(), filters: tuple=()) -> list:
+    """
+    Raw JSON of the mirrored rows of `table` matching `filters`, sorted by `order_by`.
+    """
+    return list(row_queryset(table, order_by, filters).values_list('data', flat=True))
+
+def count_rows(table, filters: tuple=()) -> int:
+    return row_queryset(table, (), filters).count()
+
+def get_page(table, page: int, size: int, order_by: tuple=(), filters: tuple=(), projection=None) -> Page:
+    queryset = row_queryset(table, order_by, filters)
+    window = list(queryset[page * size:(page + 1) * size].values_list('data', flat=True))
+    if projection is not None:
+        window = [projection.apply(table, row) for row in window]
+    return Page(decode_rows(table, window), queryset.count())
+
+def sync_table(name: str, full: bool=False) -> int:
+    """
+    Copy the rows of table `name` changed since its cursor into the mirror, returning how many were copied.
+
+    Rows are read newest first and reading stops at the first row older than
+    the cursor. Deletions are only noticed by a `full` sync, which also runs
+    when the table has no cursor or no `updated_on` field.
+    """
+    table = tables.get(name)
+    updated_field = settings.BASEROW_MIRROR['UPDATED_FIELD']
+    cursor = MirrorCursor.objects.filter(table_id=table.id).first()
+    full = full or cursor is None or cursor.updated_on is None or updated_field not in table.field_names
+
+    if full:
+        rows = list(iter_rows(table))
+    else:
+        rows = []
+        for row in iter_rows(table, f'order_by=-{updated_field}'):
+            updated_on = _updated_on(row)
+            if updated_on is not None and updated_on < cursor.updated_on:
+                break
+            rows.append(row)
+
+    with transaction.atomic():
+        _upsert(table.id, rows)
+        if full:
+            seen = {row['id'] for row in rows}
+            stale = [row_id for row_id in MirrorRow.objects.filter(table_id=table.id).values_list('row_id', flat=True) if row_id not in seen]
+            delete_rows(table.id, stale)
+
+        newest = [updated_on for updated_on in map(_updated_on, rows) if updated_on is not None]
+        if not full and cursor.updated_on is not None:
+            newest.append(cursor.updated_on)
+        MirrorCursor.objects.update_or_create(
+            table_id=table.id,
+            defaults={'updated_on': max(newest, default=None), 'synced_at': timezone.now()},
+        )
+    return len(rows)
+
+def apply_write(endpoint: str, method: str, data, response) -> None:
+    """
+    Client write listener that copies rows written through the API into the mirror.
+
+    Lookup and formula fields of other tables that read from the written rows
+    catch up on the next sync.
+    """
+    parsed = parse_row_endpoint(endpoint)
+    if parsed is None:
+        return
+    table_id, row_id, batch, batch_delete, query = parsed
+    if table_id not in mirrored_table_ids():
+        return
+
+    try:
+        if batch_delete:
+            delete_rows(table_id, data['items'])
+        elif method == 'DELETE':
+            delete_rows(table_id, [row_id])
+        elif 'user_field_names=true' in query:
+            store_rows(table_id, response['items'] if batch else [response])
+        else:
+            forget(table_id)
+    except Exception:
+        logger.exception(f'Could not apply {method} {endpoint} to the Baserow mirror')
+
+def store_rows(table_id: int, rows: list) -> None:
+    if table_id in mirrored_table_ids():
+        _upsert(table_id, rows)
+
+def delete_rows(table_id: int, row_ids: list) -> None:
+    if table_id in mirrored_table_ids():
+        for i in range(0, len(row_ids), DELETE_CHUNK):
+            MirrorRow.objects.filter(table_id=table_id, row_id__in=row_ids[i:i + DELETE_CHUNK]).delete()
+
+def forget(table_id: int) -> None:
+    """
+    Stop answering from the mirror of `table_id` until the next sync, for rows that changed but can not be stored, e.g. rows keyed by field ID.
+    """
+    MirrorCursor.objects.filter(table_id=table_id).delete()
+
+def _matches(table_id: int, field: str, operator: str, value: str) -> Q:
+    """
+    Condition on MirrorRow matching the rows whose `field` cell passes (operator, value) like `filtering.OPERATORS`.
+    """
+    if operator in NEGATED:
+        return ~_matches(table_id, field, NEGATED[operator], value)
+    if operator == 'link_row_has':
+        if not value.isdigit():
+            return Q(pk__in=[])
+        return Q(pk__in=MirrorLink.objects.filter(table_id=table_id, field=field, linked_id=int(value)).values('row'))
+
+    cells = MirrorValue.objects.filter(table_id=table_id, field=field)
+    condition = Q(pk__in=cells.filter(_cell_condition(operator, value)).values('row'))
+    if OPERATORS[operator](None, value):
+        # Rows mirrored before the field existed hold no cell for it, which reads as an empty one
+        condition |= ~Q(pk__in=cells.values('row'))
+    return condition
+
+def _cell_condition(operator: str, value: str) -> Q:
+    if operator == 'equal':
+        # Boolean cells hold '1' or '0', narrowing on the text first lets the index find both kinds
+        boolean = cell_text(is_true(value))
+        return Q(text__in=[value, boolean]) & (Q(boolean=False, text=value) | Q(boolean=True, text=boolean))
+    if operator == 'contains':
+        return Q(folded__contains=value.lower())
+    if operator == 'empty':
+        return Q(empty=True)
+    if operator == 'boolean':
+        return Q(truthy=is_true(value))
+    if operator == 'date_not_equal':
+        return ~Q(date=cell_date(value))
+    # Dates only compare when both are set
+    date = cell_date(value)
+    if not date:
+        return Q(pk__in=[])
+    return ~Q(date='') & Q(**{DATE_LOOKUPS[operator]: date})
+
+@transaction.atomic
+def _upsert(table_id: int, rows: list) -> None:
+    MirrorRow.objects.bulk_create(
+        [MirrorRow(table_id=table_id, row_id=row['id'], data=row, updated_on=_updated_on(row), position=float(row.get('order') or 0)) for row in rows],
+        update_conflicts=True,
+        unique_fields=['table_id', 'row_id'],
+        update_fields=['data', 'updated_on', 'position'],
+    )
+
+    # The cells of the written rows are replaced as a whole
+    for i in range(0, len(rows), DELETE_CHUNK):
+        chunk = {row['id']: row for row in rows[i:i + DELETE_CHUNK]}
+        pks = dict(MirrorRow.objects.filter(table_id=table_id, row_id__in=list(chunk)).values_list('row_id', 'pk'))
+        MirrorValue.objects.filter(row_id__in=list(pks.values())).delete()
+        MirrorLink.objects.filter(row_id__in=list(pks.values())).delete()
+        values, links = [], []
+        for row_id, row in chunk.items():
+            for field, cell in row.items():
+                if field in ('id', 'order'):
+                    continue
+                text = cell_text(cell)
+                values.append((
+                    pks[row_id], table_id, field, text, text.lower(), cell_date(cell),
+                    isinstance(cell, bool), bool(cell), cell in (None, '', [], False), *sort_key(cell),
+                ))
+                links.extend((pks[row_id], table_id, field, linked_id) for linked_id in cell_ids(cell))
+        _insert(MirrorValue, VALUE_COLUMNS, values)
+        _insert(MirrorLink, LINK_COLUMNS, links)
+
+def _insert(model, columns: tuple, rows: list) -> None:
+    # bulk_create spends far longer preparing every field of every cell than the database takes to store them
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    names = ', '.join(quote(model._meta.get_field(column).column) for column in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {quote(model._meta.db_table)} ({names}) VALUES ({placeholders})', rows)
+
+def _updated_on(row: dict):
+    value = row.get(settings.BASEROW_MIRROR['UPDATED_FIELD'])
+    return parse_datetime(value) if isinstance(value, str) else None
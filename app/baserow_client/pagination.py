@@ -0,0 +1,103 @@
+from typing import NamedTuple
+import requests
+from .fanout import fan_out
+from .rows import SlimRow, decode_row, decode_rows
+
+# Baserow refuses list requests with a `size` above this
+MAX_PAGE_SIZE = 200
+
+class Page(NamedTuple):
+    rows: list
+    count: int
+
+def fetch_page(table, query: str, page: int, size: int) -> dict:
+    url = f'/api/database/rows/table/{table.id}/?user_field_names=true&page={page}&size={size}'
+    if query:
+        url = f'{url}&{query}'
+    return table.client.make_api_request(url)
+
+def iter_rows(table, query: str='', size: int=MAX_PAGE_SIZE):
+    """
+    Yield the raw JSON of every row matching `query`, one Baserow page at a time.
+    """
+    page = 1
+    while True:
+        response = fetch_page(table, query, page, size)
+        yield from response['results']
+        if not response.get('next'):
+            return
+        page += 1
+
+def past_the_end(error: Exception) -> bool:
+    """
+    Whether `error` is Baserow's 404 for a list page after the last one.
+    """
+    return isinstance(error, requests.exceptions.HTTPError) and getattr(error.response, 'status_code', None) == 404
+
+def get_row(table, row_id: int, projection=None) -> SlimRow:
+    """
+    A single row, without the columns outside `projection`.
+
+    Baserow's row endpoint takes no `include`, so the columns are dropped
+    before the row is parsed instead.
+    """
+    response = table.client.make_api_request(f'/api/database/rows/table/{table.id}/{row_id}/?user_field_names=true')
+    if projection is not None:
+        response = projection.apply(table, response)
+    return decode_row(table, response)
+
+def get_rows(table, query: str='') -> list:
+    """
+    Every row matching `query` as SlimRows. Unlike `Table.get_rows`, which
+    stops at the first failed page, errors are raised.
+    """
+    return decode_rows(table, iter_rows(table, query))
+
+def count_rows(table, query: str) -> int:
+    return fetch_page(table, query, 1, 1)['count']
+
+def get_page(table, page: int=0, size: int=5, query: str='') -> Page:
+    """
+    Fetch a single zero-indexed page of `size` rows from Baserow.
+
+    `query` holds the already encoded filter/sort parameters. Only the Baserow
+    pages overlapping the requested window are downloaded, in parallel, and the
+    total comes from the `count` Baserow returns alongside the results.
+    """
+    if size <= 0:
+        return Page([], count_rows(table, query))
+
+    if size <= MAX_PAGE_SIZE:
+        # The requested page lines up with a Baserow page
+        chunk, first, last = size, page + 1, page + 1
+    else:
+        chunk = MAX_PAGE_SIZE
+        first = page * size // chunk + 1
+        last = ((page + 1) * size - 1) // chunk + 1
+
+    def fetch(baserow_page):
+        try:
+            return fetch_page(table, query, baserow_page, chunk)
+        except requests.exceptions.HTTPError as e:
+            if not past_the_end(e):
+                raise
+            return e
+
+    rows = []
+    count = None
+    for baserow_page, response in zip(range(first, last + 1), fan_out.map(fetch, range(first, last + 1))):
+        if isinstance(response, Exception):
+            # Baserow answers pages past the end with a 404 instead of an empty list
+            if baserow_page == 1:
+                raise response
+            break
+        count = response['count']
+        rows.extend(response['results'])
+        if not response.get('next'):
+            break
+
+    if count is None:
+        return Page([], count_rows(table, query))
+
+    offset = page * size - (first - 1) * chunk
+    return Page(decode_rows(table, rows[offset:offset + size]), count)
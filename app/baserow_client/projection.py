@@ -0,0 +1,43 @@
+import urllib.parse
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    Field manifest of a view: the columns of a table it reads.
+
+    Either `include` lists the columns the view uses, or `exclude` lists the
+    ones it must never get. Names the table does not have are ignored, so a
+    manifest may list columns that only exist in some deployments.
+    """
+    include: tuple = ()
+    exclude: tuple = ()
+
+    def names(self, table) -> list:
+        """
+        The projected field names of `table`, or None when that is every field.
+        """
+        field_names = table.field_names
+        names = [name for name in field_names if name in self.include] if self.include else field_names
+        names = [name for name in names if name not in self.exclude]
+        return names if len(names) < len(field_names) else None
+
+    def extend(self, table, query: str) -> str:
+        """
+        `query` with Baserow's `include` parameter added, for list requests.
+        """
+        names = self.names(table)
+        if names is None:
+            return query
+        include = 'include=' + ','.join(urllib.parse.quote(name) for name in names)
+        return f'{query}&{include}' if query else include
+
+    def apply(self, table, row: dict) -> dict:
+        """
+        Drop the columns outside the projection from the raw JSON of a row.
+        """
+        names = self.names(table)
+        if names is None:
+            return row
+        keep = {'id', 'order', *names}
+        return {key: value for key, value in row.items() if key in keep}
@@ -0,0 +1,136 @@
+import functools
+import json
+import urllib.parse
+from dataclasses import dataclass, replace
+from asgiref.sync import sync_to_async
+from . import async_baserow, get_baserow_operator, mirror, tables
+from .pagination import Page, get_page, iter_rows
+from .projection import Projection
+
+# Largest page a search may ask for, bigger windows fan out to too many Baserow pages
+MAX_ROWS = 1000
+# Seconds between schema reloads when a search names a field the cached schema does not have
+UNKNOWN_FIELD_RELOAD_INTERVAL = 60
+
+class InvalidQuery(ValueError):
+    pass
+
+@dataclass(frozen=True)
+class ListQuery:
+    """
+    A parsed `search` parameter as sent by the frontend's lazy tables.
+
+    Filters are kept as sorted (field, operator, value) tuples so two searches
+    that only differ in key order compile to the same Baserow query.
+    """
+    page: int = 0
+    size: int = 5
+    order_by: tuple = ()
+    filters: tuple = ()
+
+    @staticmethod
+    def parse(search: str, default_size: int=5) -> 'ListQuery':
+        return _parse(search or '{}', default_size)
+
+    def with_filter(self, field: str, value, match_mode: str='equals') -> 'ListQuery':
+        filters = tuple(f for f in self.filters if f[0] != field)
+        filters += ((field, get_baserow_operator(match_mode), str(value)),)
+        return replace(self, filters=tuple(sorted(filters)))
+
+    def compile(self, table) -> str:
+        return _compile(table, self.order_by, self.filters)
+
+    def execute(self, table, use_mirror: bool=False, projection: Projection=None) -> Page:
+        """
+        Fetch the requested page, from the local mirror when `use_mirror` is set and it can answer the query.
+
+        Rows only hold the columns in `projection`, when given.
+        """
+        query = self.compile(table)
+        if use_mirror and mirror.can_answer(table, self.filters):
+            return mirror.get_page(table, self.page, self.size, self.order_by, self.filters, projection)
+        if projection is not None:
+            query = projection.extend(table, query)
+        return get_page(table, self.page, self.size, query)
+
+    async def aexecute(self, table, use_mirror: bool=False, projection: Projection=None) -> Page:
+        # Compiling may reload the table's fields from Baserow
+        query = await sync_to_async(self.compile, thread_sensitive=False)(table)
+        if use_mirror and await sync_to_async(mirror.can_answer)(table, self.filters):
+            return await sync_to_async(mirror.get_page)(table, self.page, self.size, self.order_by, self.filters, projection)
+        if projection is not None:
+            query = projection.extend(table, query)
+        return await async_baserow.get_page(table, self.page, self.size, query)
+
+def linked_to(table, field: str, row_id: int) -> str:
+    """
+    Compiled query for the rows of `table` whose link `field` contains `row_id`.
+    """
+    return ListQuery(filters=((field, 'link_row_has', str(row_id)),)).compile(table)
+
+def linked_ids(table, field: str, row_id: int) -> list:
+    """
+    IDs of the rows of `table` linked to `row_id` through `field`, without downloading their other fields.
+    """
+    query = f'{linked_to(table, field, row_id)}&include={urllib.parse.quote(field)}'
+    return [row['id'] for row in iter_rows(table, query)]
+
+@functools.lru_cache(maxsize=512)
+def _parse(search: str, default_size: int) -> ListQuery:
+    try:
+        search = json.loads(search)
+    except json.JSONDecodeError as e:
+        raise InvalidQuery(f'search is not valid JSON: {e}')
+    if not isinstance(search, dict):
+        raise InvalidQuery('search must be an object')
+
+    # Pagination
+    page = search.get('page') or 0
+    size = search.get('rows') or default_size
+    if not isinstance(page, int) or not isinstance(size, int) or page < 0 or size < 0:
+        raise InvalidQuery('page and rows must be non-negative integers')
+    if size > MAX_ROWS:
+        raise InvalidQuery(f'rows must be at most {MAX_ROWS}')
+
+    # Sorting
+    order_by = ()
+    sort_field = search.get('sortField')
+    if sort_field:
+        sort_direction = '+' if search.get('sortOrder', 1) == 1 else '-'
+        order_by = (f'{sort_direction}{sort_field}',)
+
+    # Filtering
+    filters = []
+    search_filters = search.get('filters') or {}
+    if not isinstance(search_filters, dict):
+        raise InvalidQuery('filters must be an object')
+    for key, search_filter in search_filters.items():
+        if not isinstance(search_filter, dict) or not isinstance(search_filter.get('constraints', []), list):
+            raise InvalidQuery(f'filter {key} must be an object with a list of constraints')
+        for constraint in search_filter.get('constraints', []):
+            if not isinstance(constraint, dict) or not isinstance(constraint.get('matchMode', 'equals'), str):
+                raise InvalidQuery(f'constraints of filter {key} must be objects with a string matchMode')
+            if constraint.get('value') is None:
+                continue
+            operator = get_baserow_operator(constraint.get('matchMode', 'equals'))
+            filters.append((key, operator, str(constraint['value'])))
+
+    return ListQuery(page, size, order_by, tuple(sorted(filters)))
+
+@functools.lru_cache(maxsize=512)
+def _compile(table, order_by: tuple, filters: tuple) -> str:
+    referenced = {o.lstrip('+-') for o in order_by} | {f[0] for f in filters}
+    unknown = referenced - set(table.field_names)
+    if unknown:
+        # The cached schema may predate the field, check once more against Baserow
+        tables.reload_fields(table, min_interval=UNKNOWN_FIELD_RELOAD_INTERVAL)
+        unknown = referenced - set(table.field_names)
+    if unknown:
+        raise InvalidQuery(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    params = []
+    if order_by:
+        params.append(f"order_by={urllib.parse.quote(','.join(order_by))}")
+    for field, operator, value in filters:
+        params.append(f'filter__{urllib.parse.quote_plus(field)}__{operator}={urllib.parse.quote_plus(value)}')
+    return '&'.join(params)
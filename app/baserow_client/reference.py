@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from inventory import settings
+from . import tables
+from .pagination import get_rows
+
+logger = logging.getLogger(__name__)
+
+class ReferenceTable:
+    """
+    In-memory copy of a small lookup table such as STATUS or USER_TYPES.
+
+    The rows are loaded once per worker. After `refresh_interval` seconds a
+    read still gets the rows in memory while a background thread reloads
+    them, so serving a lookup never waits on Baserow after the first load.
+    """
+
+    def __init__(self, name: str, label_field: str='label', refresh_interval: float=None):
+        self.name = name
+        self.label_field = label_field
+        self.refresh_interval = refresh_interval or settings.BASEROW_REFERENCE_REFRESH
+        self._rows = None
+        self._loaded_at = 0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self) -> list:
+        """
+        Rows as `{**row.content, 'id': row.id}`, in table order. Callers must not mutate them.
+        """
+        if self._rows is None:
+            with self._lock:
+                if self._rows is None:
+                    self._load()
+        elif time.monotonic() - self._loaded_at > self.refresh_interval:
+            self._refresh_in_background()
+        return self._rows
+
+    def id_for(self, label: str):
+        for row in self.rows:
+            if row.get(self.label_field) == label:
+                return row['id']
+        return None
+
+    def label_for(self, id: int):
+        for row in self.rows:
+            if row['id'] == id:
+                return row.get(self.label_field)
+        return None
+
+    def invalidate(self) -> None:
+        """
+        Reload the rows now, bypassing the row cache. When Baserow fails the
+        error is raised and the rows loaded before are kept.
+        """
+        with self._lock:
+            self._load()
+
+    def _load(self) -> None:
+        table = tables.get(self.name)
+        cache = getattr(table.client, 'cache', None)
+        if cache is not None:
+            # Read past the cache, the tables looking up these rows only need dropping when they changed
+            cache.invalidate(table.id, dependents=False)
+        # Table.get_rows stops quietly at a failed page, which would leave no rows at all
+        rows = []
+        for row in get_rows(table):
+            data = row.content
+            data['id'] = row.id
+            rows.append(data)
+        if cache is not None and self._rows is not None and rows != self._rows:
+            cache.invalidate_dependents(table.id)
+        # Swapped in one assignment so readers never see a partial list
+        self._rows = rows
+        self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            self.invalidate()
+        except Exception as e:
+            # Keep serving the rows we have, the next read past the interval tries again
+            logger.warning(f'Could not refresh {self.name} reference data: {e}')
+            self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing = False
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import threading
+import time
+from baserowapi import FieldList
+from baserowapi.models.table import Table
+
+logger = logging.getLogger(__name__)
+
+class TableRegistry:
+    """
+    Resolves Baserow tables by their BASEROW_TABLE_MAP name on first use.
+
+    Field metadata is read from the schema snapshot when one exists, so a
+    fresh worker does not need to reach Baserow before serving requests.
+    """
+
+    def __init__(self, client, table_map: dict, snapshot_path: str=None):
+        self.client = client
+        self.table_map = table_map
+        self.snapshot_path = snapshot_path
+        self._tables = {}
+        self._snapshot = None
+        # Raw field metadata per table id, as returned by Baserow
+        self._schema = {}
+        # When each table's fields were last fetched from Baserow, by table id
+        self._reloaded_at = {}
+        self._lock = threading.RLock()
+
+    def lazy(self, name: str) -> 'LazyTable':
+        return LazyTable(self, name)
+
+    def get(self, name: str) -> Table:
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            if name not in self._tables:
+                table = self.client.get_table(self.table_map[name])
+                fields = self._read_snapshot().get(str(table.id))
+                if fields is not None:
+                    self._set_fields(table, fields)
+                self._tables[name] = table
+            return self._tables[name]
+
+    def reload_fields(self, table: Table, min_interval: float=0) -> None:
+        """
+        Fetch the fields of `table` from Baserow, unless they were fetched less than `min_interval` seconds ago.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if min_interval and now - self._reloaded_at.get(table.id, -min_interval) < min_interval:
+                return
+            self._reloaded_at[table.id] = now
+        fields = table.client.make_api_request(f'/api/database/fields/table/{table.id}/')
+        with self._lock:
+            self._set_fields(table, fields)
+
+    def warm_up(self, save: bool=True) -> None:
+        fetched = False
+        for name in self.table_map:
+            table = self.get(name)
+            if str(table.id) not in self._schema:
+                self.reload_fields(table)
+                fetched = True
+        if fetched and save and self.snapshot_path:
+            self.save_snapshot()
+
+    def save_snapshot(self, refresh: bool=False) -> None:
+        for name in self.table_map:
+            table = self.get(name)
+            if refresh or str(table.id) not in self._schema:
+                self.reload_fields(table)
+
+        tmp_path = f'{self.snapshot_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._schema, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _read_snapshot(self) -> dict:
+        if self._snapshot is None:
+            self._snapshot = {}
+            if self.snapshot_path and os.path.exists(self.snapshot_path):
+                try:
+                    with open(self.snapshot_path) as f:
+                        self._snapshot = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f'Ignoring unreadable Baserow schema snapshot {self.snapshot_path}: {e}')
+        return self._snapshot
+
+    def _set_fields(self, table: Table, fields: list) -> None:
+        table._fields = FieldList([Table._field_class_from_data(fd)(fd['name'], fd) for fd in fields])
+        table._primary_field = None
+        table._writable_fields = None
+        self._schema[str(table.id)] = fields
+
+class LazyTable:
+    """
+    Class attribute that stands in for a Baserow table until it is first accessed.
+    """
+
+    def __init__(self, registry: TableRegistry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __get__(self, instance, owner) -> Table:
+        return self.registry.get(self.name)
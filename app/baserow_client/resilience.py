@@ -0,0 +1,228 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Statuses that say Baserow is overloaded or restarting rather than that the request is wrong
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+class BaserowUnavailable(Exception):
+    """
+    Baserow is down, overloaded or rate limiting us, and retrying did not help.
+
+    `retry_after` is the number of seconds after which trying again may
+    succeed, when known.
+    """
+
+    def __init__(self, message: str, retry_after: float=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class BaserowWriteFailed(BaserowUnavailable):
+    """
+    A write that was sent failed with no answer or a transient status, so
+    Baserow may still have applied it. It is neither retried nor answered
+    with a Retry-After, so that it is not sent twice.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+def unavailable_cause(exc: BaseException) -> BaserowUnavailable:
+    """
+    The BaserowUnavailable behind `exc`, if any. baserowapi re-raises errors as plain Exceptions.
+    """
+    while exc is not None:
+        if isinstance(exc, BaserowUnavailable):
+            return exc
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+def parse_retry_after(value: str) -> float:
+    """
+    Seconds to wait according to a `Retry-After` header, which holds either seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Client-side rate limit of `rate` requests per second with bursts of up to
+    `burst`, shared by every thread of the process. A `rate` of 0 disables it.
+    """
+
+    def __init__(self, rate: float=0, burst: int=1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float:
+        """
+        Take a token and return the seconds to wait before using it.
+
+        Raises BaserowUnavailable without taking a token when that would be
+        more than `max_wait`, so threads do not queue up behind a long pause.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                wait = max(wait, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                raise BaserowUnavailable(f'Baserow rate limit reached, next request possible in {wait:.1f}s', retry_after=wait)
+            if self.rate > 0:
+                self._tokens -= 1
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for `seconds`, e.g. after Baserow answered 429.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class CircuitBreaker:
+    """
+    Fails requests fast once `threshold` in a row have failed, instead of
+    letting every thread wait for timeouts from a Baserow that is down.
+
+    After `reset_timeout` seconds one request at a time is let through to
+    probe Baserow, the first that succeeds closes the circuit again.
+    """
+
+    def __init__(self, threshold: int=5, reset_timeout: float=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._probe_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_timeout and now >= self._probe_at:
+                # A probe that never reports back does not keep the circuit shut for good
+                self._probe_at = now + self.reset_timeout
+                return
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - now)
+        raise BaserowUnavailable('Baserow is unavailable, not sending requests for now', retry_after=retry_after)
+
+    def success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.warning('Baserow is reachable again, closing the circuit')
+            self.failures = 0
+            self._opened_at = None
+            self._probe_at = 0.0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.threshold and self.failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning(f'{self.failures} Baserow requests in a row failed, opening the circuit')
+                self._opened_at = time.monotonic()
+
+class Resilience:
+    """
+    Rate limiting, retries and circuit breaking around the requests a client sends to Baserow.
+
+    Requests answered with a transient status, or that failed to get an
+    answer, are retried up to `attempts` times in total with exponential
+    backoff and full jitter, or after the `Retry-After` Baserow asked for.
+    Only `methods` are retried after Baserow may have acted on the request;
+    429s and failed connections are retried for every method because the
+    request was never processed. Waits over `max_wait` seconds are not
+    waited out, BaserowUnavailable is raised instead.
+    """
+
+    def __init__(self, bucket: TokenBucket=None, breaker: CircuitBreaker=None, attempts: int=3,
+                 backoff: float=0.2, max_wait: float=5, methods=('GET', 'DELETE')):
+        self.bucket = bucket or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.methods = set(methods)
+
+    @staticmethod
+    def from_settings(config: dict) -> 'Resilience':
+        return Resilience(
+            TokenBucket(config.get('RATE_LIMIT', 0), config.get('RATE_BURST', 1)),
+            CircuitBreaker(config.get('FAILURE_THRESHOLD', 5), config.get('RESET_TIMEOUT', 30)),
+            attempts=config.get('RETRY_ATTEMPTS', 3),
+            backoff=config.get('RETRY_BACKOFF', 0.2),
+            max_wait=config.get('MAX_WAIT', 5),
+            methods=config.get('RETRY_METHODS', ('GET', 'DELETE')),
+        )
+
+    def admit(self) -> float:
+        """
+        Seconds to wait before sending a request, raises BaserowUnavailable when it should not be sent.
+        """
+        self.breaker.allow()
+        return self.bucket.reserve(self.max_wait)
+
+    def retry_delay(self, method: str, url: str, attempt: int, status: int=None,
+                    retry_after: str=None, error: Exception=None, sent: bool=True) -> float:
+        """
+        Seconds to wait before retrying the outcome of attempt number `attempt` (from 0).
+
+        Returns None when the response is final. Raises BaserowUnavailable when
+        the outcome is a failure that should not, or can no longer, be retried,
+        and BaserowWriteFailed when it is a write Baserow may have applied.
+        The circuit breaker counts one failure per request, not per attempt.
+        """
+        if error is None and status not in TRANSIENT_STATUSES:
+            self.breaker.success()
+            return None
+
+        seconds = parse_retry_after(retry_after)
+        if status == 429:
+            # Baserow is up, it just wants fewer requests from every thread
+            self.breaker.success()
+            self.bucket.pause(seconds if seconds is not None else self.backoff)
+
+        reason = f'status {status}' if error is None else str(error)
+        message = f'Baserow could not handle {method} {url}: {reason}'
+        if method not in self.methods and status != 429 and sent:
+            self.breaker.failure()
+            raise BaserowWriteFailed(message)
+        if attempt + 1 >= self.attempts or self.breaker.open:
+            self._give_up(status)
+            raise BaserowUnavailable(message, retry_after=seconds)
+
+        if seconds is None:
+            seconds = random.uniform(0, min(self.max_wait, self.backoff * 2 ** attempt))
+        elif seconds > self.max_wait:
+            self._give_up(status)
+            raise BaserowUnavailable(message, retry_after=seconds)
+        logger.info(f'{message}, retrying in {seconds:.2f}s')
+        return seconds
+
+    def _give_up(self, status: int) -> None:
+        if status != 429:
+            self.breaker.failure()
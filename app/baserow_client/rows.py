@@ -0,0 +1,82 @@
+def _number(field):
+    places = field.decimal_places
+    return lambda value: f'{value:.{places}f}' if isinstance(value, float) else value
+
+def _single_select(value):
+    return None if value is None else value.get('value', 'None')
+
+def _multiple_select(value):
+    return [option['value'] for option in value if option]
+
+def _link_row(value):
+    return [entry.get('value', entry.get('id', '')) for entry in value]
+
+# Field types whose `content` value differs from the raw JSON, as baserowapi's RowValue.value
+_CONVERTERS = {
+    'boolean': lambda field: bool,
+    'number': _number,
+    'single_select': lambda field: _single_select,
+    'multiple_select': lambda field: _multiple_select,
+    'link_row': lambda field: _link_row,
+}
+
+class SlimRow:
+    """
+    Read-only row decoded straight from Baserow's JSON, for views that only serialize rows.
+
+    `content` matches baserowapi's `Row.content`, but is built once and
+    belongs to whoever reads it, and `link(name)` is the ID of the first row
+    linked through link field `name`, like the `.id` of its RowValue.
+    """
+    __slots__ = ('id', 'content', 'links')
+
+    def __init__(self, id: int, content: dict, links: dict):
+        self.id = id
+        self.content = content
+        self.links = links
+
+    def __getitem__(self, name: str):
+        return self.content[name]
+
+    def link(self, name: str) -> int:
+        return self.links.get(name)
+
+    def __repr__(self) -> str:
+        return f'SlimRow({self.id}, {self.content!r})'
+
+class RowDecoder:
+    """
+    Decodes the raw rows of one table into SlimRows, looking its fields up once instead of per row.
+    """
+
+    def __init__(self, table):
+        self.converters = {}
+        self.link_fields = set()
+        for field in table.fields:
+            converter = _CONVERTERS.get(field.type)
+            if converter is not None:
+                self.converters[field.name] = converter(field)
+            if field.type == 'link_row':
+                self.link_fields.add(field.name)
+
+    def decode(self, data: dict) -> SlimRow:
+        converters = self.converters
+        content = {}
+        links = {}
+        for name, value in data.items():
+            if name == 'id' or name == 'order':
+                continue
+            converter = converters.get(name)
+            if converter is not None:
+                if name in self.link_fields:
+                    links[name] = value[0].get('id') if value else None
+                value = converter(value)
+            content[name] = value
+        return SlimRow(data.get('id'), content, links)
+
+def decode_row(table, data: dict) -> SlimRow:
+    return RowDecoder(table).decode(data)
+
+def decode_rows(table, results) -> list:
+    decoder = RowDecoder(table)
+    return [decoder.decode(data) for data in results]
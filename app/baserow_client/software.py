@@ -1,7 +1,9 @@
-from . import baserow, BASEROW_TABLE_MAP
+from . import tables
+from .batch import create_rows, delete_rows
+from .query import linked_ids
 
 class Software:
-    table = baserow.get_table(BASEROW_TABLE_MAP['SOFTWARE'])
+    table = tables.lazy('SOFTWARE')
 
     @staticmethod
     def create(name: str, brand: str, version_number: str, description: str, expiration_date: str, instances: list, subscriptions: list):
@@ -13,41 +15,62 @@ class Software:
             'expiration_date': expiration_date,
         })
 
-        for instance in instances:
-            SoftwareInstance.create(
+        create_rows(SoftwareInstance.table, [
+            SoftwareInstance.new_row(
                 new_row.id, 
                 instance['serial_key'], 
                 instance.get('status', None))
-            
-        for subscription in subscriptions:
-            SoftwareSubscription.create(
+            for instance in instances
+        ])
+
+        create_rows(SoftwareSubscription.table, [
+            SoftwareSubscription.new_row(
                 new_row.id, 
                 subscription['start'], 
                 subscription['end'], 
                 subscription['number_of_licenses']
             )
+            for subscription in subscriptions
+        ])
 
         return new_row
 
+    @staticmethod
+    def delete(pk: int, cascade: bool=False):
+        # The children are found while they still link to the software, and only deleted once it is gone
+        instances = linked_ids(SoftwareInstance.table, 'software', pk) if cascade else []
+        subscriptions = linked_ids(SoftwareSubscription.table, 'software', pk) if cascade else []
+        delete_rows(Software.table, [pk])
+        delete_rows(SoftwareInstance.table, instances)
+        delete_rows(SoftwareSubscription.table, subscriptions)
+
 class SoftwareInstance:
-    table = baserow.get_table(BASEROW_TABLE_MAP['SOFTWARE_INSTANCE'])
+    table = tables.lazy('SOFTWARE_INSTANCE')
 
     @staticmethod
-    def create(software: int, serial_key: str, status: str=None):
-        return SoftwareInstance.table.add_row({
+    def new_row(software: int, serial_key: str, status: str=None) -> dict:
+        return {
             'software': [software],
             'serial_key': serial_key,
             'status': [status] if status else [],
-        })
+        }
+
+    @staticmethod
+    def create(software: int, serial_key: str, status: str=None):
+        return SoftwareInstance.table.add_row(SoftwareInstance.new_row(software, serial_key, status))
 
 class SoftwareSubscription:
-    table = baserow.get_table(BASEROW_TABLE_MAP['SOFTWARE_SUBSCRIPTION'])
+    table = tables.lazy('SOFTWARE_SUBSCRIPTION')
 
     @staticmethod
-    def create(software: int, start: str, end: str, number_of_licenses: int):
-        return SoftwareSubscription.table.add_row({
+    def new_row(software: int, start: str, end: str, number_of_licenses: int) -> dict:
+        return {
             'software': [software],
             'start': start,
             'end': end,
             'number_of_licenses': number_of_licenses,
-        })
\ No newline at end of file
+        }
+
+    @staticmethod
+    def create(software: int, start: str, end: str, number_of_licenses: int):
+        return SoftwareSubscription.table.add_row(SoftwareSubscription.new_row(software, start, end, number_of_licenses))
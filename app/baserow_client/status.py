@@ -1,4 +1,6 @@
-from . import baserow, BASEROW_TABLE_MAP
+from . import tables
+from .reference import ReferenceTable
 
 class Status:
-    table = baserow.get_table(BASEROW_TABLE_MAP['STATUS'])
\ No newline at end of file
+    table = tables.lazy('STATUS')
+    reference = ReferenceTable('STATUS')
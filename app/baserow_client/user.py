@@ -1,8 +1,9 @@
-from . import baserow, BASEROW_TABLE_MAP
+from . import tables
+from .reference import ReferenceTable
 from enum import Enum
 
 class User:
-    table = baserow.get_table(BASEROW_TABLE_MAP['USERS'])
+    table = tables.lazy('USERS')
 
     @classmethod
     def create(cls, email: str, type: int):
@@ -15,7 +16,8 @@ class User:
 
 
 class UserType:
-    table = baserow.get_table(BASEROW_TABLE_MAP['USER_TYPES'])
+    table = tables.lazy('USER_TYPES')
+    reference = ReferenceTable('USER_TYPES')
 
 class UserTypeEnum(Enum):
     _ignore_ = ['table']
@@ -0,0 +1,20 @@
+import math
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as default_exception_handler
+from .baserow_client.resilience import BaserowWriteFailed, unavailable_cause
+
+def exception_handler(exc, context):
+    """
+    DRF exception handler that answers 503 when Baserow is down or rate limiting us, instead of a 500.
+
+    A write Baserow may have applied is answered with a 502 instead, without
+    a Retry-After inviting the client to send it again.
+    """
+    unavailable = unavailable_cause(exc)
+    if isinstance(unavailable, BaserowWriteFailed):
+        return Response({'message': 'Baserow failed to confirm the change, check it before trying again'}, status=status.HTTP_502_BAD_GATEWAY)
+    if unavailable is not None:
+        headers = {'Retry-After': str(math.ceil(unavailable.retry_after))} if unavailable.retry_after is not None else None
+        return Response({'message': 'Baserow is unavailable, try again later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers=headers)
+    return default_exception_handler(exc, context)
@@ -0,0 +1,98 @@
+import csv
+import itertools
+import json
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from .renderers import ORJSONRenderer, dumps
+
+# Chunks joined per trip to the worker thread when streaming under ASGI, about one Baserow page of rows
+ASYNC_BATCH = 200
+
+class Echo:
+    """
+    File-like object that hands back what is written to it, so csv.writer can feed a generator.
+    """
+
+    def write(self, value):
+        return value
+
+def plain_value(value):
+    """
+    Flatten a raw Baserow cell: link, lookup and select values become their display text.
+    """
+    if isinstance(value, list):
+        return ', '.join(str(plain_value(item)) for item in value)
+    if isinstance(value, dict):
+        return plain_value(value.get('value', ''))
+    return value
+
+def csv_rows(columns: list, rows):
+    """
+    Yield CSV lines for `rows` (raw Baserow JSON), with `columns` given as (header, field) pairs.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+    for row in rows:
+        yield writer.writerow([plain_value(row.get(field)) for _, field in columns])
+
+def encoder():
+    """
+    JSON encoder for exports, orjson when the API renders with it.
+    """
+    return dumps if issubclass(api_settings.DEFAULT_RENDERER_CLASSES[0], ORJSONRenderer) else json.dumps
+
+def records(columns: list, rows):
+    for row in rows:
+        yield {header: plain_value(row.get(field)) for header, field in columns}
+
+def json_rows(columns: list, rows):
+    """
+    Yield a JSON array of header-mapped records, one element per chunk.
+    """
+    encode = encoder()
+    separator = '['
+    for record in records(columns, rows):
+        yield separator + encode(record)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+def ndjson_rows(columns: list, rows):
+    encode = encoder()
+    for record in records(columns, rows):
+        yield encode(record) + '\n'
+
+FORMATS = {
+    'csv': ('text/csv', csv_rows),
+    'json': ('application/json', json_rows),
+    'ndjson': ('application/x-ndjson', ndjson_rows),
+}
+
+async def batched(chunks, size: int=ASYNC_BATCH):
+    """
+    Async iterator over a sync iterator of chunks, which fetch rows from
+    Baserow, advanced `size` chunks at a time in a worker thread.
+    """
+    chunks = iter(chunks)
+    take = sync_to_async(lambda: ''.join(itertools.islice(chunks, size)), thread_sensitive=False)
+    while True:
+        batch = await take()
+        if not batch:
+            return
+        yield batch
+
+def export_response(request, columns: list, rows, format: str, filename: str) -> StreamingHttpResponse:
+    """
+    Stream `rows` as `format`. Under ASGI the response gets an async
+    iterator, Django would read a sync one into memory before sending it.
+    """
+    content_type, stream = FORMATS[format]
+    content = stream(columns, rows)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = batched(content)
+    return StreamingHttpResponse(
+        content,
+        content_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
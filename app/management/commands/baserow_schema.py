@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from inventory import settings
+from app.baserow_client import tables
+
+class Command(BaseCommand):
+    help = 'Fetch the field metadata of every Baserow table and write it to BASEROW_SCHEMA_SNAPSHOT'
+
+    def handle(self, *args, **options):
+        if not settings.BASEROW_SCHEMA_SNAPSHOT:
+            self.stderr.write('BASEROW_SCHEMA_SNAPSHOT is not set')
+            return
+        tables.save_snapshot(refresh=True)
+        self.stdout.write(f'Wrote schema for {len(tables.table_map)} tables to {settings.BASEROW_SCHEMA_SNAPSHOT}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from inventory import settings
+from app.baserow_client import mirror
+
+class Command(BaseCommand):
+    help = 'Copy the Baserow rows changed since the last sync into the local mirror'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Copy every row and drop rows deleted in Baserow')
+        parser.add_argument('--table', action='append', help='Table name from BASEROW_TABLE_MAP, can be repeated')
+
+    def handle(self, *args, **options):
+        for name in options['table'] or settings.BASEROW_MIRROR['TABLES']:
+            count = mirror.sync_table(name, full=options['full'])
+            self.stdout.write(f'{name}: copied {count} rows')
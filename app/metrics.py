@@ -0,0 +1,233 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from inventory import settings
+from inventory.settings import BASEROW_TABLE_MAP
+from .baserow_client.cache import parse_row_endpoint
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, shared by every histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRICS = {
+    'inventory_http_request_duration_seconds': ('histogram', 'Time spent handling API requests, by URL pattern.'),
+    'inventory_http_requests_in_flight': ('gauge', 'API requests currently being handled.'),
+    'inventory_http_errors_total': ('counter', 'API responses with a 4xx or 5xx status, by URL pattern.'),
+    'inventory_baserow_request_duration_seconds': ('histogram', 'Time spent waiting on Baserow, by table and operation.'),
+    'inventory_baserow_errors_total': ('counter', 'Baserow requests that failed, by table and operation.'),
+    'inventory_baserow_cache_requests_total': ('counter', 'Baserow row reads by table and whether the row cache answered them.'),
+    'inventory_baserow_cache_hit_ratio': ('gauge', 'Share of Baserow row reads answered by the row cache.'),
+}
+
+TABLE_ID = re.compile(r'/table/(\d+)/')
+
+def table_name(table_id: int) -> str:
+    for name, id in BASEROW_TABLE_MAP.items():
+        if id == table_id:
+            return name
+    return str(table_id)
+
+def describe(endpoint: str, method: str) -> tuple:
+    """
+    (table, operation) labels of a Baserow API request.
+    """
+    parsed = parse_row_endpoint(endpoint)
+    if parsed is None:
+        match = TABLE_ID.search(endpoint)
+        table = table_name(int(match.group(1))) if match else ''
+        return table, 'fields' if '/fields/' in endpoint else method.lower()
+
+    table_id, row_id, batch, batch_delete, _ = parsed
+    if batch_delete:
+        operation = 'batch_delete'
+    elif batch:
+        operation = 'batch_create' if method == 'POST' else 'batch_update'
+    elif row_id is not None:
+        operation = {'GET': 'get', 'PATCH': 'update', 'DELETE': 'delete'}.get(method, method.lower())
+    else:
+        operation = {'GET': 'list', 'POST': 'create'}.get(method, method.lower())
+    return table_name(table_id), operation
+
+class Registry:
+    """
+    Counters, gauges and histograms of one worker process.
+
+    With a `directory`, every worker writes its values to its own file there
+    every `flush_interval` seconds once `start` is called, and on exit, and
+    `collect` adds up the files of all workers. Gauges of workers that have
+    exited are left out.
+    """
+
+    def __init__(self, directory: str=None, flush_interval: float=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.values = {name: {} for name in METRICS}
+        self._flusher_pid = None
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: dict, value: float=1) -> None:
+        key = _key(labels)
+        with self._lock:
+            self.values[name][key] = self.values[name].get(key, 0) + value
+
+    def observe(self, name: str, labels: dict, seconds: float) -> None:
+        key = _key(labels)
+        with self._lock:
+            histogram = self.values[name].get(key)
+            if histogram is None:
+                histogram = self.values[name][key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.values))
+
+    def start(self) -> None:
+        """
+        Flush from a background thread of this process, so idle workers and
+        calls made outside of requests are still written out.
+        """
+        if self.directory is None or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            # A forked worker does not inherit its parent's thread
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_every_interval, daemon=True).start()
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f)
+            # Readers only ever see a complete file
+            os.replace(path, os.path.join(self.directory, f'metrics-{os.getpid()}.json'))
+        except OSError as e:
+            logger.warning(f'Could not write metrics to {self.directory}: {e}')
+
+    def _flush_every_interval(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def collect(self) -> dict:
+        """
+        Values of every worker added together.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory is not None:
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                pid = int(re.search(r'metrics-(\d+)\.json$', path).group(1))
+                if pid == os.getpid():
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if not _is_running(pid):
+                    snapshot = {name: values for name, values in snapshot.items() if METRICS.get(name, ('',))[0] != 'gauge'}
+                snapshots.append(snapshot)
+
+        merged = {name: {} for name in METRICS}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, value in values.items():
+                    if isinstance(value, dict):
+                        total = merged[name].setdefault(key, {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0})
+                        total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+                        total['sum'] += value['sum']
+                        total['count'] += value['count']
+                    else:
+                        merged[name][key] = merged[name].get(key, 0) + value
+
+        hits = {}
+        for key, value in merged['inventory_baserow_cache_requests_total'].items():
+            labels = dict(json.loads(key))
+            table = hits.setdefault(labels['table'], [0, 0])
+            table[0] += value if labels['result'] == 'hit' else 0
+            table[1] += value
+        merged['inventory_baserow_cache_hit_ratio'] = {_key({'table': table}): hit / total for table, (hit, total) in hits.items() if total}
+        return merged
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of `collect()`.
+        """
+        lines = []
+        for name, values in self.collect().items():
+            kind, help = METRICS[name]
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(values.items()):
+                labels = json.loads(key)
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, value['buckets']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(labels + [["le", _number(bound)]])} {cumulative}')
+                lines.append(f'{name}_bucket{_labels(labels + [["le", "+Inf"]])} {value["count"]}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(value["sum"])}')
+                lines.append(f'{name}_count{_labels(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+def _key(labels: dict) -> str:
+    return json.dumps(sorted(labels.items()))
+
+def _labels(labels: list) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+registry = Registry(settings.METRICS['DIRECTORY'] or None, settings.METRICS['FLUSH_INTERVAL'])
+atexit.register(registry.flush)
+
+def observe_baserow(endpoint: str, method: str, seconds: float, failed: bool) -> None:
+    if not settings.METRICS['ENABLED']:
+        return
+    table, operation = describe(endpoint, method)
+    labels = {'table': table, 'operation': operation}
+    registry.observe('inventory_baserow_request_duration_seconds', labels, seconds)
+    if failed:
+        registry.inc('inventory_baserow_errors_total', labels)
+
+def observe_cache(endpoint: str, hit: bool) -> None:
+    if not settings.METRICS['ENABLED']:
+        return
+    table, _ = describe(endpoint, 'GET')
+    registry.inc('inventory_baserow_cache_requests_total', {'table': table, 'result': 'hit' if hit else 'miss'})
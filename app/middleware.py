@@ -0,0 +1,109 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from inventory import settings
+from .baserow_client import accounting
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+class BaserowTimingMiddleware:
+    """
+    Counts and times the Baserow calls made by each request.
+
+    The totals are sent in a `Server-Timing` header, and requests over
+    BASEROW_CALL_BUDGET calls or BASEROW_TIME_BUDGET milliseconds are logged.
+    Streamed responses only account for the calls made before the body
+    started streaming. Runs as sync or async middleware, so the async views
+    are not handed to a thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with accounting.track() as usage:
+            response = self.get_response(request)
+        return self.report(request, response, usage, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with accounting.track() as usage:
+            response = await self.get_response(request)
+        return self.report(request, response, usage, start)
+
+    def report(self, request, response, usage, start: float):
+        elapsed = (time.perf_counter() - start) * 1000
+        baserow = usage.duration * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'baserow;dur={baserow:.1f};desc="{usage.calls} calls"',
+            f'baserow-cache;desc="{usage.cache_hits} hits"',
+            f'total;dur={elapsed:.1f}',
+        ])
+
+        if usage.calls > settings.BASEROW_CALL_BUDGET or baserow > settings.BASEROW_TIME_BUDGET:
+            methods = ', '.join(f'{method} {count}' for method, count in sorted(usage.methods.items()))
+            logger.warning(
+                f'{request.method} {request.path} made {usage.calls} Baserow calls ({methods}) '
+                f'taking {baserow:.0f}ms of {elapsed:.0f}ms'
+            )
+        return response
+
+class MetricsMiddleware:
+    """
+    Records the latency, errors and in-flight count of requests by URL pattern.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS['ENABLED']:
+            return self.get_response(request)
+
+        start = self.started()
+        try:
+            response = self.get_response(request)
+        finally:
+            registry.inc('inventory_http_requests_in_flight', {}, -1)
+        return self.record(request, response, start)
+
+    async def __acall__(self, request):
+        if not settings.METRICS['ENABLED']:
+            return await self.get_response(request)
+
+        start = self.started()
+        try:
+            response = await self.get_response(request)
+        finally:
+            registry.inc('inventory_http_requests_in_flight', {}, -1)
+        return self.record(request, response, start)
+
+    @staticmethod
+    def started() -> float:
+        registry.start()
+        registry.inc('inventory_http_requests_in_flight', {})
+        return time.perf_counter()
+
+    @staticmethod
+    def record(request, response, start: float):
+        route = f'/{request.resolver_match.route}' if request.resolver_match else 'unmatched'
+        labels = {'route': route, 'method': request.method}
+        registry.observe('inventory_http_request_duration_seconds', labels, time.perf_counter() - start)
+        if response.status_code >= 400:
+            registry.inc('inventory_http_errors_total', {**labels, 'status': str(response.status_code)})
+        return response
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirrorCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_id', models.IntegerField(unique=True)),
+                ('updated_on', models.DateTimeField(null=True)),
+                ('synced_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MirrorRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_id', models.IntegerField()),
+                ('row_id', models.IntegerField()),
+                ('data', models.JSONField()),
+                ('updated_on', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['table_id', 'updated_on'], name='app_mirrorr_table_i_5c5478_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mirrorrow',
+            constraint=models.UniqueConstraint(fields=('table_id', 'row_id'), name='unique_mirror_row'),
+        ),
+    ]
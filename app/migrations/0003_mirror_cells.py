@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-18 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forget_cursors(apps, schema_editor):
+    # Rows mirrored so far have no cells, their tables are read from Baserow until the next full sync
+    apps.get_model('app', 'MirrorCursor').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_baserow_mirror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirrorLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_id', models.IntegerField()),
+                ('field', models.CharField(max_length=255)),
+                ('linked_id', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MirrorValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_id', models.IntegerField()),
+                ('field', models.CharField(max_length=255)),
+                ('text', models.TextField()),
+                ('folded', models.TextField()),
+                ('date', models.CharField(max_length=10)),
+                ('boolean', models.BooleanField()),
+                ('truthy', models.BooleanField()),
+                ('empty', models.BooleanField()),
+                ('sort_kind', models.SmallIntegerField()),
+                ('sort_number', models.FloatField()),
+                ('sort_text', models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mirrorrow',
+            name='position',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='mirrorrow',
+            index=models.Index(fields=['table_id', 'position', 'row_id'], name='app_mirrorr_table_i_b6e6af_idx'),
+        ),
+        migrations.AddField(
+            model_name='mirrorlink',
+            name='row',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='links', to='app.mirrorrow'),
+        ),
+        migrations.AddField(
+            model_name='mirrorvalue',
+            name='row',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='app.mirrorrow'),
+        ),
+        migrations.AddIndex(
+            model_name='mirrorlink',
+            index=models.Index(fields=['table_id', 'field', 'linked_id'], name='app_mirrorl_table_i_7170e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mirrorvalue',
+            index=models.Index(fields=['table_id', 'field', 'text'], name='app_mirrorv_table_i_6da6b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mirrorvalue',
+            index=models.Index(fields=['table_id', 'field', 'folded'], name='app_mirrorv_table_i_220f5d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mirrorvalue',
+            index=models.Index(fields=['table_id', 'field', 'date'], name='app_mirrorv_table_i_7224f4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mirrorvalue',
+            constraint=models.UniqueConstraint(fields=('row', 'field'), name='unique_mirror_value'),
+        ),
+        migrations.RunPython(forget_cursors, migrations.RunPython.noop),
+    ]
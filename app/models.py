@@ -5,4 +5,77 @@ from .baserow_client.user import UserTypeEnum
 # Create your models here.
 class Role(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    role = models.IntegerField(default=UserTypeEnum.VIEWER.value)
\ No newline at end of file
+    role = models.IntegerField(default=UserTypeEnum.VIEWER.value)
+
+class MirrorRow(models.Model):
+    """
+    Local copy of a Baserow row, as the raw JSON Baserow returns with user field names.
+    """
+    table_id = models.IntegerField()
+    row_id = models.IntegerField()
+    data = models.JSONField()
+    updated_on = models.DateTimeField(null=True)
+    # Baserow's `order` of the row, its default sort
+    position = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['table_id', 'row_id'], name='unique_mirror_row'),
+        ]
+        indexes = [
+            models.Index(fields=['table_id', 'updated_on']),
+            models.Index(fields=['table_id', 'position', 'row_id']),
+        ]
+
+class MirrorValue(models.Model):
+    """
+    A cell of a mirrored row, in the forms the mirror filters and sorts it on, the way Baserow compares them.
+    """
+    row = models.ForeignKey(MirrorRow, on_delete=models.CASCADE, related_name='values')
+    table_id = models.IntegerField()
+    field = models.CharField(max_length=255)
+    # Display text, and lowercased for `contains`
+    text = models.TextField()
+    folded = models.TextField()
+    # First YYYY-MM-DD date in the text, or ''
+    date = models.CharField(max_length=10)
+    boolean = models.BooleanField()
+    truthy = models.BooleanField()
+    empty = models.BooleanField()
+    sort_kind = models.SmallIntegerField()
+    sort_number = models.FloatField()
+    sort_text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['row', 'field'], name='unique_mirror_value'),
+        ]
+        indexes = [
+            models.Index(fields=['table_id', 'field', 'text']),
+            # `contains` scans this index alone
+            models.Index(fields=['table_id', 'field', 'folded']),
+            models.Index(fields=['table_id', 'field', 'date']),
+        ]
+
+class MirrorLink(models.Model):
+    """
+    An ID listed in a link row or lookup cell of a mirrored row.
+    """
+    row = models.ForeignKey(MirrorRow, on_delete=models.CASCADE, related_name='links')
+    table_id = models.IntegerField()
+    field = models.CharField(max_length=255)
+    linked_id = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['table_id', 'field', 'linked_id']),
+        ]
+
+
+class MirrorCursor(models.Model):
+    """
+    Newest `updated_on` copied from a Baserow table. Tables without a cursor have never been synced.
+    """
+    table_id = models.IntegerField(unique=True)
+    updated_on = models.DateTimeField(null=True)
+    synced_at = models.DateTimeField()
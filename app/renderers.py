@@ -0,0 +1,46 @@
+import json
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+from .baserow_client.rows import SlimRow
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+def _default(value):
+    if isinstance(value, SlimRow):
+        return {'id': value.id, **value.content}
+    # Dates, decimals, querysets and the like are encoded exactly as DRF does
+    return _encoder.default(value)
+
+if orjson is not None:
+    # Datetimes are left to DRF's encoder, orjson formats UTC and microseconds differently
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+def dumps(data) -> str:
+    """
+    `json.dumps`, using orjson when it is installed.
+    """
+    if orjson is None:
+        return json.dumps(data, cls=JSONEncoder)
+    return orjson.dumps(data, default=_default, option=_OPTIONS).decode()
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, which is several times faster than the stdlib on large lists.
+
+    Produces the same JSON as JSONRenderer, except that U+2028 and U+2029 are
+    not escaped, and renders SlimRows as their content with their `id`, so
+    views can return rows without copying them into dicts. Indented output,
+    and environments without orjson, fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_default, option=_OPTIONS)
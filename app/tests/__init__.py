@@ -1,7 +1,26 @@
+from app.baserow_client import baserow
+from app.baserow_client.memory import MemoryBaserow
 from app.baserow_client.user import User
 import datetime
+import pytest
 from baserowapi import Filter
 
+# Tests counting the requests sent to Baserow need the memory backend's `request_count`
+memory_only = pytest.mark.skipif(not isinstance(baserow, MemoryBaserow), reason='needs BASEROW_BACKEND=memory')
+
+def record_requests(monkeypatch) -> list:
+    """
+    Record (method, endpoint path, body) of every request sent to Baserow from now on.
+    """
+    sent = []
+    perform_request = baserow.perform_request
+
+    def perform(method, url, headers, data=None, *args, **kwargs):
+        sent.append((method, url[len(baserow.url):].partition('?')[0], data))
+        return perform_request(method, url, headers, data, *args, **kwargs)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    return sent
+
 async def login(async_client, email='root@mail.com'):
     user = User.table.get_rows(
         filters=[Filter("email", email)], 
@@ -0,0 +1,12 @@
+import pytest
+from app.baserow_client import baserow
+from app.baserow_client.memory import MemoryBaserow
+
+@pytest.fixture(autouse=True)
+def baserow_memory():
+    """
+    Start every test from the seed rows when running with BASEROW_BACKEND=memory.
+    """
+    if isinstance(baserow, MemoryBaserow):
+        baserow.reset()
+    yield
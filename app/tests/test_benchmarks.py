@@ -0,0 +1,23 @@
+from benchmarks import seed
+from benchmarks.run import percentile
+import json
+from inventory import settings
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+
+def test_seed_links_instances_to_seeded_rows():
+    with open(settings.BASEROW_MEMORY_DATA) as f:
+        data = seed.generate(json.load(f), 50)
+
+    hardware_ids = {row['id'] for row in data['HARDWARE']['rows']}
+    status_ids = {row['id'] for row in data['STATUS']['rows']}
+    assert len(data['HARDWARE_INSTANCE']['rows']) == 50
+    assert len(hardware_ids) == 50 // seed.INSTANCES_PER_ITEM
+    for instance in data['HARDWARE_INSTANCE']['rows']:
+        assert set(instance['hardware']) <= hardware_ids
+        assert set(instance['status']) <= status_ids
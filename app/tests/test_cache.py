@@ -0,0 +1,69 @@
+from app.baserow_client.aio import AsyncClient
+from app.baserow_client.cache import LocMemBackend, RowCache, transitive_dependents
+from app.baserow_client.client import Client
+import asyncio
+import pytest
+
+def test_a_response_read_before_a_write_is_not_cached_after_it():
+    cache = RowCache(LocMemBackend(), {1: 30})
+    for endpoint in ['/api/database/rows/table/1/?user_field_names=true', '/api/database/rows/table/1/7/?user_field_names=true']:
+        key = cache.key(endpoint)
+        # The write lands while the read is in flight
+        cache.invalidate_request('/api/database/rows/table/1/7/', 'PATCH', {'name': 'new'})
+        cache.set(key, {'name': 'old'})
+        assert cache.get(cache.key(endpoint)) is None
+
+        cache.set(cache.key(endpoint), {'name': 'new'})
+        assert cache.get(cache.key(endpoint)) == {'name': 'new'}
+
+def test_writes_reach_the_dependents_of_dependents():
+    assert transitive_dependents({'STATUS': ['HARDWARE_INSTANCE'], 'HARDWARE_INSTANCE': ['HARDWARE'], 'HARDWARE': ['HARDWARE_INSTANCE']}) == {
+        'STATUS': ['HARDWARE_INSTANCE', 'HARDWARE'],
+        'HARDWARE_INSTANCE': ['HARDWARE'],
+        'HARDWARE': ['HARDWARE_INSTANCE'],
+    }
+
+    cache = RowCache.from_settings({'TTL': {'HARDWARE': 30}, 'DEPENDENTS': {'STATUS': ['HARDWARE_INSTANCE'], 'HARDWARE_INSTANCE': ['HARDWARE']}}, {'STATUS': 8, 'HARDWARE_INSTANCE': 2, 'HARDWARE': 1})
+    endpoint = '/api/database/rows/table/1/3/?user_field_names=true'
+    cache.set(cache.key(endpoint), {'id': 3})
+    cache.invalidate(8, [2])
+    assert cache.get(cache.key(endpoint)) is None
+
+class BlockingBackend(LocMemBackend):
+    """
+    Stands in for a Redis, Memcached or database cache, which must not be called from the event loop.
+    """
+
+    def get(self, key: str):
+        assert_off_the_event_loop()
+        return super().get(key)
+
+    def set(self, key: str, value, ttl: float=None) -> None:
+        assert_off_the_event_loop()
+        super().set(key, value, ttl)
+
+def assert_off_the_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise AssertionError('cache called on the event loop')
+
+@pytest.mark.asyncio
+async def test_async_client_keeps_the_cache_off_the_event_loop(monkeypatch):
+    client = AsyncClient(Client('http://baserow.test', 'token', cache=RowCache(BlockingBackend(), {1: 30})))
+    sent = []
+
+    async def send(endpoint, method, data):
+        sent.append(method)
+        return {'id': 7}
+    monkeypatch.setattr(client, '_send', send)
+
+    endpoint = '/api/database/rows/table/1/7/?user_field_names=true'
+    assert await client.make_api_request(endpoint) == {'id': 7}
+    assert await client.make_api_request(endpoint) == {'id': 7}
+    assert sent == ['GET']
+
+    await client.make_api_request('/api/database/rows/table/1/7/?user_field_names=true', 'PATCH', {'name': 'new'})
+    await client.make_api_request(endpoint)
+    assert sent == ['GET', 'PATCH', 'GET']
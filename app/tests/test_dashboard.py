@@ -0,0 +1,67 @@
+from app.baserow_client import baserow
+from app.baserow_client.hardware import HardwareInstance
+from django.core.cache import cache
+import pytest
+from . import login, memory_only
+from .test_hardware import create_hardware
+from .test_software import create_software
+
+REPORTS = ['software-near-expiry', 'hardware-needing-maintenance', 'hardware-not-assigned', 'software-not-assigned']
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_dashboard_matches_the_endpoints_it_replaces(async_client):
+    cache.clear()
+    token = await login(async_client, 'viewer@mail.com')
+    headers = {'Authorization': f'Token {token}'}
+    hardware = create_hardware()
+    HardwareInstance.create(hardware.id, 'For Repair Serial Number', '2021-01-01', 3).update({'assignee': [4]})
+    create_software()
+
+    response = await async_client.get('/dashboard/', headers=headers)
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert data['status'] == (await async_client.get('/status/', headers=headers)).json()['data']
+    assert data['userTypes'] == (await async_client.get('/user-types/', headers=headers)).json()['data']
+    assert data['totals'] == {'hardwareInstances': 2, 'softwareInstances': 1}
+    for name in REPORTS:
+        assert data['reports'][name] == (await async_client.get(f'/reports/{name}/', headers=headers)).json()
+    assert data['reports']['hardware-needing-maintenance']['totalRecords'] == 1
+
+    # Served from the snapshot until it expires
+    calls = baserow.request_count
+    response = await async_client.get('/dashboard/', headers=headers)
+    assert response.json()['data'] == data
+    assert baserow.request_count == calls
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_dashboard_from_mirror_matches_the_reports(async_client, monkeypatch):
+    from asgiref.sync import sync_to_async
+    from inventory import settings
+    from app.baserow_client import mirror
+    cache.clear()
+    monkeypatch.setitem(settings.BASEROW_MIRROR, 'ENABLED', True)
+    token = await login(async_client, 'viewer@mail.com')
+    headers = {'Authorization': f'Token {token}'}
+    hardware = create_hardware()
+    HardwareInstance.create(hardware.id, 'For Repair Serial Number', '2021-01-01', 3).update({'assignee': [4]})
+    create_software()
+    await sync_to_async(mirror.sync_table)('HARDWARE_INSTANCE', full=True)
+    await sync_to_async(mirror.sync_table)('SOFTWARE_INSTANCE', full=True)
+
+    calls = baserow.request_count
+    data = (await async_client.get('/dashboard/', headers=headers)).json()['data']
+    # Only the reference tables may still come from Baserow
+    assert baserow.request_count - calls <= 2
+    assert data['totals'] == {'hardwareInstances': 2, 'softwareInstances': 1}
+    for name in REPORTS:
+        assert data['reports'][name] == (await async_client.get(f'/reports/{name}/', headers=headers)).json()
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_dashboard_when_not_logged_in(async_client):
+    response = await async_client.get('/dashboard/')
+    assert response.status_code == 403
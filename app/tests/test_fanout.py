@@ -0,0 +1,52 @@
+from app.baserow_client import accounting
+from app.baserow_client.fanout import FanOut
+import pytest
+import threading
+import time
+
+def test_fan_out_keeps_order_and_caps_concurrency():
+    fan_out = FanOut(max_workers=8, per_request=3)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def call(i):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.01 * (5 - i % 5))
+        with lock:
+            running[0] -= 1
+        return i * 2
+
+    assert fan_out.map(call, range(10)) == [i * 2 for i in range(10)]
+    assert running[1] == 3
+
+def test_fan_out_raises_first_error_in_argument_order():
+    fan_out = FanOut(max_workers=4, per_request=4)
+    finished = []
+
+    def call(i):
+        # The later call fails first
+        time.sleep(0.05 if i == 1 else 0)
+        finished.append(i)
+        if i in (1, 2):
+            raise ValueError(i)
+        return i
+
+    with pytest.raises(ValueError) as e:
+        fan_out.map(call, range(4))
+    assert e.value.args == (1,)
+    assert sorted(finished) == [0, 1, 2, 3]
+
+def test_fan_out_records_calls_in_the_callers_usage():
+    fan_out = FanOut(max_workers=4, per_request=4)
+
+    def call(i):
+        with accounting.timed(f'/api/database/rows/table/1/{i}/', 'GET'):
+            # Nested fan-outs run inline on the pool thread
+            return fan_out.run(lambda: threading.current_thread().name)[0]
+
+    with accounting.track() as usage:
+        threads = fan_out.map(call, range(6))
+    assert usage.calls == 6
+    assert all(name.startswith('baserow-fanout') for name in threads)
@@ -1,8 +1,9 @@
-from app.baserow_client.hardware import Hardware
+from app.baserow_client.hardware import Hardware, HardwareInstance
 from baserowapi import Filter
+from asgiref.sync import async_to_sync
 import pytest
 import json
-from . import login
+from . import login, memory_only, record_requests
 
 def create_hardware():
     return Hardware.create(
@@ -215,6 +216,50 @@ async def test_hardware_put_inventory_clerk_can_edit_assignees(async_client):
 
     assert one2m['instances']['data'][0]['assignee'] == 1
 
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_put_batches_only_changed_instances(async_client, monkeypatch):
+    from app.baserow_client import baserow
+    token = await login(async_client, 'admin@mail.com')
+    hardware = create_hardware()
+    other = create_hardware()
+    for serial_number in ['Second Serial Number', 'Third Serial Number']:
+        HardwareInstance.create(hardware.id, serial_number, '2021-01-01')
+    foreign = next(iter(HardwareInstance.table.get_rows(filters=[Filter('hardware', other.id, 'link_row_has')])))
+    data = (await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})).json()['data']
+    unchanged, changed, deleted = data['one2m']['instances']['data']
+    table = f'/api/database/rows/table/{HardwareInstance.table.id}'
+
+    # Submitted unchanged, no instance is written
+    data['one2m']['instances']['delete'] = []
+    sent = record_requests(monkeypatch)
+    response = await async_client.put(f'/hardware/{hardware.id}/', data, headers={'Authorization': f'Token {token}'}, content_type='application/json')
+    assert response.status_code == 200
+    assert [request for request in sent if request[0] != 'GET' and request[1].startswith(f'{table}/')] == []
+
+    changed['serial_number'] = 'Renamed Serial Number'
+    data['one2m']['instances']['data'] = [
+        unchanged,
+        changed,
+        {'serial_number': 'New Serial Number', 'procurement_date': '2021-01-01'},
+        # Instances of other hardware are ignored
+        {**changed, 'id': foreign.id, 'serial_number': 'Taken Over'},
+    ]
+    data['one2m']['instances']['delete'] = [deleted['id'], foreign.id]
+    sent.clear()
+    calls = baserow.request_count
+    response = await async_client.put(f'/hardware/{hardware.id}/', data, headers={'Authorization': f'Token {token}'}, content_type='application/json')
+    assert response.status_code == 200
+    assert baserow.request_count - calls == len(sent)
+    writes = [request for request in sent if request[0] != 'GET' and request[1].startswith(f'{table}/')]
+    assert writes == [
+        ('POST', f'{table}/batch-delete/', {'items': [deleted['id']]}),
+        ('PATCH', f'{table}/batch/', {'items': [{'id': changed['id'], 'serial_number': 'Renamed Serial Number'}]}),
+        ('POST', f'{table}/batch/', {'items': [{'serial_number': 'New Serial Number', 'procurement_date': '2021-01-01', 'hardware': [hardware.id]}]}),
+    ]
+    assert HardwareInstance.table.get_row(foreign.id)['serial_number'] == 'Test Serial Number'
+
 @pytest.mark.django_db
 @pytest.mark.asyncio
 async def test_hardware_put_inventory_clerk_can_not_edit_instances(async_client):
@@ -523,4 +568,300 @@ async def test_hardware_delete_when_authorised(async_client, email):
     assert response.status_code == 204
 
     response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_instance_read_is_paginated(async_client):
+    token = await login(async_client)
+    create_hardware()
+    create_hardware()
+    search = {
+        'page': 0,
+        'rows': 1,
+        'filters': {}
+    }
+    response = await async_client.get(
+        f'/hardware-instance/?search={json.dumps(search)}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    data = response.json()
+    assert len(data['data']) == 1
+    assert data['totalRecords'] >= 2
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_with_unknown_sort_field(async_client):
+    token = await login(async_client)
+    search = {
+        'sortField': 'not_a_field',
+        'filters': {}
+    }
+    response = await async_client.get(
+        f'/hardware/?search={json.dumps(search)}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    assert response.status_code == 422
+
+@memory_only
+def test_unknown_fields_reload_the_schema_at_most_once_a_minute(monkeypatch):
+    from app.baserow_client import baserow, tables
+    from app.baserow_client.query import InvalidQuery, ListQuery
+    monkeypatch.setattr(tables, '_reloaded_at', {})
+    table = Hardware.table
+    # The first use of the table loads its fields
+    table.fields
+    calls = baserow.request_count
+    for _ in range(3):
+        with pytest.raises(InvalidQuery):
+            ListQuery(order_by=('+not_a_field',)).compile(table)
+    assert baserow.request_count - calls == 1
+
+@pytest.mark.parametrize('search', [
+    {'filters': {'serial_number': ['x']}},
+    {'filters': {'serial_number': {'constraints': ['x']}}},
+    {'filters': {'serial_number': {'constraints': {'value': 'x'}}}},
+    {'rows': 100000},
+])
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_with_malformed_search(async_client, search):
+    token = await login(async_client)
+    response = await async_client.get(
+        f'/hardware-instance/?search={json.dumps(search)}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    assert response.status_code == 422
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_cascade_delete_removes_instances(async_client):
+    token = await login(async_client)
+    hardware = create_hardware()
+    instance = next(iter(HardwareInstance.table.get_rows(filters=[Filter('hardware', hardware.id, 'link_row_has')])))
+
+    response = await async_client.delete(f'/hardware/{hardware.id}/?cascade=true', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 204
+
+    with pytest.raises(Exception):
+        HardwareInstance.table.get_row(instance.id)
+
+@pytest.mark.django_db
+def test_hardware_cascade_delete_keeps_instances_when_hardware_delete_fails(monkeypatch):
+    from app.baserow_client import baserow
+    import requests
+    hardware = create_hardware()
+    instance = next(iter(HardwareInstance.table.get_rows(filters=[Filter('hardware', hardware.id, 'link_row_has')])))
+
+    perform_request = baserow.perform_request
+    def perform(method, url, *args, **kwargs):
+        if url.endswith(f'/table/{Hardware.table.id}/batch-delete/'):
+            response = requests.Response()
+            response.status_code = 400
+            response._content = b'{}'
+            return response
+        return perform_request(method, url, *args, **kwargs)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(requests.exceptions.HTTPError):
+        Hardware.delete(hardware.id, cascade=True)
+    assert HardwareInstance.table.get_row(instance.id).id == instance.id
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_csv_export_streams_every_row(async_client):
+    token = await login(async_client)
+    create_hardware()
+    create_hardware()
+    search = {
+        'page': 0,
+        'rows': 1,
+        'filters': {}
+    }
+    response = await async_client.get(
+        f'/hardware-csv/?search={json.dumps(search)}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    assert response.status_code == 200
+    assert response.streaming
+    # Served under ASGI, so streamed without reading every row first
+    assert response.is_async
+
+    lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+    assert lines[0] == 'ID,Name,Brand,Type,Model Number,Serial Number,Procurement Date,Status,Assignee'
+    assert len(lines) > 2
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_json_export_streams_under_asgi(async_client):
+    token = await login(async_client)
+    create_hardware()
+    create_hardware()
+    for mode in ['json', 'ndjson']:
+        response = await async_client.get(
+            f'/hardware-json/?mode={mode}&search={json.dumps({"filters": {}})}',
+            headers={'Authorization': f'Token {token}'}
+            )
+        assert response.status_code == 200
+        assert response.is_async
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        records = json.loads(content) if mode == 'json' else [json.loads(line) for line in content.splitlines()]
+        assert len(records) >= 2
+        assert records[0]['Serial Number'] == 'Test Serial Number'
+
+def test_csv_export_streams_under_wsgi_and_asgi():
+    from django.test import AsyncRequestFactory, RequestFactory
+    from app.export import export_response
+    columns = [('ID', 'id'), ('Status', 'status')]
+    rows = [{'id': i, 'status': [{'id': 1, 'value': 'Assigned'}]} for i in range(450)]
+    expected = 'ID,Status\r\n' + ''.join(f'{i},Assigned\r\n' for i in range(450))
+
+    response = export_response(RequestFactory().get('/'), columns, rows, 'csv', 'hardware')
+    assert not response.is_async
+    assert b''.join(response.streaming_content).decode() == expected
+
+    response = export_response(AsyncRequestFactory().get('/'), columns, rows, 'csv', 'hardware')
+    assert response.is_async
+    chunks = async_to_sync(collect)(response.streaming_content)
+    assert b''.join(chunks).decode() == expected
+    # Rows are sent in batches rather than all at once
+    assert len(chunks) == 3
+
+async def collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_after_write_is_not_stale(async_client):
+    token = await login(async_client)
+    hardware = create_hardware()
+    response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert response.json()['data']['name'] == 'Test Hardware'
+
+    hardware.update({'name': 'Renamed Hardware'})
+    response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert response.json()['data']['name'] == 'Renamed Hardware'
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_from_mirror(async_client, monkeypatch):
+    from asgiref.sync import sync_to_async
+    from inventory import settings
+    from app.baserow_client import baserow, mirror
+    monkeypatch.setitem(settings.BASEROW_MIRROR, 'ENABLED', True)
+    token = await login(async_client)
+    hardware = create_hardware()
+    instance = next(iter(HardwareInstance.table.get_rows(filters=[Filter('hardware', hardware.id, 'link_row_has')])))
+    HardwareInstance.create(hardware.id, 'Other Serial Number', '2021-01-01')
+    await sync_to_async(mirror.sync_table)('HARDWARE_INSTANCE', full=True)
+
+    # The memory HARDWARE table has no `status` for the hardware list, the instance list reads the same mirror
+    search = {
+        'page': 0,
+        'rows': 5,
+        'filters': {
+            'serial_number': {
+                'constraints': [{'value': 'Test Serial Number', 'matchMode': 'equals'}]
+            }
+        }
+    }
+    calls = baserow.request_count
+    response = await async_client.get(
+        f'/hardware-instance/?search={json.dumps(search)}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    assert response.status_code == 200
+    assert [row['id'] for row in response.json()['data']] == [instance.id]
+    assert baserow.request_count == calls
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_async_hardware_read_from_mirror(async_client, monkeypatch):
+    from asgiref.sync import sync_to_async
+    from django.test import AsyncRequestFactory
+    from inventory import settings
+    from app.baserow_client import baserow, mirror
+    from app.views.hardware_instance import AsyncHardwareInstanceList
+    monkeypatch.setattr(settings, 'ASYNC_VIEWS', True)
+    monkeypatch.setitem(settings.BASEROW_MIRROR, 'ENABLED', True)
+    token = await login(async_client)
+    hardware = create_hardware()
+    instance = next(iter(HardwareInstance.table.get_rows(filters=[Filter('hardware', hardware.id, 'link_row_has')])))
+    await sync_to_async(mirror.sync_table)('HARDWARE_INSTANCE', full=True)
+
+    # The URLs pick the async views at startup, so the view is called directly
+    search = {'page': 0, 'rows': 100, 'filters': {}}
+    request = AsyncRequestFactory().get(f'/hardware-instance/?search={json.dumps(search)}', headers={'Authorization': f'Token {token}'})
+    calls = baserow.request_count
+    response = await AsyncHardwareInstanceList.as_view()(request)
+    assert response.status_code == 200
+    assert instance.id in [row['id'] for row in response.data['data']]
+    assert baserow.request_count == calls
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_async_hardware_detail_from_the_row_cache(async_client, monkeypatch):
+    from django.test import AsyncRequestFactory
+    from inventory import settings
+    from inventory.settings import BASEROW_TABLE_MAP
+    from app.baserow_client import baserow
+    from app.baserow_client.cache import RowCache
+    from app.views.hardware import AsyncHardwareDetail
+    monkeypatch.setattr(baserow, 'cache', RowCache.from_settings({**settings.BASEROW_CACHE, 'ENABLED': True}, BASEROW_TABLE_MAP))
+    token = await login(async_client)
+    hardware = create_hardware()
+
+    view = AsyncHardwareDetail.as_view()
+    request = AsyncRequestFactory().get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    response = await view(request, pk=hardware.id)
+    assert response.status_code == 200
+    calls = baserow.request_count
+    cached = await view(request, pk=hardware.id)
+    assert cached.data == response.data
+    assert baserow.request_count == calls
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_reports_baserow_calls(async_client):
+    token = await login(async_client)
+    hardware = create_hardware()
+    response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('baserow;dur=')
+    assert '"0 calls"' not in timing
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_over_call_budget_is_logged(async_client, monkeypatch, caplog):
+    from inventory import settings
+    token = await login(async_client)
+    hardware = create_hardware()
+    monkeypatch.setattr(settings, 'BASEROW_CALL_BUDGET', 0)
+    with caplog.at_level('WARNING', logger='app.middleware'):
+        await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert f'GET /hardware/{hardware.id}/ made' in caplog.text
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_async_views_match_sync_views(async_client):
+    from django.test import AsyncRequestFactory
+    from app.views.hardware import AsyncHardwareDetail
+    from app.views.hardware_instance import AsyncHardwareInstanceList
+    token = await login(async_client, 'viewer@mail.com')
+    hardware = create_hardware()
+    headers = {'Authorization': f'Token {token}'}
+    factory = AsyncRequestFactory()
+
+    response = await AsyncHardwareDetail.as_view()(factory.get(f'/hardware/{hardware.id}/', headers=headers), pk=hardware.id)
+    response.render()
+    expected = await async_client.get(f'/hardware/{hardware.id}/', headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.content) == expected.json()
+
+    response = await AsyncHardwareInstanceList.as_view()(factory.get('/hardware-instance/', {'page': 0, 'rows': 10}, headers=headers))
+    response.render()
+    expected = await async_client.get('/hardware-instance/', {'page': 0, 'rows': 10}, headers=headers)
+    assert json.loads(response.content) == expected.json()
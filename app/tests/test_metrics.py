@@ -0,0 +1,90 @@
+from app.metrics import Registry, registry
+from django.apps import apps
+from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from inventory import settings
+import json
+import os
+import pytest
+import time
+from .test_hardware import create_hardware
+from . import login
+
+@pytest.fixture(autouse=True)
+def metrics_enabled(monkeypatch):
+    monkeypatch.setitem(settings.METRICS, 'ENABLED', True)
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_metrics_record_routes_and_baserow_tables(async_client):
+    token = await login(async_client)
+    hardware = create_hardware()
+    await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    await async_client.get('/hardware/999999/', headers={'Authorization': f'Token {token}'})
+
+    response = await async_client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.content.decode()
+    assert 'inventory_http_request_duration_seconds_count{method="GET",route="/hardware/<int:pk>/"}' in text
+    assert 'inventory_http_errors_total{method="GET",route="/hardware/<int:pk>/",status="404"}' in text
+    assert 'inventory_baserow_request_duration_seconds_bucket{operation="list",table="HARDWARE_INSTANCE",le="+Inf"}' in text
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_metrics_with_token(async_client, monkeypatch):
+    monkeypatch.setitem(settings.METRICS, 'TOKEN', 'scrape')
+    response = await async_client.get('/metrics')
+    assert response.status_code == 401
+    response = await async_client.get('/metrics', headers={'Authorization': 'Bearer scrape'})
+    assert response.status_code == 200
+
+def test_metrics_add_up_workers(tmp_path):
+    registry = Registry(str(tmp_path))
+    registry.inc('inventory_http_requests_in_flight', {})
+    registry.observe('inventory_http_request_duration_seconds', {'route': '/status/', 'method': 'GET'}, 0.02)
+
+    worker = Registry()
+    worker.inc('inventory_http_requests_in_flight', {})
+    worker.observe('inventory_http_request_duration_seconds', {'route': '/status/', 'method': 'GET'}, 3)
+    # A worker that is still running, and one that has exited
+    for pid in [os.getppid(), 999999999]:
+        (tmp_path / f'metrics-{pid}.json').write_text(json.dumps(worker.snapshot()))
+
+    text = registry.render()
+    assert 'inventory_http_request_duration_seconds_count{method="GET",route="/status/"} 3' in text
+    assert 'inventory_http_request_duration_seconds_bucket{method="GET",route="/status/",le="0.025"} 1' in text
+    assert 'inventory_http_requests_in_flight 2' in text
+
+def test_metrics_are_flushed_between_requests(tmp_path):
+    registry = Registry(str(tmp_path), flush_interval=0.01)
+    registry.start()
+    registry.inc('inventory_http_requests_in_flight', {})
+    path = tmp_path / f'metrics-{os.getpid()}.json'
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not (path.exists() and json.loads(path.read_text())['inventory_http_requests_in_flight']):
+        time.sleep(0.01)
+    assert json.loads(path.read_text())['inventory_http_requests_in_flight'] == {'[]': 1}
+
+def test_metrics_need_a_token_without_debug(monkeypatch):
+    monkeypatch.setattr(django_settings, 'DEBUG', False)
+    monkeypatch.setitem(settings.METRICS, 'TOKEN', '')
+    with pytest.raises(ImproperlyConfigured):
+        apps.get_app_config('app').ready()
+
+@pytest.mark.asyncio
+async def test_middleware_stays_async_under_asgi():
+    from asgiref.sync import iscoroutinefunction
+    from django.http import HttpResponse
+    from django.test import AsyncRequestFactory
+    from app.middleware import BaserowTimingMiddleware, MetricsMiddleware
+
+    async def view(request):
+        return HttpResponse(status=404)
+    middleware = MetricsMiddleware(BaserowTimingMiddleware(view))
+    assert iscoroutinefunction(middleware)
+
+    response = await middleware(AsyncRequestFactory().get('/nowhere/'))
+    assert response.status_code == 404
+    assert response['Server-Timing'].startswith('baserow;dur=0.0;desc="0 calls"')
+    assert 'inventory_http_errors_total{method="GET",route="unmatched",status="404"}' in registry.render()
@@ -0,0 +1,59 @@
+from app.baserow_client import mirror
+from app.baserow_client.filtering import filter_rows, sort_rows
+from app.baserow_client.hardware import HardwareInstance
+import itertools
+import pytest
+
+ROWS = [
+    {'id': 1, 'order': '1.0', 'serial_number': 'ABC-1', 'procurement_date': '2021-01-03', 'status': [{'id': 3, 'value': 'For Repair'}], 'checked': True, 'amount': 10},
+    {'id': 2, 'order': '2.0', 'serial_number': 'abc-2', 'procurement_date': None, 'status': [], 'checked': False, 'amount': '9'},
+    {'id': 3, 'order': '0.5', 'serial_number': '', 'procurement_date': '2021-01-01T10:00:00Z', 'status': [{'id': 1, 'value': 'Assigned'}, {'id': 3, 'value': 'For Repair'}], 'checked': False, 'amount': 'ten'},
+    {'id': 4, 'order': '3.0', 'serial_number': 'XYZ', 'procurement_date': '2021-01-02', 'status': [{'id': 2, 'value': 'Unassigned'}], 'checked': True, 'amount': None},
+    # Mirrored before `amount` existed
+    {'id': 5, 'order': '3.0', 'serial_number': 'xyz%_', 'procurement_date': '', 'status': [], 'checked': True},
+]
+
+FILTERS = [
+    (),
+    (('serial_number', 'equal', 'XYZ'),),
+    (('serial_number', 'equal', ''),),
+    (('serial_number', 'not_equal', 'XYZ'),),
+    (('serial_number', 'contains', 'abc'),),
+    (('serial_number', 'contains', '%_'),),
+    (('serial_number', 'contains_not', 'ABC'),),
+    (('status', 'equal', 'For Repair'),),
+    (('status', 'contains', 'repair'),),
+    (('status', 'link_row_has', '3'),),
+    (('status', 'link_row_has', 'x'),),
+    (('status', 'link_row_has_not', '3'),),
+    (('status', 'empty', ''),),
+    (('status', 'not_empty', ''),),
+    (('checked', 'boolean', 'true'),),
+    (('checked', 'equal', '0'),),
+    (('amount', 'empty', ''),),
+    (('amount', 'equal', ''),),
+    (('amount', 'not_equal', '9'),),
+    (('procurement_date', 'date_equal', '2021-01-01'),),
+    (('procurement_date', 'date_not_equal', '2021-01-01'),),
+    (('procurement_date', 'date_before', '2021-01-03'),),
+    (('procurement_date', 'date_before_or_equal', '2021-01-03'),),
+    (('procurement_date', 'date_after', '2021-01-01'),),
+    (('procurement_date', 'date_after_or_equal', 'not a date'),),
+    (('checked', 'boolean', 'true'), ('serial_number', 'contains', 'x')),
+]
+
+ORDERS = [(), ('+serial_number',), ('-serial_number',), ('+amount',), ('-amount',), ('+checked', '-procurement_date'), ('-status',)]
+
+@pytest.mark.django_db
+def test_mirror_filters_and_sorts_like_baserow():
+    table = HardwareInstance.table
+    mirror.store_rows(table.id, ROWS)
+    for filters, order_by in itertools.product(FILTERS, ORDERS):
+        expected = [row['id'] for row in sort_rows(filter_rows(ROWS, filters), order_by)]
+        assert [row['id'] for row in mirror.get_rows(table, order_by, filters)] == expected, (filters, order_by)
+        assert mirror.count_rows(table, filters) == len(expected)
+
+    # Rewritten rows are filtered on their new cells
+    mirror.store_rows(table.id, [{**ROWS[3], 'serial_number': 'Renamed'}])
+    assert [row['id'] for row in mirror.get_rows(table, (), (('serial_number', 'equal', 'Renamed'),))] == [4]
+    assert mirror.get_rows(table, (), (('serial_number', 'equal', 'XYZ'),)) == []
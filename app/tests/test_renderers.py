@@ -0,0 +1,33 @@
+from app.baserow_client.rows import SlimRow
+from app.renderers import ORJSONRenderer
+from rest_framework.renderers import JSONRenderer
+import datetime
+import decimal
+import json
+
+def test_orjson_renderer_matches_json_renderer():
+    data = {
+        'data': [{
+            'id': 1,
+            'serial_number': 'Ünïcode',
+            'hardware': 3,
+            'status': None,
+            'hardware_name': [{'id': 3, 'value': 'Laptop'}],
+            'procurement_date': datetime.date(2021, 1, 1),
+            'updated_on': datetime.datetime(2021, 1, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'price': decimal.Decimal('10.50'),
+            'for_deletion': False,
+        }],
+        'totalRecords': 1,
+    }
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert ORJSONRenderer().render(None) == b''
+    # Indented output is left to JSONRenderer
+    assert ORJSONRenderer().render(data, 'application/json; indent=2') == JSONRenderer().render(data, 'application/json; indent=2')
+
+def test_orjson_renderer_renders_slim_rows():
+    rows = [SlimRow(1, {'serial_number': 'A', 'status': ['In Use']}, {}), SlimRow(2, {'serial_number': 'B', 'status': []}, {})]
+    assert json.loads(ORJSONRenderer().render({'data': rows})) == {'data': [
+        {'id': 1, 'serial_number': 'A', 'status': ['In Use']},
+        {'id': 2, 'serial_number': 'B', 'status': []},
+    ]}
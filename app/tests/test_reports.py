@@ -0,0 +1,87 @@
+from app.baserow_client import baserow
+from app.baserow_client.hardware import Hardware, HardwareInstance
+from app.baserow_client.materialized import engine
+import pytest
+import json
+from . import login, memory_only
+from .test_hardware import create_hardware
+
+@pytest.fixture
+def materialized(monkeypatch):
+    from inventory import settings
+    monkeypatch.setitem(settings.MATERIALIZED_REPORTS, 'ENABLED', True)
+    monkeypatch.setattr(engine, 'reports', {})
+    monkeypatch.setattr(baserow, 'write_listeners', [*baserow.write_listeners, engine.apply_write])
+
+async def get_report(async_client, token, name, search=None, materialized=True):
+    from inventory import settings
+    enabled = settings.MATERIALIZED_REPORTS['ENABLED']
+    settings.MATERIALIZED_REPORTS['ENABLED'] = materialized
+    try:
+        params = {'search': json.dumps(search)} if search is not None else {}
+        response = await async_client.get(f'/reports/{name}/', params, headers={'Authorization': f'Token {token}'})
+    finally:
+        settings.MATERIALIZED_REPORTS['ENABLED'] = enabled
+    assert response.status_code == 200
+    return response.json()
+
+async def assert_matches(async_client, token, name, search=None) -> dict:
+    data = await get_report(async_client, token, name, search)
+    assert data == await get_report(async_client, token, name, search, materialized=False)
+    return data
+
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_materialized_report_follows_writes(async_client, materialized):
+    token = await login(async_client, 'viewer@mail.com')
+    hardware = create_hardware()
+    data = await assert_matches(async_client, token, 'hardware-not-assigned')
+    assert data['totalRecords'] == 1
+
+    # Rows written through the client are applied without asking Baserow again
+    instance = HardwareInstance.create(hardware.id, 'Second Serial Number', '2021-01-01')
+    calls = baserow.request_count
+    data = await get_report(async_client, token, 'hardware-not-assigned')
+    assert baserow.request_count == calls
+    assert data['totalRecords'] == 2
+    await assert_matches(async_client, token, 'hardware-not-assigned')
+
+    # Unassigned instances are reported as unassigned whatever their status
+    instance.update({'status': [3]})
+    data = await assert_matches(async_client, token, 'hardware-needing-maintenance')
+    assert instance.id not in [row['id'] for row in data['data']]
+    instance.update({'status': [3], 'assignee': [4]})
+    data = await assert_matches(async_client, token, 'hardware-needing-maintenance')
+    assert [row['id'] for row in data['data']] == [instance.id]
+
+    instance.delete()
+    data = await assert_matches(async_client, token, 'hardware-not-assigned')
+    assert data['totalRecords'] == 1
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_materialized_report_recomputes_after_lookup_changes(async_client, materialized):
+    token = await login(async_client, 'viewer@mail.com')
+    hardware = create_hardware()
+    await assert_matches(async_client, token, 'hardware-not-assigned')
+
+    # The instances' lookups read the hardware's name
+    Hardware.table.get_row(hardware.id).update({'name': 'Renamed Hardware'})
+    data = await assert_matches(async_client, token, 'hardware-not-assigned')
+    assert data['data'][0]['hardware_name'] == [{'id': hardware.id, 'value': 'Renamed Hardware'}]
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_materialized_report_searches_like_the_list_view(async_client, materialized):
+    token = await login(async_client, 'viewer@mail.com')
+    hardware = create_hardware()
+    for i in range(4):
+        HardwareInstance.create(hardware.id, f'Serial Number {i}', f'2021-01-0{i + 1}')
+
+    await assert_matches(async_client, token, 'hardware-not-assigned', {'page': 1, 'rows': 2, 'sortField': 'procurement_date', 'sortOrder': -1})
+    data = await assert_matches(async_client, token, 'hardware-not-assigned', {'filters': {'serial_number': {'constraints': [{'value': 'Number 2', 'matchMode': 'contains'}]}}})
+    assert data['totalRecords'] == 1
+
+    response = await async_client.get('/reports/hardware-not-assigned/', {'search': json.dumps({'filters': {'missing': {'constraints': [{'value': 'x'}]}}})}, headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 422
@@ -0,0 +1,142 @@
+from app.baserow_client import baserow
+from app.baserow_client.hardware import Hardware
+from app.baserow_client.resilience import BaserowUnavailable, BaserowWriteFailed, CircuitBreaker, Resilience, TokenBucket
+import pytest
+import requests
+import importlib
+import time
+import types
+from . import login
+from .test_hardware import create_hardware
+
+# The package exposes the client's Resilience under the same name
+resilience = importlib.import_module('app.baserow_client.resilience')
+
+def failing(statuses, headers=None):
+    """
+    perform_request replacement answering with `statuses` first, then like the memory backend.
+    """
+    perform_request = baserow.perform_request
+    sent = []
+
+    def perform(method, url, *args, **kwargs):
+        sent.append(method)
+        if len(sent) <= len(statuses):
+            response = requests.Response()
+            response.status_code = statuses[len(sent) - 1]
+            response.headers.update(headers or {})
+            response._content = b'{}'
+            return response
+        return perform_request(method, url, *args, **kwargs)
+    return perform, sent
+
+def test_reads_are_retried_and_writes_are_not(monkeypatch):
+    monkeypatch.setattr(baserow, 'resilience', Resilience(attempts=3, backoff=0))
+    perform, sent = failing([503, 502])
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    assert baserow.make_api_request(f'/api/database/fields/table/{baserow.table_map["HARDWARE"]}/')
+    assert sent == ['GET'] * 3
+
+    perform, sent = failing([503])
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(BaserowWriteFailed):
+        baserow.make_api_request(f'/api/database/rows/table/{baserow.table_map["HARDWARE"]}/?user_field_names=true', 'POST', {'name': 'x'})
+    assert sent == ['POST']
+
+def test_a_failed_request_counts_once_towards_the_circuit(monkeypatch):
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+    monkeypatch.setattr(baserow, 'resilience', Resilience(breaker=breaker, attempts=3, backoff=0))
+    perform, sent = failing([503] * 3)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(BaserowUnavailable):
+        baserow.make_api_request(f'/api/database/fields/table/{baserow.table_map["HARDWARE"]}/')
+    assert sent == ['GET'] * 3
+    assert breaker.failures == 1
+    assert not breaker.open
+
+def test_rate_limited_writes_honor_retry_after(monkeypatch):
+    policy = Resilience(attempts=3, backoff=0, max_wait=1)
+    monkeypatch.setattr(baserow, 'resilience', policy)
+    perform, sent = failing([429], {'Retry-After': '0'})
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    baserow.make_api_request(f'/api/database/rows/table/{baserow.table_map["HARDWARE"]}/?user_field_names=true', 'POST', {'name': 'x'})
+    assert sent == ['POST', 'POST']
+
+    perform, sent = failing([429], {'Retry-After': '120'})
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(BaserowUnavailable) as e:
+        baserow.make_api_request(f'/api/database/fields/table/{baserow.table_map["HARDWARE"]}/')
+    assert e.value.retry_after == 120
+    # Every thread now holds back instead of hitting Baserow again
+    with pytest.raises(BaserowUnavailable):
+        policy.admit()
+
+def test_circuit_opens_after_repeated_failures_and_probes_after_timeout(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(resilience, 'time', types.SimpleNamespace(monotonic=lambda: clock[0], time=time.time))
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+    breaker.failure()
+    breaker.allow()
+    breaker.failure()
+    with pytest.raises(BaserowUnavailable) as e:
+        breaker.allow()
+    assert e.value.retry_after == 30
+
+    clock[0] = 30
+    breaker.allow()
+    # Only one probe at a time
+    with pytest.raises(BaserowUnavailable):
+        breaker.allow()
+    breaker.success()
+    breaker.allow()
+
+def test_token_bucket_spaces_out_requests(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(resilience, 'time', types.SimpleNamespace(monotonic=lambda: clock[0], time=time.time))
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
+    with pytest.raises(BaserowUnavailable):
+        bucket.reserve(0.1)
+    clock[0] = 1
+    assert bucket.reserve(1) == 0
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_read_when_baserow_is_down(async_client, monkeypatch):
+    token = await login(async_client, 'viewer@mail.com')
+    hardware = create_hardware()
+    monkeypatch.setattr(baserow, 'resilience', Resilience(breaker=CircuitBreaker(threshold=2, reset_timeout=30), attempts=2, backoff=0))
+    perform, sent = failing([503] * 10)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 503
+    assert response.json() == {'message': 'Baserow is unavailable, try again later'}
+
+    # The circuit is open, Baserow is not asked again
+    count = len(sent)
+    response = await async_client.get(f'/hardware/{hardware.id}/', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 503
+    assert response['Retry-After'] == '30'
+    assert len(sent) == count
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_hardware_write_baserow_may_have_applied(async_client, monkeypatch):
+    token = await login(async_client, 'admin@mail.com')
+    Hardware.table.fields
+    monkeypatch.setattr(baserow, 'resilience', Resilience(attempts=3, backoff=0))
+    perform, sent = failing([500])
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    response = await async_client.post('/hardware/', {
+        'name': 'Test Hardware',
+        'brand': 'Test Brand',
+        'type': 'Test Type',
+        'model_number': 'Test Model Number',
+        'description': 'Test Description',
+        'one2m': {'instances': {'data': []}},
+    }, headers={'Authorization': f'Token {token}'}, content_type='application/json')
+    assert response.status_code == 502
+    assert 'Retry-After' not in response
+    assert sent == ['POST']
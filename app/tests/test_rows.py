@@ -0,0 +1,93 @@
+from app.baserow_client import baserow
+from app.baserow_client.changeset import ChangeSet
+from app.baserow_client.hardware import HardwareInstance
+from app.baserow_client.pagination import get_page, iter_rows
+from app.baserow_client.query import linked_to
+from app.baserow_client.rows import SlimRow, decode_rows
+from baserowapi.models.row import Row
+import pytest
+import requests
+from . import memory_only, record_requests
+from .test_hardware import create_hardware
+
+@pytest.mark.django_db
+def test_slim_rows_match_row_content():
+    hardware = create_hardware()
+    table = HardwareInstance.table
+    raw = list(iter_rows(table, linked_to(table, 'hardware', hardware.id)))
+    raw.append({**raw[0], 'id': raw[0]['id'] + 1, 'status': [{'id': 2, 'value': 'In Use'}], 'assignee': []})
+
+    for data, row in zip(raw, decode_rows(table, raw)):
+        assert isinstance(row, SlimRow)
+        assert row.id == data['id']
+        assert row.content == Row(row_data=dict(data), table=table, client=table.client).content
+        assert row.link('hardware') == hardware.id
+        assert row.link('status') == (data['status'][0]['id'] if data['status'] else None)
+        assert row.link('assignee') is None
+
+@pytest.mark.django_db
+def test_only_missing_pages_end_a_window(monkeypatch):
+    create_hardware()
+    table = HardwareInstance.table
+    page = get_page(table, 0, 400)
+    assert len(page.rows) == page.count < 200
+
+    # A window past the last row ends at Baserow's 404, any other failure is raised
+    perform_request = baserow.perform_request
+    def perform(method, url, *args, **kwargs):
+        if 'page=2&' in url:
+            response = requests.Response()
+            response.status_code = 400
+            response._content = b'{}'
+            return response
+        return perform_request(method, url, *args, **kwargs)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_page(table, 0, 400)
+
+@memory_only
+@pytest.mark.django_db
+def test_change_set_batches_only_what_changed(monkeypatch):
+    table = HardwareInstance.table
+    hardware = create_hardware()
+    other = create_hardware()
+    for serial_number in ['Second Serial Number', 'Third Serial Number']:
+        HardwareInstance.create(hardware.id, serial_number, '2021-01-01')
+    first, second, third = list(iter_rows(table, linked_to(table, 'hardware', hardware.id)))
+    foreign = next(iter_rows(table, linked_to(table, 'hardware', other.id)))
+
+    changes = ChangeSet(iter_rows(table, linked_to(table, 'hardware', hardware.id)))
+    assert changes.update(first['id'], {'serial_number': first['serial_number'], 'status': first['status'], 'assignee': []})
+    assert changes.update(second['id'], {'serial_number': 'Renamed', 'procurement_date': second['procurement_date']})
+    assert changes.delete(third['id'])
+    # Rows of other hardware are left alone
+    assert not changes.update(foreign['id'], {'serial_number': 'Taken Over'})
+    assert not changes.delete(foreign['id'])
+    changes.create({'serial_number': 'New 1', 'hardware': [hardware.id]})
+    changes.create({'serial_number': 'New 2', 'hardware': [hardware.id]})
+
+    sent = record_requests(monkeypatch)
+    calls = baserow.request_count
+    new_ids = changes.apply(table)
+    assert baserow.request_count - calls == 3
+    batch = f'/api/database/rows/table/{table.id}/batch/'
+    assert sent == [
+        ('POST', f'/api/database/rows/table/{table.id}/batch-delete/', {'items': [third['id']]}),
+        ('PATCH', batch, {'items': [{'id': second['id'], 'serial_number': 'Renamed'}]}),
+        ('POST', batch, {'items': [{'serial_number': 'New 1', 'hardware': [hardware.id]}, {'serial_number': 'New 2', 'hardware': [hardware.id]}]}),
+    ]
+    assert len(new_ids) == 2
+    assert table.get_row(foreign['id'])['serial_number'] == 'Test Serial Number'
+
+@memory_only
+@pytest.mark.django_db
+def test_change_set_sends_nothing_when_nothing_changed(monkeypatch):
+    table = HardwareInstance.table
+    hardware = create_hardware()
+    changes = ChangeSet(iter_rows(table, linked_to(table, 'hardware', hardware.id)))
+    for row in changes.current.values():
+        changes.update(row['id'], {'serial_number': row['serial_number'], 'procurement_date': row['procurement_date'], 'status': [], 'assignee': []})
+
+    calls = baserow.request_count
+    assert changes.apply(table) == []
+    assert baserow.request_count == calls
@@ -1,8 +1,8 @@
-from app.baserow_client.software import Software
+from app.baserow_client.software import Software, SoftwareInstance
 from baserowapi import Filter
 import pytest
 import json
-from . import login
+from . import login, memory_only, record_requests
 
 def create_software():
     return Software.create(
@@ -466,6 +466,51 @@ async def test_software_put_admin_can_edit_instances(async_client, email):
     assert data['one2m']['instances']['data'][0]['serial_key'] == '654321'
     assert data['one2m']['instances']['data'][0]['status'] == 2
 
+@memory_only
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_software_put_batches_only_changed_instances(async_client, monkeypatch):
+    from app.baserow_client import baserow
+    token = await login(async_client, 'admin@mail.com')
+    software = create_software()
+    other = create_software()
+    for serial_key in ['234567', '345678']:
+        SoftwareInstance.create(software.id, serial_key)
+    foreign = next(iter(SoftwareInstance.table.get_rows(filters=[Filter('software', other.id, 'link_row_has')])))
+    data = (await async_client.get(f'/software/{software.id}/', headers={'Authorization': f'Token {token}'})).json()['data']
+    unchanged, changed, deleted = data['one2m']['instances']['data']
+    table = f'/api/database/rows/table/{SoftwareInstance.table.id}'
+
+    # Submitted unchanged, no instance is written
+    data['one2m']['instances']['delete'] = []
+    data['one2m']['subscriptions']['delete'] = []
+    sent = record_requests(monkeypatch)
+    response = await async_client.put(f'/software/{software.id}/', data, headers={'Authorization': f'Token {token}'}, content_type='application/json')
+    assert response.status_code == 200
+    assert [request for request in sent if request[0] != 'GET' and request[1].startswith(f'{table}/')] == []
+
+    changed['serial_key'] = '654321'
+    data['one2m']['instances']['data'] = [
+        unchanged,
+        changed,
+        {'serial_key': '999999'},
+        # Instances of other software are ignored
+        {**changed, 'id': foreign.id, 'serial_key': 'Taken Over'},
+    ]
+    data['one2m']['instances']['delete'] = [deleted['id'], foreign.id]
+    sent.clear()
+    calls = baserow.request_count
+    response = await async_client.put(f'/software/{software.id}/', data, headers={'Authorization': f'Token {token}'}, content_type='application/json')
+    assert response.status_code == 200
+    assert baserow.request_count - calls == len(sent)
+    writes = [request for request in sent if request[0] != 'GET' and request[1].startswith(f'{table}/')]
+    assert writes == [
+        ('POST', f'{table}/batch-delete/', {'items': [deleted['id']]}),
+        ('PATCH', f'{table}/batch/', {'items': [{'id': changed['id'], 'serial_key': '654321'}]}),
+        ('POST', f'{table}/batch/', {'items': [{'serial_key': '999999', 'software': [software.id]}]}),
+    ]
+    assert SoftwareInstance.table.get_row(foreign.id)['serial_key'] == '123456'
+
 @pytest.mark.parametrize('email', ['admin@mail.com', 'super@mail.com', 'root@mail.com'])
 @pytest.mark.django_db
 @pytest.mark.asyncio
@@ -639,4 +684,46 @@ async def test_software_delete_when_authorised(async_client, email):
     assert response.status_code == 204
 
     response = await async_client.get(f'/software/{software.id}/', headers={'Authorization': f'Token {token}'})
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_software_ndjson_export(async_client):
+    token = await login(async_client)
+    create_software()
+    response = await async_client.get(
+        f'/software-json/?mode=ndjson&search={json.dumps({"filters": {}})}',
+        headers={'Authorization': f'Token {token}'}
+        )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    assert response.is_async
+
+    records = [json.loads(line) for line in b''.join([chunk async for chunk in response.streaming_content]).splitlines()]
+    assert len(records) > 0
+    assert set(records[0]) == {'ID', 'Name', 'Brand', 'Version Number', 'Expiration Date', 'Serial Key', 'Status', 'Assignee'}
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_software_async_views_match_sync_views(async_client):
+    from django.test import AsyncRequestFactory
+    from app.views.software import AsyncSoftwareDetail, AsyncSoftwareList
+    token = await login(async_client, 'viewer@mail.com')
+    software = create_software()
+    headers = {'Authorization': f'Token {token}'}
+    factory = AsyncRequestFactory()
+
+    response = await AsyncSoftwareDetail.as_view()(factory.get(f'/software/{software.id}/', headers=headers), pk=software.id)
+    response.render()
+    expected = await async_client.get(f'/software/{software.id}/', headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.content) == expected.json()
+
+    response = await AsyncSoftwareList.as_view()(factory.get('/software/', {'page': 0, 'rows': 10}, headers=headers))
+    response.render()
+    expected = await async_client.get('/software/', {'page': 0, 'rows': 10}, headers=headers)
+    assert json.loads(response.content) == expected.json()
+
+    response = await AsyncSoftwareDetail.as_view()(factory.get('/software/999999/', headers=headers), pk=999999)
+    assert response.status_code == 404
@@ -22,6 +22,22 @@ async def test_user_read_when_logged_in(async_client, email):
     response = await async_client.get(f'/users/?search={json.dumps({})}', headers={'Authorization': f'Token {token}'})
     assert response.status_code == 200
 
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_user_read_does_not_fetch_login_codes(async_client, monkeypatch):
+    from app.baserow_client import baserow
+    token = await login(async_client, 'viewer@mail.com')
+    endpoints = []
+    make_api_request = baserow.make_api_request
+    monkeypatch.setattr(baserow, 'make_api_request', lambda endpoint, *args, **kwargs: endpoints.append(endpoint) or make_api_request(endpoint, *args, **kwargs))
+
+    response = await async_client.get(f'/users/?search={json.dumps({"rows": 100})}', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 200
+    assert response.json()['data']
+    for user in response.json()['data']:
+        assert 'auth_code' not in user and 'auth_expiry' not in user
+    assert any('include=email,type,type_formula,type_lookup' in endpoint for endpoint in endpoints)
+
 @pytest.mark.django_db
 @pytest.mark.asyncio
 async def test_user_post_when_not_logged_in(async_client):
@@ -186,3 +202,60 @@ async def test_user_types_read_when_logged_in(async_client, email):
     token = await login(async_client, email)
     response = await async_client.get(f'/user-types/', headers={'Authorization': f'Token {token}'})
     assert response.status_code == 200
+
+@pytest.mark.parametrize('email, status_code', [('viewer@mail.com', 401), ('clerk@mail.com', 401), ('admin@mail.com', 204)])
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_reference_data_refresh(async_client, email, status_code):
+    token = await login(async_client, email)
+    response = await async_client.post('/reference-data/refresh/', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == status_code
+
+    response = await async_client.get(f'/user-types/', headers={'Authorization': f'Token {token}'})
+    assert 'Root Admin' not in [user_type['label'] for user_type in response.json()['data']]
+
+@pytest.mark.django_db
+def test_reference_refresh_keeps_dependent_caches_when_nothing_changed(monkeypatch):
+    from app.baserow_client import baserow
+    from app.baserow_client.cache import LocMemBackend, RowCache
+    from app.baserow_client.status import Status
+    table_map = baserow.table_map
+    cache = RowCache(LocMemBackend(), {table_map['STATUS']: 300}, {table_map['STATUS']: [table_map['HARDWARE_INSTANCE']]})
+    monkeypatch.setattr(baserow, 'cache', cache)
+    Status.reference.invalidate()
+    epoch = cache._token(f"epoch:{table_map['HARDWARE_INSTANCE']}")
+
+    Status.reference.invalidate()
+    assert cache._token(f"epoch:{table_map['HARDWARE_INSTANCE']}") == epoch
+
+    Status.table.get_row(3).update({'label': 'Being Repaired'})
+    Status.reference.invalidate()
+    assert cache._token(f"epoch:{table_map['HARDWARE_INSTANCE']}") != epoch
+    Status.table.get_row(3).update({'label': 'For Repair'})
+    Status.reference.invalidate()
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_reference_data_refresh_when_baserow_fails(async_client, monkeypatch):
+    from app.baserow_client import baserow
+    from app.baserow_client.cache import LocMemBackend, RowCache
+    from app.baserow_client.status import Status
+    from .test_resilience import failing
+    table_map = baserow.table_map
+    token = await login(async_client, 'admin@mail.com')
+    cache = RowCache(LocMemBackend(), {table_map['STATUS']: 300}, {table_map['STATUS']: [table_map['HARDWARE_INSTANCE']]})
+    monkeypatch.setattr(baserow, 'cache', cache)
+    Status.reference.invalidate()
+    rows = Status.reference.rows
+    epoch = cache._token(f"epoch:{table_map['HARDWARE_INSTANCE']}")
+
+    perform, sent = failing([400] * 2)
+    monkeypatch.setattr(baserow, 'perform_request', perform)
+    with pytest.raises(Exception):
+        Status.reference.invalidate()
+    assert Status.reference.rows == rows
+    assert cache._token(f"epoch:{table_map['HARDWARE_INSTANCE']}") == epoch
+
+    response = await async_client.post('/reference-data/refresh/', headers={'Authorization': f'Token {token}'})
+    assert response.status_code == 503
+    assert Status.reference.rows == rows
@@ -0,0 +1,131 @@
+from app.models import MirrorCursor, MirrorRow
+from django.apps import apps
+from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from inventory import settings
+from inventory.settings import BASEROW_TABLE_MAP
+import hashlib
+import hmac
+import pytest
+import json
+
+SECRET = 'test-secret'
+
+def rows_updated_event():
+    # Recorded from a Baserow webhook with "use user field names" enabled
+    return {
+        'table_id': BASEROW_TABLE_MAP['HARDWARE'],
+        'database_id': 1,
+        'workspace_id': 1,
+        'event_id': '0ff3b1a4-9d22-4c8b-8b0e-6b1d3f5b6a11',
+        'event_type': 'rows.updated',
+        'items': [{
+            'id': 900001,
+            'order': '1.00000000000000000000',
+            'name': 'Renamed in Baserow',
+            'brand': 'Test Brand',
+            'type': 'Test Type',
+            'model_number': 'Test Model Number',
+            'description': 'Test Description',
+            'for_deletion': False,
+        }],
+        'old_items': [{
+            'id': 900001,
+            'order': '1.00000000000000000000',
+            'name': 'Test Hardware',
+            'brand': 'Test Brand',
+            'type': 'Test Type',
+            'model_number': 'Test Model Number',
+            'description': 'Test Description',
+            'for_deletion': False,
+        }],
+    }
+
+def rows_deleted_event():
+    return {
+        'table_id': BASEROW_TABLE_MAP['HARDWARE'],
+        'database_id': 1,
+        'workspace_id': 1,
+        'event_id': '6a3c9a5e-0f63-4a1e-a3f4-2f0f8c0d7e42',
+        'event_type': 'rows.deleted',
+        'row_ids': [900001],
+    }
+
+@pytest.fixture
+def webhook_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'BASEROW_WEBHOOK_SECRET', SECRET)
+    monkeypatch.setitem(settings.BASEROW_MIRROR, 'ENABLED', True)
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_without_secret(async_client, webhook_settings):
+    response = await async_client.post('/webhooks/baserow/', rows_updated_event(), content_type='application/json')
+    assert response.status_code == 403
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_with_wrong_signature(async_client, webhook_settings):
+    response = await async_client.post(
+        '/webhooks/baserow/',
+        rows_updated_event(),
+        content_type='application/json',
+        headers={'X-Baserow-Signature': 'sha256=0000'}
+        )
+    assert response.status_code == 403
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_rows_updated_patches_mirror(async_client, webhook_settings):
+    body = json.dumps(rows_updated_event())
+    signature = hmac.new(SECRET.encode(), body.encode(), hashlib.sha256).hexdigest()
+    response = await async_client.post(
+        '/webhooks/baserow/',
+        body,
+        content_type='application/json',
+        headers={'X-Baserow-Signature': f'sha256={signature}'}
+        )
+    assert response.status_code == 204
+
+    row = await MirrorRow.objects.aget(table_id=BASEROW_TABLE_MAP['HARDWARE'], row_id=900001)
+    assert row.data['name'] == 'Renamed in Baserow'
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_rows_deleted_removes_from_mirror(async_client, webhook_settings):
+    headers = {'X-Baserow-Secret': SECRET}
+    await async_client.post('/webhooks/baserow/', rows_updated_event(), content_type='application/json', headers=headers)
+    response = await async_client.post('/webhooks/baserow/', rows_deleted_event(), content_type='application/json', headers=headers)
+    assert response.status_code == 204
+
+    assert not await MirrorRow.objects.filter(table_id=BASEROW_TABLE_MAP['HARDWARE'], row_id=900001).aexists()
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_invalid_payload(async_client, webhook_settings):
+    response = await async_client.post('/webhooks/baserow/', {'items': []}, content_type='application/json', headers={'X-Baserow-Secret': SECRET})
+    assert response.status_code == 422
+
+@pytest.mark.django_db
+@pytest.mark.asyncio
+async def test_webhook_rows_keyed_by_field_id_stop_mirror_reads(async_client, webhook_settings):
+    headers = {'X-Baserow-Secret': SECRET}
+    table_id = BASEROW_TABLE_MAP['HARDWARE']
+    await async_client.post('/webhooks/baserow/', rows_updated_event(), content_type='application/json', headers=headers)
+    await MirrorCursor.objects.acreate(table_id=table_id, synced_at=timezone.now())
+
+    event = rows_updated_event()
+    event['items'] = [{'id': 900001, 'order': '1.00000000000000000000', 'field_1': 'Renamed again'}]
+    response = await async_client.post('/webhooks/baserow/', event, content_type='application/json', headers=headers)
+    assert response.status_code == 204
+
+    # The row stays mirrored, but the table is read from Baserow until the next sync
+    assert await MirrorRow.objects.filter(table_id=table_id, row_id=900001).aexists()
+    assert not await MirrorCursor.objects.filter(table_id=table_id).aexists()
+
+def test_webhook_refuses_a_per_worker_cache(monkeypatch):
+    monkeypatch.setattr(django_settings, 'BASEROW_WEBHOOK_SECRET', SECRET)
+    monkeypatch.setitem(settings.BASEROW_CACHE, 'ENABLED', True)
+    monkeypatch.setitem(settings.BASEROW_CACHE, 'BACKEND', 'locmem')
+    with pytest.raises(ImproperlyConfigured):
+        apps.get_app_config('app').ready()
@@ -1,7 +1,12 @@
 from django.urls import path
 from rest_framework.authtoken import views
 from .authentication import CustomAuthToken
-from .views import authentication, hardware, status, hardware_instance, software, software_instance, user, user_type, reports
+from inventory import settings
+from .views import authentication, hardware, status, hardware_instance, software, software_instance, user, user_type, reports, dashboard, reference, webhooks, metrics
+
+def pick(view, async_view):
+    # Async views fetch independent rows concurrently, but only pay off under ASGI
+    return (async_view if settings.ASYNC_VIEWS else view).as_view()
 
 urlpatterns = [
     path('login/', CustomAuthToken.as_view()),
@@ -12,35 +17,45 @@ urlpatterns = [
     path('user/software/', user.UserAssignedSoftware.as_view()),
 
     # Hardware
-    path('hardware/', hardware.HardwareList.as_view()),
-    path('hardware/<int:pk>/', hardware.HardwareDetail.as_view()),
+    path('hardware/', pick(hardware.HardwareList, hardware.AsyncHardwareList)),
+    path('hardware/<int:pk>/', pick(hardware.HardwareDetail, hardware.AsyncHardwareDetail)),
 
-    path('hardware-instance/', hardware_instance.HardwareInstanceList.as_view()),
+    path('hardware-instance/', pick(hardware_instance.HardwareInstanceList, hardware_instance.AsyncHardwareInstanceList)),
 
     path('hardware-csv/', hardware_instance.HardwareCSV.as_view()),
     path('hardware-json/', hardware_instance.HardwareJSON.as_view()),
 
     # Software
-    path('software/', software.SoftwareList.as_view()),
-    path('software/<int:pk>/', software.SoftwareDetail.as_view()),
-    path('software-instance/', software_instance.SoftwareInstanceList.as_view()),
+    path('software/', pick(software.SoftwareList, software.AsyncSoftwareList)),
+    path('software/<int:pk>/', pick(software.SoftwareDetail, software.AsyncSoftwareDetail)),
+    path('software-instance/', pick(software_instance.SoftwareInstanceList, software_instance.AsyncSoftwareInstanceList)),
 
     path('software-csv/', software_instance.SoftwareCSV.as_view()),
     path('software-json/', software_instance.SoftwareJSON.as_view()),
 
     # Status
     path('status/', status.StatusList.as_view()),
+    path('reference-data/refresh/', reference.ReferenceDataRefresh.as_view()),
 
     # Users
-    path('users/', user.UserList.as_view()),
+    path('users/', pick(user.UserList, user.AsyncUserList)),
     path('users/<int:pk>/', user.UserDetail.as_view()),
 
     # User Types
     path('user-types/', user_type.UserTypeList.as_view()),
     
     # Reports
-    path('reports/software-near-expiry/', reports.SoftwareNearExpiry.as_view()),
-    path('reports/hardware-needing-maintenance/', reports.HardwareNeedingMaintenance.as_view()),
-    path('reports/hardware-not-assigned/', reports.HardwareNotAssigned.as_view()),
-    path('reports/software-not-assigned/', reports.SoftwareNotAssigned.as_view()),
+    path('reports/software-near-expiry/', pick(reports.SoftwareNearExpiry, reports.AsyncSoftwareNearExpiry)),
+    path('reports/hardware-needing-maintenance/', pick(reports.HardwareNeedingMaintenance, reports.AsyncHardwareNeedingMaintenance)),
+    path('reports/hardware-not-assigned/', pick(reports.HardwareNotAssigned, reports.AsyncHardwareNotAssigned)),
+    path('reports/software-not-assigned/', pick(reports.SoftwareNotAssigned, reports.AsyncSoftwareNotAssigned)),
+
+    # Dashboard
+    path('dashboard/', dashboard.Dashboard.as_view()),
+
+    # Baserow
+    path('webhooks/baserow/', webhooks.BaserowWebhook.as_view()),
+
+    # Monitoring
+    path('metrics', metrics.metrics),
 ]
@@ -0,0 +1,76 @@
+import json
+from django.core.cache import cache
+from inventory import settings
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..baserow_client import mirror, tables
+from ..baserow_client.fanout import fan_out
+from ..baserow_client.hardware import HardwareInstance
+from ..baserow_client.pagination import count_rows
+from ..baserow_client.query import InvalidQuery, ListQuery
+from ..baserow_client.software import SoftwareInstance
+from ..baserow_client.status import Status
+from .reports import HardwareNeedingMaintenance, HardwareNotAssigned, SoftwareNearExpiry, SoftwareNotAssigned
+from .user_type import UserTypeList
+
+class Dashboard(APIView):
+    """
+    Everything the dashboard shows in one response: the statuses, the user
+    types, the number of instances, and the first page and total of every report.
+
+    Snapshots are shared by every user and cached for DASHBOARD_SNAPSHOT_TTL
+    seconds. Computing one takes the reports from their materialized result
+    sets when MATERIALIZED_REPORTS is enabled. Otherwise reports on mirrored
+    tables are queried from the mirror, and the others from Baserow in parallel.
+    """
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    reports = [SoftwareNearExpiry, HardwareNeedingMaintenance, HardwareNotAssigned, SoftwareNotAssigned]
+
+    def get(self, request, format=None):
+        try:
+            size = ListQuery.parse(request.query_params.get('search')).size
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        key = f'dashboard-snapshot:{size}'
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = Dashboard.snapshot(size)
+            if settings.DASHBOARD_SNAPSHOT_TTL > 0:
+                cache.set(key, snapshot, settings.DASHBOARD_SNAPSHOT_TTL)
+        return Response({'data': snapshot}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def snapshot(size: int) -> dict:
+        def mirrored(table) -> bool:
+            return settings.BASEROW_MIRROR['ENABLED'] and mirror.is_synced(table)
+
+        def page(report) -> dict:
+            table = tables.get(report.table_name)
+            query = ListQuery.parse(json.dumps({'rows': size, 'filters': report.filters()}))
+            return report.list_view.serialize(query.execute(table, use_mirror=mirrored(table), projection=report.list_view.fields))
+
+        def total(model) -> int:
+            return mirror.count_rows(model.table) if mirrored(model.table) else count_rows(model.table, '')
+
+        # Queries reading the mirror stay on this thread, which holds the database connection
+        run = (lambda function, items: list(map(function, items))) if settings.BASEROW_MIRROR['ENABLED'] else fan_out.map
+        if settings.MATERIALIZED_REPORTS['ENABLED']:
+            # Served from memory, computing a stale result set may read the mirror
+            pages = [report.list_view.serialize(report.materialized().page(ListQuery(size=size))) for report in Dashboard.reports]
+        else:
+            pages = run(page, Dashboard.reports)
+        hardware_instances, software_instances = run(total, (HardwareInstance, SoftwareInstance))
+        return {
+            'status': Status.reference.rows,
+            'userTypes': UserTypeList.entities(),
+            'totals': {
+                'hardwareInstances': hardware_instances,
+                'softwareInstances': software_instances,
+            },
+            'reports': {report.name: result for report, result in zip(Dashboard.reports, pages)},
+        }
@@ -2,66 +2,49 @@ from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
 
+import asyncio
+import logging
 from app.serializers.hardware import HardwareInstanceSerializer, HardwareSerializer
-from ..baserow_client import get_baserow_operator
+from ..baserow_client import async_baserow, mirror
+from ..baserow_client.resilience import unavailable_cause
+from ..baserow_client.query import InvalidQuery, ListQuery, linked_to
 from ..baserow_client.assignment_log import AssignmentLog
+from ..baserow_client.batch import create_rows, update_rows
+from ..baserow_client.changeset import ChangeSet, link_ids
+from ..baserow_client.fanout import fan_out
+from ..baserow_client.pagination import get_row, get_rows, iter_rows
+from ..baserow_client.projection import Projection
 from ..baserow_client.hardware import Hardware, HardwareInstance
-from baserowapi import Filter
-import json
 from django.http import Http404
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from ..baserow_client.user import UserTypeEnum
+from .base import AsyncAPIView
+from .hardware_instance import HardwareInstanceList
+
+logger = logging.getLogger(__name__)
 class HardwareList(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = query.execute(Hardware.table, use_mirror=mirror.serves(self))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(HardwareList.serialize(result), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def serialize(result) -> dict:
         hardware = []
-        search: dict = json.loads(request.query_params['search'])
-        kwargs = {}
-
-        # Pagination
-
-        page = search.get('page', 0)
-        size = search.get('rows', 5)
-
-        # Sorting
-        sort_order = search.get('sortOrder', 1)
-        sort_direction = '+' if sort_order == 1 else '-'
-        sort_field = search.get('sortField')
-
-        if sort_field:
-            kwargs['order_by'] = [f'{sort_direction}{sort_field}']
-
-        # Filtering
-        filters = []
-        for key in search["filters"]:
-            for constraint in search["filters"][key]['constraints']:
-                if constraint['value'] is None:
-                    continue
-                filters.append(
-                    Filter(
-                        key,
-                        constraint['value'],
-                        get_baserow_operator(constraint['matchMode']))
-                    )
-        if len(filters) > 0:
-            kwargs['filters'] = filters
-        
-        rows = Hardware.table.get_rows(**kwargs)
-
-        row_counter = 0
-        for row in rows:
-            row_counter += 1
-            if row_counter - 1 < page * size or row_counter - 1 >= (page + 1) * size:
-                continue
+        for row in result.rows:
             data = row.content
             data['id'] = row.id
             if row['status'] == []:
                 data['status'] = 'Available'
             hardware.append(data)
-        return Response({'data': hardware, 'totalRecords': row_counter}, status=status.HTTP_200_OK)
+        return {'data': hardware, 'totalRecords': result.count}
 
     def post(self, request, format=None):
         if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
@@ -91,6 +74,7 @@ class HardwareList(APIView):
 
         # Instances
         instances = request.data.get('one2m').get('instances').get('data')
+        new_instance_rows = []
         for instance in instances:
             new_instance_row = {
                 'serial_number': instance.get('serial_number'),
@@ -100,48 +84,69 @@ class HardwareList(APIView):
             }
             if instance.get("assignee"):
                 new_instance_row['assignee'] = [instance.get('assignee')]
-                # Add assignment log
-            hardware_instance_row = HardwareInstance.table.add_row(new_instance_row)
-            if instance.get("assignee"):
-                AssignmentLog.assign({
-                    'user': [instance.get('assignee')],
-                    'hardware': [hardware_instance_row.id],
-                })
+            new_instance_rows.append(new_instance_row)
+        instance_ids = create_rows(HardwareInstance.table, new_instance_rows)
+
+        # Add assignment logs
+        AssignmentLog.assign_many([
+            AssignmentLog.new_row(instance['assignee'], hardware=instance_id)
+            for instance, instance_id in zip(instances, instance_ids)
+            if instance.get('assignee')
+        ])
         return Response({'data': new_id}, status=status.HTTP_201_CREATED)
 
+class AsyncHardwareList(AsyncAPIView, HardwareList):
+    async def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = await query.aexecute(Hardware.table, use_mirror=mirror.serves(self))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(HardwareList.serialize(result), status=status.HTTP_200_OK)
+
 class HardwareDetail(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    instance_fields = HardwareInstanceList.fields
+    # Columns an update compares against the submitted instances
+    changed_instance_fields = Projection(include=('serial_number', 'procurement_date', 'status', 'assignee'))
 
     def get(self, request, pk, format=None):
         try:
-            row = Hardware.table.get_row(pk)
-            data = row.content
-            data['id'] = row.id
-
-            # Instances
-
-            rows = HardwareInstance.table.get_rows(filters=[Filter('hardware', pk, 'link_row_has')])
-            instances = []
-            for row in rows:
-                instance = row.content
-                instance['id'] = row.id
-                instance['status'] = row.values['status'].id
-                instance['hardware'] = row.values['hardware'].id
-                instance['assignee'] = row.values['assignee'].id
-                instances.append(instance)
-
-            data['one2m'] = {
-                'instances': {
-                    'data': instances
-                }
-            }
-
-            return Response({'data': data})
+            row, instances = fan_out.run(
+                lambda: get_row(Hardware.table, pk),
+                lambda: get_rows(HardwareInstance.table, self.instance_fields.extend(HardwareInstance.table, linked_to(HardwareInstance.table, 'hardware', pk))),
+            )
+            return Response({'data': HardwareDetail.serialize(row, instances)})
         except Exception as e:
-            print(e)
+            logger.warning(f'Could not read hardware {pk}: {e}')
+            if unavailable_cause(e) is not None:
+                raise
             raise Http404
 
+    @staticmethod
+    def serialize(row, instance_rows) -> dict:
+        data = row.content
+        data['id'] = row.id
+
+        # Instances
+
+        instances = []
+        for row in instance_rows:
+            instance = row.content
+            instance['id'] = row.id
+            instance['status'] = row.link('status')
+            instance['hardware'] = row.link('hardware')
+            instance['assignee'] = row.link('assignee')
+            instances.append(instance)
+
+        data['one2m'] = {
+            'instances': {
+                'data': instances
+            }
+        }
+        return data
+
     def put(self, request, pk, format=None):
         if request.user.role.role == UserTypeEnum.VIEWER.value:
             return Response({'message': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -160,60 +165,51 @@ class HardwareDetail(APIView):
         if errors:
             return Response({"message": "Invalid data", "errors": errors}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-        row = Hardware.table.get_row(pk)
-        instances_to_delete = request.data.get('one2m').get('instances').get('delete')
-
-        if request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
-            row['name'] = request.data.get('name')
-            row['brand'] = request.data.get('brand')
-            row['type'] = request.data.get('type')
-            row['model_number'] = request.data.get('model_number')
-            row['description'] = request.data.get('description')
+        is_admin = request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]
+        instances_to_delete = request.data.get('one2m').get('instances').get('delete') or []
 
+        hardware_row = {
+            'id': pk,
+            'for_deletion': request.data.get('for_deletion'),
+        }
+        if is_admin:
+            hardware_row['name'] = request.data.get('name')
+            hardware_row['brand'] = request.data.get('brand')
+            hardware_row['type'] = request.data.get('type')
+            hardware_row['model_number'] = request.data.get('model_number')
+            hardware_row['description'] = request.data.get('description')
+        update_rows(Hardware.table, [hardware_row])
+
+        # Read every current instance once and diff the submitted ones against them
+        query = self.changed_instance_fields.extend(HardwareInstance.table, linked_to(HardwareInstance.table, 'hardware', pk))
+        changes = ChangeSet(iter_rows(HardwareInstance.table, query))
+        assignment_logs = []
+
+        if is_admin:
             for instance in instances_to_delete:
-                HardwareInstance.table.get_row(instance).delete()
-
-        row['for_deletion'] = request.data.get('for_deletion')
-        row.update()
+                changes.delete(instance)
 
+        new_instances = []
         instances = request.data.get('one2m').get('instances').get('data')
         for instance in instances:
             if 'id' in instance:
-                if instance['id'] in instances_to_delete:
+                if instance['id'] in instances_to_delete or instance['id'] not in changes.current:
                     continue
 
-                instance_row = HardwareInstance.table.get_row(instance['id'])
-                if request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
+                instance_row = {}
+                if is_admin:
                     instance_row['serial_number'] = instance['serial_number']
                     instance_row['procurement_date'] = instance['procurement_date']
                     instance_row['status'] = [instance['status']] if instance.get('status') else []
 
-                # Check if the new assignee is set and the current assignee is not set
-                # Assign
-                if instance.get('assignee') and len(instance_row['assignee']) == 0:
-                    AssignmentLog.assign(instance['assignee'], hardware=instance['id'])
-
-                # Check if the new assignee and current assignee are set
-                # And if they are not equal
-                # Assign and unassign
-                if instance.get('assignee') and len(instance_row['assignee']) > 0 and instance.get('assignee') != instance_row.values['assignee'].id:
-                    AssignmentLog.assign(instance['assignee'], hardware=instance['id'])
-                    AssignmentLog.assign(instance_row['assignee'][0], hardware=instance['id'], assignment_type=2)
+                current_assignee = next(iter(link_ids(changes.current[instance['id']].get('assignee'))), None)
+                assignment_logs += AssignmentLog.reassign_rows(current_assignee, instance.get('assignee'), hardware=instance['id'])
+                instance_row['assignee'] = [instance['assignee']] if instance.get('assignee') else []
 
-                # Check if the new assignee is not set and the current assignee
-                # Unassign
-                if not instance.get('assignee') and len(instance_row['assignee']) > 0:
-                    AssignmentLog.assign(instance_row['assignee'][0], hardware=instance['id'], assignment_type=2)
-
-                if instance.get('assignee'):
-                    instance_row['assignee'] = [instance['assignee']]
-                else:
-                    instance_row['assignee'] = []
-
-                instance_row.update()
+                changes.update(instance['id'], instance_row)
             else:
 
-                if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
+                if not is_admin:
                     continue
 
                 new_instance_row = {
@@ -228,10 +224,15 @@ class HardwareDetail(APIView):
                 if instance.get('assignee'):
                     new_instance_row['assignee'] = [instance.get('assignee')]
 
-                hardware_instance_row = HardwareInstance.table.add_row(new_instance_row)
+                changes.create(new_instance_row)
+                new_instances.append(instance)
 
-                if instance.get('assignee'):
-                    AssignmentLog.assign(instance['assignee'], hardware=hardware_instance_row.id)
+        new_ids = changes.apply(HardwareInstance.table)
+
+        for instance, instance_id in zip(new_instances, new_ids):
+            if instance.get('assignee'):
+                assignment_logs.append(AssignmentLog.new_row(instance['assignee'], hardware=instance_id))
+        AssignmentLog.assign_many(assignment_logs)
 
         return Response({'message': 'successful'})
 
@@ -239,7 +240,21 @@ class HardwareDetail(APIView):
         if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
             return Response({'message': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        row = Hardware.table.get_row(pk)
-        row.delete()
+        Hardware.delete(pk, cascade=request.query_params.get('cascade', '').lower() == 'true')
 
-        return Response({'message': 'Successful'}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response({'message': 'Successful'}, status=status.HTTP_204_NO_CONTENT)
+
+class AsyncHardwareDetail(AsyncAPIView, HardwareDetail):
+    async def get(self, request, pk, format=None):
+        try:
+            await async_baserow.resolve(HardwareInstance.table)
+            row, instances = await asyncio.gather(
+                async_baserow.get_row(Hardware.table, pk),
+                async_baserow.get_rows(HardwareInstance.table, self.instance_fields.extend(HardwareInstance.table, linked_to(HardwareInstance.table, 'hardware', pk))),
+            )
+            return Response({'data': HardwareDetail.serialize(row, instances)})
+        except Exception as e:
+            logger.warning(f'Could not read hardware {pk}: {e}')
+            if unavailable_cause(e) is not None:
+                raise
+            raise Http404
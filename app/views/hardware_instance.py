@@ -1,147 +1,97 @@
-import csv
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
-from ..baserow_client import get_baserow_operator
+from ..baserow_client import mirror
+from ..baserow_client.query import InvalidQuery, ListQuery
+from ..baserow_client.pagination import iter_rows
+from ..baserow_client.projection import Projection
+from ..export import export_response
 from ..baserow_client.hardware import HardwareInstance
-from baserowapi import Filter
-import json
-from django.http import Http404, HttpResponse
+from django.http import Http404
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from .base import AsyncAPIView
 
 class HardwareInstanceList(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # Columns the instance tables show, other Baserow columns are not fetched
+    fields = Projection(include=(
+        'name', 'serial_number', 'procurement_date', 'hardware', 'status', 'assignee',
+        'hardware_name', 'hardware_brand', 'hardware_type', 'hardware_model_number', 'status_formula', 'assignee_formula',
+    ))
 
     def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = query.execute(HardwareInstance.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(HardwareInstanceList.serialize(result), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def serialize(result) -> dict:
         hardware = []
-        search: dict = json.loads(request.query_params['search'])
-        kwargs = {}
-
-        # Pagination
-
-        page = search.get('page', 0)
-        size = search.get('rows', 5)
-
-        # Sorting
-        sort_order = search.get('sortOrder', 1)
-        sort_direction = '+' if sort_order == 1 else '-'
-        sort_field = search.get('sortField')
-
-        if sort_field:
-            kwargs['order_by'] = [f'{sort_direction}{sort_field}']
-
-        # Filtering
-        filters = []
-        for key in search["filters"]:
-            for constraint in search["filters"][key]['constraints']:
-                if constraint['value'] is None:
-                    continue
-                filters.append(
-                    Filter(
-                        key,
-                        constraint['value'],
-                        get_baserow_operator(constraint['matchMode']))
-                    )
-        if len(filters) > 0:
-            kwargs['filters'] = filters
-        
-        kwargs['page_size'] = 10000
-        rows = HardwareInstance.table.get_rows(**kwargs)
-
-        row_counter = 0
-        for row in rows:
-            row_counter += 1
-            if row_counter - 1 < page * size or row_counter - 1 >= (page + 1) * size:
-                continue
+        for row in result.rows:
             data = row.content
-            data['hardware'] = row.values['hardware'].id
-            data['status'] = row.values['status'].id
+            data['hardware'] = row.link('hardware')
+            data['status'] = row.link('status')
             data['id'] = row.id
             hardware.append(data)
-        return Response({'data': hardware, 'totalRecords': row_counter}, status=status.HTTP_200_OK)
-
+        return {'data': hardware, 'totalRecords': result.count}
+
+
+EXPORT_COLUMNS = [
+    ("ID", 'id'),
+    ("Name", 'hardware_name'),
+    ("Brand", 'hardware_brand'),
+    ("Type", 'hardware_type'),
+    ("Model Number", 'hardware_model_number'),
+    ("Serial Number", 'serial_number'),
+    ("Procurement Date", 'procurement_date'),
+    ("Status", 'status_formula'),
+    ("Assignee", 'assignee_formula'),
+]
+EXPORT_FIELDS = Projection(include=tuple(field for _, field in EXPORT_COLUMNS))
+
+class AsyncHardwareInstanceList(AsyncAPIView, HardwareInstanceList):
+    async def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = await query.aexecute(HardwareInstance.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(HardwareInstanceList.serialize(result), status=status.HTTP_200_OK)
 
 class HardwareCSV(APIView):
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        response = HardwareInstanceList.as_view()(request._request)
-
-        hardware = response.data['data']
+        # Export every instance matching the search, not just the page on screen
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            rows = iter_rows(HardwareInstance.table, EXPORT_FIELDS.extend(HardwareInstance.table, query.compile(HardwareInstance.table)))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-        response = HttpResponse(
-            content_type="text/csv",
-            headers={"Content-Disposition": 'attachment; filename="hardware.csv"'},
-        )
-
-        writer = csv.writer(response)
-        writer.writerow([
-            "ID",
-            "Name", 
-            "Brand", 
-            "Type", 
-            "Model Number", 
-            "Serial Number",
-            "Procurement Date",
-            "Status",
-            "Assignee",
-        ])
-
-        for row in hardware:
-            writer.writerow([
-                row['id'],
-                row['hardware_name'],
-                row['hardware_brand'],
-                row['hardware_type'],
-                row['hardware_model_number'],
-                row['serial_number'],
-                row['procurement_date'],
-                row['status_formula'],
-                row['assignee_formula'],
-            ])
-
-        return response
+        return export_response(request, EXPORT_COLUMNS, rows, 'csv', 'hardware')
 
 class HardwareJSON(APIView):
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        response = HardwareInstanceList.as_view()(request._request)
-
-        hardware = response.data['data']
-        total = response.data['totalRecords']
-
-        response = HttpResponse(
-            content_type="text/csv",
-            headers={"Content-Disposition": 'attachment; filename="hardware.csv"'},
-        )
-        
-
-        headers = [
-            "ID",
-            "Name", 
-            "Brand", 
-            "Type", 
-            "Model Number", 
-            "Serial Number",
-            "Procurement Date",
-            "Status",
-            "Assignee",
-        ]
-        fields = [
-            'id',
-            'hardware_name',
-            'hardware_brand',
-            'hardware_type',
-            'hardware_model_number',
-            'serial_number',
-            'procurement_date',
-            'status_formula',
-            'assignee_formula',
-        ]
-
-        for row in hardware:
-            row = {header: row[field] for header, field in zip(headers, fields)}
-
-        return Response({'data': hardware, 'totalRecords': total}, status=status.HTTP_200_OK)
+        # `mode=json` streams a JSON array, `mode=ndjson` one record per line
+        mode = request.query_params.get('mode', 'json')
+        if mode not in ['json', 'ndjson']:
+            return Response({'message': 'Invalid data', 'errors': {'mode': ['Must be json or ndjson.']}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            rows = iter_rows(HardwareInstance.table, EXPORT_FIELDS.extend(HardwareInstance.table, query.compile(HardwareInstance.table)))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        return export_response(request, EXPORT_COLUMNS, rows, mode, 'hardware')
@@ -0,0 +1,15 @@
+import hmac
+from django.http import Http404, HttpResponse
+from inventory import settings
+from ..metrics import registry
+
+def metrics(request):
+    """
+    Prometheus text exposition of the metrics of every worker.
+    """
+    if not settings.METRICS['ENABLED']:
+        raise Http404
+    token = settings.METRICS['TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,27 @@
+from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from ..baserow_client.resilience import unavailable_cause
+from ..baserow_client.status import Status
+from ..baserow_client.user import UserType, UserTypeEnum
+
+class ReferenceDataRefresh(APIView):
+    """
+    Reload this worker's STATUS and USER_TYPES rows after they were edited in Baserow.
+    """
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, format=None):
+        if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
+            return Response({'message': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            Status.reference.invalidate()
+            UserType.reference.invalidate()
+        except Exception as e:
+            if unavailable_cause(e) is not None:
+                raise
+            return Response({'message': 'Could not reload the reference data from Baserow'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(status=status.HTTP_204_NO_CONTENT)
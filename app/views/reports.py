@@ -1,96 +1,157 @@
 from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework.response import Response
 import json
-from app.views.hardware_instance import HardwareInstanceList
-from app.views.software_instance import SoftwareInstanceList
+from asgiref.sync import sync_to_async
+from inventory import settings
+from app.baserow_client.materialized import MaterializedReport, engine
+from app.baserow_client.query import InvalidQuery, ListQuery
+from app.views.base import AsyncAPIView
+from app.views.hardware_instance import AsyncHardwareInstanceList, HardwareInstanceList
+from app.views.software_instance import AsyncSoftwareInstanceList, SoftwareInstanceList
 import datetime
 
-class SoftwareNearExpiry(APIView):
-    def get(self, request):
-        search = json.loads(request._request.GET.copy().get('search', '{}'))
-        search['filters'] = search['filters'] if 'filters' in search else {}
-
-        seven_days_from_now = datetime.datetime.now() + datetime.timedelta(days=7)
-
-        search['filters']['software_expiration_date'] = {
-            'constraints': [
-                {
-                    'value': seven_days_from_now.strftime('%Y-%m-%d'),
-                    'matchMode': 'date_before_or_equal'
-                }
-            ]
-        }
-
-        get_params = request._request.GET.copy()
-        get_params['search'] = json.dumps(search)
-        request._request.GET = get_params
-
-        response = SoftwareInstanceList.as_view()(request._request)
+class Report(APIView):
+    """
+    Serves `list_view` with the filters `filters` adds to the request's search.
 
-        return response
+    With MATERIALIZED_REPORTS enabled, pages come from the report's result
+    set in memory instead, whenever it holds the columns the search uses.
+    """
+    list_view = None
+    # Name of the report in URLs and the dashboard
+    name = None
+    # BASEROW_TABLE_MAP name of the table `list_view` lists
+    table_name = None
 
-class HardwareNeedingMaintenance(APIView):
     def get(self, request):
+        if settings.MATERIALIZED_REPORTS['ENABLED']:
+            try:
+                result = self.materialized().page(ListQuery.parse(request.query_params.get('search')))
+            except InvalidQuery as e:
+                return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if result is not None:
+                return Response(self.list_view.serialize(result), status=status.HTTP_200_OK)
+        self.filter(request)
+        return self.list_view.as_view()(request._request)
+
+    @classmethod
+    def materialized(cls) -> MaterializedReport:
+        return engine.get(cls.name, cls.table_name, cls.filters, cls.list_view.fields)
+
+    def filter(self, request) -> None:
         search = json.loads(request._request.GET.copy().get('search', '{}'))
         search['filters'] = search['filters'] if 'filters' in search else {}
-
-
-        search['filters']['status_formula'] = {
-            'constraints': [
-                {
-                    'value': 'For Repair',
-                    'matchMode': 'equals'
-                }
-            ]
-        }
+        search['filters'].update(self.filters())
 
         get_params = request._request.GET.copy()
         get_params['search'] = json.dumps(search)
         request._request.GET = get_params
 
-        response = HardwareInstanceList.as_view()(request._request)
-
-        return response
-
-class HardwareNotAssigned(APIView):
-    def get(self, request):
-        search = json.loads(request._request.GET.copy().get('search', '{}'))
-        search['filters'] = search['filters'] if 'filters' in search else {}
+    @staticmethod
+    def filters() -> dict:
+        """
+        The search filters of the report, by field.
+        """
+        raise NotImplementedError
+
+class AsyncReport(AsyncAPIView):
+    async def get(self, request):
+        if settings.MATERIALIZED_REPORTS['ENABLED']:
+            try:
+                query = ListQuery.parse(request.query_params.get('search'))
+                # Computing the result set reads from Baserow or the mirror
+                result = await sync_to_async(self.materialized().page)(query)
+            except InvalidQuery as e:
+                return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if result is not None:
+                return Response(self.list_view.serialize(result), status=status.HTTP_200_OK)
+        # Filters may load reference data from Baserow
+        await sync_to_async(self.filter)(request)
+        return await self.list_view.as_view()(request._request)
+
+class SoftwareNearExpiry(Report):
+    list_view = SoftwareInstanceList
+    name = 'software-near-expiry'
+    table_name = 'SOFTWARE_INSTANCE'
+
+    @staticmethod
+    def filters() -> dict:
+        seven_days_from_now = datetime.datetime.now() + datetime.timedelta(days=7)
 
-        search['filters']['status_formula'] = {
-            'constraints': [
-                {
-                    'value': 'Unassigned',
-                    'matchMode': 'equals'
-                }
-            ]
+        return {
+            'software_expiration_date': {
+                'constraints': [
+                    {
+                        'value': seven_days_from_now.strftime('%Y-%m-%d'),
+                        'matchMode': 'date_before_or_equal'
+                    }
+                ]
+            }
         }
 
-        get_params = request._request.GET.copy()
-        get_params['search'] = json.dumps(search)
-        request._request.GET = get_params
-
-        response = HardwareInstanceList.as_view()(request._request)
-
-        return response
+class HardwareNeedingMaintenance(Report):
+    list_view = HardwareInstanceList
+    name = 'hardware-needing-maintenance'
+    table_name = 'HARDWARE_INSTANCE'
+
+    @staticmethod
+    def filters() -> dict:
+        return {
+            'status_formula': {
+                'constraints': [
+                    {
+                        'value': 'For Repair',
+                        'matchMode': 'equals'
+                    }
+                ]
+            }
+        }
 
-class SoftwareNotAssigned(APIView):
-    def get(self, request):
-        search = json.loads(request._request.GET.copy().get('search', '{}'))
-        search['filters'] = search['filters'] if 'filters' in search else {}
+class HardwareNotAssigned(Report):
+    list_view = HardwareInstanceList
+    name = 'hardware-not-assigned'
+    table_name = 'HARDWARE_INSTANCE'
+
+    @staticmethod
+    def filters() -> dict:
+        return {
+            'status_formula': {
+                'constraints': [
+                    {
+                        'value': 'Unassigned',
+                        'matchMode': 'equals'
+                    }
+                ]
+            }
+        }
 
-        search['filters']['status_formula'] = {
-            'constraints': [
-                {
-                    'value': 'Unassigned',
-                    'matchMode': 'equals'
-                }
-            ]
+class SoftwareNotAssigned(Report):
+    list_view = SoftwareInstanceList
+    name = 'software-not-assigned'
+    table_name = 'SOFTWARE_INSTANCE'
+
+    @staticmethod
+    def filters() -> dict:
+        return {
+            'status_formula': {
+                'constraints': [
+                    {
+                        'value': 'Unassigned',
+                        'matchMode': 'equals'
+                    }
+                ]
+            }
         }
 
-        get_params = request._request.GET.copy()
-        get_params['search'] = json.dumps(search)
-        request._request.GET = get_params
+class AsyncSoftwareNearExpiry(AsyncReport, SoftwareNearExpiry):
+    list_view = AsyncSoftwareInstanceList
+
+class AsyncHardwareNeedingMaintenance(AsyncReport, HardwareNeedingMaintenance):
+    list_view = AsyncHardwareInstanceList
 
-        response = SoftwareInstanceList.as_view()(request._request)
+class AsyncHardwareNotAssigned(AsyncReport, HardwareNotAssigned):
+    list_view = AsyncHardwareInstanceList
 
-        return response
\ No newline at end of file
+class AsyncSoftwareNotAssigned(AsyncReport, SoftwareNotAssigned):
+    list_view = AsyncSoftwareInstanceList
@@ -2,65 +2,48 @@ from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
 
+import asyncio
+import logging
 from app.serializers.software import SoftwareInstanceSerializer, SoftwareSerializer, SoftwareSubscriptionSerializer
-from ..baserow_client import get_baserow_operator
+from ..baserow_client import async_baserow, mirror
+from ..baserow_client.resilience import unavailable_cause
+from ..baserow_client.query import InvalidQuery, ListQuery, linked_to
 from ..baserow_client.software import Software, SoftwareInstance, SoftwareSubscription
 from ..baserow_client.assignment_log import AssignmentLog
+from ..baserow_client.batch import create_rows, update_rows
+from ..baserow_client.changeset import ChangeSet, link_ids
+from ..baserow_client.fanout import fan_out
+from ..baserow_client.pagination import get_row, get_rows, iter_rows
+from ..baserow_client.projection import Projection
 from ..baserow_client.user import UserTypeEnum
-from baserowapi import Filter
-import json
+from .base import AsyncAPIView
+from .software_instance import SoftwareInstanceList
 from django.http import Http404
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+logger = logging.getLogger(__name__)
+
 class SoftwareList(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = query.execute(Software.table, use_mirror=mirror.serves(self))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(SoftwareList.serialize(result), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def serialize(result) -> dict:
         software = []
-        search: dict = json.loads(request.query_params['search'])
-        kwargs = {}
-
-        # Pagination
-
-        page = search.get('page', 0)
-        size = search.get('rows', 5)
-
-        # Sorting
-        sort_order = search.get('sortOrder', 1)
-        sort_direction = '+' if sort_order == 1 else '-'
-        sort_field = search.get('sortField')
-
-        if sort_field:
-            kwargs['order_by'] = [f'{sort_direction}{sort_field}']
-
-        # Filtering
-        filters = []
-        for key in search["filters"]:
-            for constraint in search["filters"][key]['constraints']:
-                if constraint['value'] is None:
-                    continue
-                filters.append(
-                    Filter(
-                        key,
-                        constraint['value'],
-                        get_baserow_operator(constraint['matchMode']))
-                    )
-        if len(filters) > 0:
-            kwargs['filters'] = filters
-        
-        rows = Software.table.get_rows(**kwargs)
-
-        row_counter = 0
-        for row in rows:
-            row_counter += 1
-            if row_counter - 1 < page * size or row_counter - 1 >= (page + 1) * size:
-                continue
+        for row in result.rows:
             data = row.content
             data['id'] = row.id
             software.append(data)
-        return Response({'data': software, 'totalRecords': row_counter}, status=status.HTTP_200_OK)
+        return {'data': software, 'totalRecords': result.count}
 
     def post(self, request, format=None):
         if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
@@ -98,6 +81,7 @@ class SoftwareList(APIView):
 
         # Instances
         instances = request.data.get('one2m').get('instances').get('data')
+        new_instance_rows = []
         for instance in instances:
             new_instance_row = {
                 'serial_key': instance.get('serial_key'),
@@ -106,74 +90,100 @@ class SoftwareList(APIView):
             }
             if instance.get("assignee"):
                 new_instance_row['assignee'] = [instance.get('assignee')]
-                # Add assignment log
-            software_instance_row = SoftwareInstance.table.add_row(new_instance_row)
-            if instance.get("assignee"):
-                AssignmentLog.assign({
-                    'user': [instance.get('assignee')],
-                    'software': [software_instance_row.id],
-                })
+            new_instance_rows.append(new_instance_row)
 
         # Subscriptions
         subscriptions = request.data.get('one2m').get('subscriptions').get('data')
-        for subscription in subscriptions:
-            new_subscription_row = {
+        new_subscription_rows = [
+            {
                 'start': subscription.get('start'),
                 'end': subscription.get('end'),
                 'software': [new_id],
                 'number_of_licenses': int(subscription.get('number_of_licenses')),
             }
-            SoftwareSubscription.table.add_row(new_subscription_row)
+            for subscription in subscriptions
+        ]
+
+        instance_ids, _ = fan_out.run(
+            lambda: create_rows(SoftwareInstance.table, new_instance_rows),
+            lambda: create_rows(SoftwareSubscription.table, new_subscription_rows),
+        )
+
+        # Add assignment logs
+        AssignmentLog.assign_many([
+            AssignmentLog.new_row(instance['assignee'], software=instance_id)
+            for instance, instance_id in zip(instances, instance_ids)
+            if instance.get('assignee')
+        ])
         return Response({'data': new_id}, status=status.HTTP_201_CREATED)
 
+class AsyncSoftwareList(AsyncAPIView, SoftwareList):
+    async def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = await query.aexecute(Software.table, use_mirror=mirror.serves(self))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(SoftwareList.serialize(result), status=status.HTTP_200_OK)
+
 class SoftwareDetail(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    instance_fields = SoftwareInstanceList.fields
+    # Columns an update compares against the submitted instances and subscriptions
+    changed_instance_fields = Projection(include=('serial_key', 'status', 'assignee'))
+    changed_subscription_fields = Projection(include=('start', 'end', 'number_of_licenses'))
 
     def get(self, request, pk, format=None):
         try:
-            row = Software.table.get_row(pk)
-            data = row.content
-            data['id'] = row.id
-
-            # Instances
-
-            rows = SoftwareInstance.table.get_rows(filters=[Filter('software', pk, 'link_row_has')])
-            instances = []
-            for row in rows:
-                instance = row.content
-                instance['id'] = row.id
-                instance['status'] = row.values['status'].id
-                instance['software'] = row.values['software'].id
-                instance['assignee'] = row.values['assignee'].id
-                instances.append(instance)
-
-            # Subscriptions
-
-            rows = SoftwareSubscription.table.get_rows(filters=[Filter('software', pk, 'link_row_has')])
-            subscriptions = []
-            for row in rows:
-                subscription = row.content
-                subscription['id'] = row.id
-                subscription['software'] = row.values['software'].id
-                subscription['number_of_licenses'] = int(subscription['number_of_licenses'])
-                subscriptions.append(subscription)
-
-
-            data['one2m'] = {
-                'instances': {
-                    'data': instances
-                },
-                'subscriptions': {
-                    'data': subscriptions
-                }
-            }
-
-            return Response({'data': data})
+            row, instances, subscriptions = fan_out.run(
+                lambda: get_row(Software.table, pk),
+                lambda: get_rows(SoftwareInstance.table, self.instance_fields.extend(SoftwareInstance.table, linked_to(SoftwareInstance.table, 'software', pk))),
+                lambda: get_rows(SoftwareSubscription.table, linked_to(SoftwareSubscription.table, 'software', pk)),
+            )
+            return Response({'data': SoftwareDetail.serialize(row, instances, subscriptions)})
         except Exception as e:
-            print(e)
+            logger.warning(f'Could not read software {pk}: {e}')
+            if unavailable_cause(e) is not None:
+                raise
             raise Http404
 
+    @staticmethod
+    def serialize(row, instance_rows, subscription_rows) -> dict:
+        data = row.content
+        data['id'] = row.id
+
+        # Instances
+
+        instances = []
+        for row in instance_rows:
+            instance = row.content
+            instance['id'] = row.id
+            instance['status'] = row.link('status')
+            instance['software'] = row.link('software')
+            instance['assignee'] = row.link('assignee')
+            instances.append(instance)
+
+        # Subscriptions
+
+        subscriptions = []
+        for row in subscription_rows:
+            subscription = row.content
+            subscription['id'] = row.id
+            subscription['software'] = row.link('software')
+            subscription['number_of_licenses'] = int(subscription['number_of_licenses'])
+            subscriptions.append(subscription)
+
+        data['one2m'] = {
+            'instances': {
+                'data': instances
+            },
+            'subscriptions': {
+                'data': subscriptions
+            }
+        }
+        return data
+
     def put(self, request, pk, format=None):
         if request.user.role.role == UserTypeEnum.VIEWER.value:
             return Response({'message': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -197,63 +207,50 @@ class SoftwareDetail(APIView):
         if errors:
             return Response({"message": "Invalid data", "errors": errors}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-        row = Software.table.get_row(pk)
-        instances_to_delete = request.data.get('one2m').get('instances').get('delete')
+        is_admin = request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]
+        instances_to_delete = request.data.get('one2m').get('instances').get('delete') or []
 
-        if request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
-            row['name'] = request.data.get('name')
-            row['brand'] = request.data.get('brand')
-            row['version_number'] = request.data.get('version_number')
-            row['description'] = request.data.get('description')
-            row['expiration_date'] = request.data.get('expiration_date')
-            row.update()
-
-            for instance in instances_to_delete:
-                SoftwareInstance.table.get_row(instance).delete()
+        if is_admin:
+            update_rows(Software.table, [{
+                'id': pk,
+                'name': request.data.get('name'),
+                'brand': request.data.get('brand'),
+                'version_number': request.data.get('version_number'),
+                'description': request.data.get('description'),
+                'expiration_date': request.data.get('expiration_date'),
+            }])
 
         # Instances
 
+        # Read every current instance once and diff the submitted ones against them
+        query = self.changed_instance_fields.extend(SoftwareInstance.table, linked_to(SoftwareInstance.table, 'software', pk))
+        changes = ChangeSet(iter_rows(SoftwareInstance.table, query))
+        assignment_logs = []
+
+        if is_admin:
+            for instance in instances_to_delete:
+                changes.delete(instance)
+
+        new_instances = []
         instances = request.data.get('one2m').get('instances').get('data')
         for instance in instances:
             if 'id' in instance:
-                if instance['id'] in instances_to_delete:
+                if instance['id'] in instances_to_delete or instance['id'] not in changes.current:
                     continue
 
-                instance_row = SoftwareInstance.table.get_row(instance['id'])
-
-                if request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
+                instance_row = {}
+                if is_admin:
                     instance_row['serial_key'] = instance['serial_key']
                     instance_row['status'] = [instance['status']] if instance.get('status') else []
 
-                current_assignee = instance_row['assignee']
-                assignment_type = None
-
-                # Check if the new assignee is set and the current assignee is not set
-                # Assign
-                if instance.get('assignee') and len(instance_row['assignee']) == 0:
-                    AssignmentLog.assign(instance['assignee'], software=instance['id'])
+                current_assignee = next(iter(link_ids(changes.current[instance['id']].get('assignee'))), None)
+                assignment_logs += AssignmentLog.reassign_rows(current_assignee, instance.get('assignee'), software=instance['id'])
+                instance_row['assignee'] = [instance['assignee']] if instance.get('assignee') else []
 
-                # Check if the new assignee and current assignee are set
-                # And if they are not equal
-                # Assign and unassign
-                if instance.get('assignee') and len(instance_row['assignee']) > 0 and instance.get('assignee') != instance_row.values['assignee'].id:
-                    AssignmentLog.assign(instance['assignee'], software=instance['id'])
-                    AssignmentLog.assign(instance_row['assignee'][0], software=instance['id'], assignment_type=2)
-
-                # Check if the new assignee is not set and the current assignee
-                # Unassign
-                if not instance.get('assignee') and len(instance_row['assignee']) > 0:
-                    AssignmentLog.assign(instance_row['assignee'][0], software=instance['id'], assignment_type=2)
-
-                if instance.get('assignee'):
-                    instance_row['assignee'] = [instance['assignee']]
-                else:
-                    instance_row['assignee'] = []
-
-                instance_row.update()
+                changes.update(instance['id'], instance_row)
             else:
 
-                if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
+                if not is_admin:
                     continue
 
                 new_instance_row = {
@@ -267,36 +264,41 @@ class SoftwareDetail(APIView):
                 if instance.get('assignee'):
                     new_instance_row['assignee'] = [instance.get('assignee')]
 
-                software_instance_row = SoftwareInstance.table.add_row(new_instance_row)
-
-                if instance.get('assignee'):
-                    AssignmentLog.assign(instance['assignee'], software=software_instance_row.id)
-
-        # Subscriptions
+                changes.create(new_instance_row)
+                new_instances.append(instance)
 
-        subscriptions_to_delete = request.data.get('one2m').get('subscriptions').get('delete')
-        if request.user.role.role in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
-            for subscription in subscriptions_to_delete:
-                SoftwareSubscription.table.get_row(subscription).delete()
+        new_ids = changes.apply(SoftwareInstance.table)
 
-        subscriptions = request.data.get('one2m').get('subscriptions').get('data')
-        for subscription in subscriptions:
-            if 'id' in subscription:
-                if subscription['id'] in subscriptions_to_delete or request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
-                    continue
+        for instance, instance_id in zip(new_instances, new_ids):
+            if instance.get('assignee'):
+                assignment_logs.append(AssignmentLog.new_row(instance['assignee'], software=instance_id))
+        AssignmentLog.assign_many(assignment_logs)
 
-                subscription_row = SoftwareSubscription.table.get_row(subscription['id'])
+        # Subscriptions
 
-                subscription_row['start'] = subscription['start']
-                subscription_row['end'] = subscription['end']
-                subscription_row['number_of_licenses'] = int(subscription['number_of_licenses'])
-                subscription_row.update()
+        if is_admin:
+            subscriptions_to_delete = request.data.get('one2m').get('subscriptions').get('delete') or []
+            query = self.changed_subscription_fields.extend(SoftwareSubscription.table, linked_to(SoftwareSubscription.table, 'software', pk))
+            changes = ChangeSet(iter_rows(SoftwareSubscription.table, query))
 
-            else:
-                if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
-                    continue
+            for subscription in subscriptions_to_delete:
+                changes.delete(subscription)
+
+            subscriptions = request.data.get('one2m').get('subscriptions').get('data')
+            for subscription in subscriptions:
+                if 'id' in subscription:
+                    if subscription['id'] in subscriptions_to_delete:
+                        continue
+
+                    changes.update(subscription['id'], {
+                        'start': subscription['start'],
+                        'end': subscription['end'],
+                        'number_of_licenses': int(subscription['number_of_licenses']),
+                    })
+                else:
+                    changes.create(SoftwareSubscription.new_row(pk, subscription.get('start'), subscription.get('end'), int(subscription.get('number_of_licenses'))))
 
-                SoftwareSubscription.create(pk, subscription.get('start'), subscription.get('end'), int(subscription.get('number_of_licenses')))
+            changes.apply(SoftwareSubscription.table)
 
         return Response({'message': 'successful'})
 
@@ -304,7 +306,22 @@ class SoftwareDetail(APIView):
         if request.user.role.role not in [UserTypeEnum.ADMIN.value, UserTypeEnum.SUPER_ADMIN.value, UserTypeEnum.ROOT_ADMIN.value]:
             return Response({'message': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        row = Software.table.get_row(pk)
-        row.delete()
+        Software.delete(pk, cascade=request.query_params.get('cascade', '').lower() == 'true')
+
+        return Response({'message': 'Successful'}, status=status.HTTP_204_NO_CONTENT)
 
-        return Response({'message': 'Successful'}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+class AsyncSoftwareDetail(AsyncAPIView, SoftwareDetail):
+    async def get(self, request, pk, format=None):
+        try:
+            await asyncio.gather(async_baserow.resolve(SoftwareInstance.table), async_baserow.resolve(SoftwareSubscription.table))
+            row, instances, subscriptions = await asyncio.gather(
+                async_baserow.get_row(Software.table, pk),
+                async_baserow.get_rows(SoftwareInstance.table, self.instance_fields.extend(SoftwareInstance.table, linked_to(SoftwareInstance.table, 'software', pk))),
+                async_baserow.get_rows(SoftwareSubscription.table, linked_to(SoftwareSubscription.table, 'software', pk)),
+            )
+            return Response({'data': SoftwareDetail.serialize(row, instances, subscriptions)})
+        except Exception as e:
+            logger.warning(f'Could not read software {pk}: {e}')
+            if unavailable_cause(e) is not None:
+                raise
+            raise Http404
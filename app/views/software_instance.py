@@ -1,138 +1,94 @@
-import csv
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
-from ..baserow_client import get_baserow_operator
+from ..baserow_client import mirror
+from ..baserow_client.query import InvalidQuery, ListQuery
+from ..baserow_client.pagination import iter_rows
+from ..baserow_client.projection import Projection
+from ..export import export_response
 from ..baserow_client.software import Software, SoftwareInstance
-from baserowapi import Filter
-import json
-from django.http import Http404, HttpResponse
+from django.http import Http404
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from .base import AsyncAPIView
 
 class SoftwareInstanceList(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # Columns the instance tables show, other Baserow columns are not fetched
+    fields = Projection(include=(
+        'name', 'serial_key', 'software', 'status', 'assignee',
+        'software_name', 'software_brand', 'software_version_number', 'software_expiration_date', 'status_formula', 'assignee_formula',
+    ))
 
     def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = query.execute(SoftwareInstance.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(SoftwareInstanceList.serialize(result), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def serialize(result) -> dict:
         software = []
-        search: dict = json.loads(request.query_params.get('search', '{}'))
-        kwargs = {}
-
-        # Pagination
-
-        page = search.get('page', 0)
-        size = search.get('rows', 5)
-
-        # Sorting
-        sort_order = search.get('sortOrder', 1)
-        sort_direction = '+' if sort_order == 1 else '-'
-        sort_field = search.get('sortField')
-
-        if sort_field:
-            kwargs['order_by'] = [f'{sort_direction}{sort_field}']
-
-        # Filtering
-        filters = []
-        for key in search.get('filters', {}):
-            for constraint in search["filters"][key]['constraints']:
-                if constraint['value'] is None:
-                    continue
-                filters.append(
-                    Filter(
-                        key,
-                        constraint['value'],
-                        get_baserow_operator(constraint['matchMode']))
-                    )
-        if len(filters) > 0:
-            kwargs['filters'] = filters
-        
-        rows = SoftwareInstance.table.get_rows(**kwargs)
-
-        row_counter = 0
-        for row in rows:
-            row_counter += 1
-            if row_counter - 1 < page * size or row_counter - 1 >= (page + 1) * size:
-                continue
+        for row in result.rows:
             data = row.content
-            data['software'] = row.values['software'].id
-            data['status'] = row.values['status'].id
+            data['software'] = row.link('software')
+            data['status'] = row.link('status')
             data['id'] = row.id
             software.append(data)
-        return Response({'data': software, 'totalRecords': row_counter}, status=status.HTTP_200_OK)
+        return {'data': software, 'totalRecords': result.count}
+
+EXPORT_COLUMNS = [
+    ("ID", 'id'),
+    ("Name", 'software_name'),
+    ("Brand", 'software_brand'),
+    ("Version Number", 'software_version_number'),
+    ("Expiration Date", 'software_expiration_date'),
+    ("Serial Key", 'serial_key'),
+    ("Status", 'status_formula'),
+    ("Assignee", 'assignee_formula'),
+]
+EXPORT_FIELDS = Projection(include=tuple(field for _, field in EXPORT_COLUMNS))
+
+class AsyncSoftwareInstanceList(AsyncAPIView, SoftwareInstanceList):
+    async def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            result = await query.aexecute(SoftwareInstance.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(SoftwareInstanceList.serialize(result), status=status.HTTP_200_OK)
 
 class SoftwareCSV(APIView):
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        response = SoftwareInstanceList.as_view()(request._request)
-
-        software = response.data['data']
-
-        response = HttpResponse(
-            content_type="text/csv",
-            headers={"Content-Disposition": 'attachment; filename="software.csv"'},
-        )
+        # Export every instance matching the search, not just the page on screen
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            rows = iter_rows(SoftwareInstance.table, EXPORT_FIELDS.extend(SoftwareInstance.table, query.compile(SoftwareInstance.table)))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-        writer = csv.writer(response)
-        writer.writerow([
-            "ID",
-            "Name", 
-            "Brand", 
-            "Version Number", 
-            "Expiration Date",
-            "Serial Key",
-            "Status",
-            "Assignee",
-        ])
-
-        for row in software:
-            writer.writerow([
-                row['id'],
-                row['software_name'],
-                row['software_brand'],
-                row['software_version_number'],
-                row['software_expiration_date'],
-                row['serial_key'],
-                row['status_formula'],
-                row['assignee_formula'],
-            ])
-
-        return response
+        return export_response(request, EXPORT_COLUMNS, rows, 'csv', 'software')
 
 class SoftwareJSON(APIView):
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        response = SoftwareInstanceList.as_view()(request._request)
-
-        software = response.data['data']
-        total = response.data['totalRecords']
-
-        response = HttpResponse(
-            content_type="text/csv",
-            headers={"Content-Disposition": 'attachment; filename="software.csv"'},
-        )
-        
-
-        headers = [
-            "ID",
-            "Name", 
-            "Brand", 
-            "Version Number", 
-            "Serial Key",
-            "Status",
-            "Assignee",
-        ]
-        fields = [
-            "id",
-            "software_name",
-            "software_brand",
-            "software_version_number",
-            "serial_key",
-            "status_formula",
-            "assignee_formula",
-        ]
-
-        for row in software:
-            row = {header: row[field] for header, field in zip(headers, fields)}
-
-        return Response({'data': software, 'totalRecords': total}, status=status.HTTP_200_OK)
+        # `mode=json` streams a JSON array, `mode=ndjson` one record per line
+        mode = request.query_params.get('mode', 'json')
+        if mode not in ['json', 'ndjson']:
+            return Response({'message': 'Invalid data', 'errors': {'mode': ['Must be json or ndjson.']}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        try:
+            query = ListQuery.parse(request.query_params.get('search'))
+            rows = iter_rows(SoftwareInstance.table, EXPORT_FIELDS.extend(SoftwareInstance.table, query.compile(SoftwareInstance.table)))
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        return export_response(request, EXPORT_COLUMNS, rows, mode, 'software')
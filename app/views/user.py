@@ -3,64 +3,44 @@ from rest_framework import status
 from rest_framework.response import Response
 
 from app.serializers.user import UserSerializer
-from ..baserow_client import get_baserow_operator
+from ..baserow_client import mirror
+from ..baserow_client.resilience import unavailable_cause
+from ..baserow_client.pagination import get_row
+from ..baserow_client.projection import Projection
+from ..baserow_client.query import InvalidQuery, ListQuery
 from ..baserow_client.user import User, UserType, UserTypeEnum
-from baserowapi import Filter
 import json
 from django.http import Http404
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from app.views.hardware_instance import HardwareInstanceList
 from app.views.software_instance import SoftwareInstanceList
+from .base import AsyncAPIView
+
+# Login codes never leave the server
+USER_FIELDS = Projection(exclude=('auth_code', 'auth_expiry'))
 
 class UserList(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    fields = USER_FIELDS
     
     def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'), default_size=100)
+            result = query.execute(User.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(UserList.serialize(result), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def serialize(result) -> dict:
         users = []
-        search: dict = json.loads(request.query_params['search'])
-        kwargs = {}
-
-        # Pagination
-
-        page = search.get('page', 0)
-        size = search.get('rows', 100)
-
-        # Sorting
-        sort_order = search.get('sortOrder', 1)
-        sort_direction = '+' if sort_order == 1 else '-'
-        sort_field = search.get('sortField')
-
-        if sort_field:
-            kwargs['order_by'] = [f'{sort_direction}{sort_field}']
-
-        # Filtering
-        filters = []
-        for key in search.get("filters", {}):
-            for constraint in search["filters"][key]['constraints']:
-                if constraint['value'] is None:
-                    continue
-                filters.append(
-                    Filter(
-                        key,
-                        constraint['value'],
-                        get_baserow_operator(constraint['matchMode']))
-                    )
-        if len(filters) > 0:
-            kwargs['filters'] = filters
-        
-        rows = User.table.get_rows(**kwargs)
-
-        row_counter = 0
-        for row in rows:
-            row_counter += 1
-            if row_counter - 1 < page * size or row_counter - 1 >= (page + 1) * size:
-                continue
+        for row in result.rows:
             data = row.content
             data['id'] = row.id
             users.append(data)
-        return Response({'data': users, 'totalRecords': row_counter}, status=status.HTTP_200_OK)
+        return {'data': users, 'totalRecords': result.count}
 
     def post(self, request, format=None):
         user_serializer = UserSerializer(data=request.data)
@@ -77,21 +57,31 @@ class UserList(APIView):
 
         return Response({'data': added_row.id}, status=status.HTTP_201_CREATED)
 
+class AsyncUserList(AsyncAPIView, UserList):
+    async def get(self, request, format=None):
+        try:
+            query = ListQuery.parse(request.query_params.get('search'), default_size=100)
+            result = await query.aexecute(User.table, use_mirror=mirror.serves(self), projection=self.fields)
+        except InvalidQuery as e:
+            return Response({'message': 'Invalid search', 'errors': {'search': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(UserList.serialize(result), status=status.HTTP_200_OK)
+
 class UserDetail(APIView):
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    fields = USER_FIELDS
     
     def get(self, request, pk, format=None):
         try:
-            row = User.table.get_row(pk)
+            row = get_row(User.table, pk, self.fields)
         except Exception as e:
+            if unavailable_cause(e) is not None:
+                raise
             raise Http404
 
         data = row.content
         data['id'] = row.id
-        data['type'] = row.values['type'].id
-        del data['auth_code']
-        del data['auth_expiry']
+        data['type'] = row.link('type')
         return Response({'data': data})
 
     def put(self, request, pk, format=None):
@@ -2,7 +2,6 @@ from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.response import Response
 from ..baserow_client.user import UserType
-from baserowapi import Filter
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
@@ -11,13 +10,8 @@ class UserTypeList(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        entities = []
+        return Response({'data': UserTypeList.entities()}, status=status.HTTP_200_OK)
 
-        rows = UserType.table.get_rows(filters=[Filter('label', 'Root Admin', 'not_equal')])
-
-        row_counter = 0
-        for row in rows:
-            data = row.content
-            data['id'] = row.id
-            entities.append(data)
-        return Response({'data': entities}, status=status.HTTP_200_OK)
+    @staticmethod
+    def entities() -> list:
+        return [row for row in UserType.reference.rows if row.get('label') != 'Root Admin']
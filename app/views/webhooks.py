@@ -0,0 +1,99 @@
+import hashlib
+import hmac
+import json
+import logging
+from rest_framework.views import APIView
+from rest_framework import status
+from rest_framework.response import Response
+from inventory import settings
+from inventory.settings import BASEROW_TABLE_MAP
+from ..baserow_client import baserow, mirror
+from ..baserow_client.materialized import engine
+from ..baserow_client.status import Status
+from ..baserow_client.user import UserType
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_TABLES = {
+    'STATUS': Status.reference,
+    'USER_TYPES': UserType.reference,
+}
+
+def is_signed(request) -> bool:
+    """
+    Check the request against BASEROW_WEBHOOK_SECRET.
+
+    Accepts an `X-Baserow-Signature: sha256=<hex HMAC of the body>` header, or
+    the secret itself in `X-Baserow-Secret` for Baserow webhooks, which can
+    only send fixed headers.
+    """
+    secret = settings.BASEROW_WEBHOOK_SECRET
+    if not secret:
+        return False
+    signature = request.headers.get('X-Baserow-Signature')
+    if signature is not None:
+        expected = hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.removeprefix('sha256='), expected)
+    return hmac.compare_digest(request.headers.get('X-Baserow-Secret', ''), secret)
+
+class BaserowWebhook(APIView):
+    """
+    Applies Baserow row events to the row cache, the reference tables and the mirror.
+
+    The event reaches a single worker. The row cache and the mirror are shared
+    by all workers, which is why the app refuses to start with the webhook
+    and the per-process locmem cache. The reference tables and materialized
+    reports of the other workers catch up on their next refresh.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, format=None):
+        if not is_signed(request):
+            return Response({'message': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            event = json.loads(request.body)
+            event_type = event['event_type']
+            table_id = int(event['table_id'])
+        except (ValueError, TypeError, KeyError) as e:
+            return Response({'message': 'Invalid data', 'errors': {'event': [str(e)]}}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        if event_type in ('rows.created', 'rows.updated'):
+            rows = event.get('items', [])
+            row_ids = [row['id'] for row in rows]
+        elif event_type == 'rows.deleted':
+            rows = []
+            row_ids = event.get('row_ids', [])
+        else:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if baserow.cache is not None:
+            baserow.cache.invalidate(table_id, row_ids)
+
+        for name, reference in REFERENCE_TABLES.items():
+            if BASEROW_TABLE_MAP.get(name) == table_id:
+                try:
+                    reference.invalidate()
+                except Exception as e:
+                    # The rows loaded before are kept until the next refresh
+                    logger.warning(f'Could not reload {name} reference data: {e}')
+
+        # Rows sent with field IDs instead of names can not be applied, they are read from Baserow again
+        by_field_id = any(key.startswith('field_') for row in rows for key in row)
+
+        if settings.BASEROW_MIRROR['ENABLED']:
+            if by_field_id:
+                mirror.forget(table_id)
+            elif rows:
+                mirror.store_rows(table_id, rows)
+            else:
+                mirror.delete_rows(table_id, row_ids)
+
+        if settings.MATERIALIZED_REPORTS['ENABLED']:
+            if by_field_id:
+                engine.invalidate(table_id)
+            else:
+                engine.apply_rows(table_id, rows, [] if rows else row_ids)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
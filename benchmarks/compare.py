@@ -0,0 +1,42 @@
+import argparse
+import json
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'upstream_calls_per_request', 'peak_rss_mb']
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(result['scenario'], result['rows']): result for result in report['results']}
+
+def change(before: float, after: float) -> str:
+    if before == 0:
+        return '' if after == 0 else 'new'
+    return f'{(after - before) / before * 100:+.1f}%'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.compare',
+        description='Compare two benchmark results files scenario by scenario.',
+    )
+    parser.add_argument('before')
+    parser.add_argument('after')
+    options = parser.parse_args(argv)
+
+    before_report, before = load(options.before)
+    after_report, after = load(options.after)
+    print(f"{before_report['commit'][:10] or options.before} -> {after_report['commit'][:10] or options.after}")
+    if (before_report['latency_ms'], before_report['cache']) != (after_report['latency_ms'], after_report['cache']):
+        print('Warning: the runs used different latency or cache settings')
+
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[1], key[0])):
+        scenario, rows = key
+        print(f'{scenario} rows={rows}')
+        if before[key].get('cache') != after[key].get('cache'):
+            print(f"  Warning: row cache {before[key].get('cache')} before, {after[key].get('cache')} after")
+        for metric in METRICS:
+            print(f'  {metric:<28} {before[key][metric]:>12} {after[key][metric]:>12} {change(before[key][metric], after[key][metric]):>8}')
+    for scenario, rows in sorted(before.keys() ^ after.keys()):
+        print(f'{scenario} rows={rows} is only in {options.before if (scenario, rows) in before else options.after}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import sys
+import time
+from .run import percentile, setup
+
+SIZES = [1000, 10000]
+
+def payloads(rows: int) -> list:
+    """
+    (name, data) for the responses rendered, built by the views from a seeded memory Baserow.
+    """
+    from app.baserow_client.hardware import HardwareInstance
+    from app.baserow_client.query import ListQuery
+    from app.baserow_client.software import SoftwareInstance
+    from app.views.hardware_instance import HardwareInstanceList
+    from app.views.software_instance import SoftwareInstanceList
+
+    hardware = ListQuery(size=rows).execute(HardwareInstance.table, projection=HardwareInstanceList.fields)
+    software = ListQuery(size=rows).execute(SoftwareInstance.table, projection=SoftwareInstanceList.fields)
+    return [
+        ('hardware-instance-list', HardwareInstanceList.serialize(hardware)),
+        ('software-instance-list', SoftwareInstanceList.serialize(software)),
+        # What the fast renderer gets when a view hands it the rows themselves
+        ('hardware-instance-slim-rows', {'data': hardware.rows, 'totalRecords': hardware.count}),
+    ]
+
+def measure(renderer, data, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        renderer.render(data, 'application/json', {})
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.render',
+        description='Compare the time JSONRenderer and ORJSONRenderer take to render list responses.',
+    )
+    parser.add_argument('--rows', type=int, default=max(SIZES), help='Hardware and software instances to seed and render')
+    parser.add_argument('--iterations', type=int, default=20, help='Renders per renderer and payload')
+    options = parser.parse_args(argv)
+
+    setup(options.rows, 0, False)
+    from app.renderers import ORJSONRenderer
+    from rest_framework.renderers import JSONRenderer
+
+    for name, data in payloads(options.rows):
+        size = len(ORJSONRenderer().render(data))
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            if name.endswith('slim-rows') and not isinstance(renderer, ORJSONRenderer):
+                continue
+            samples = measure(renderer, data, options.iterations)
+            results[type(renderer).__name__] = percentile(samples, 50)
+        line = ' '.join(f'{renderer}={p50:>8.2f}ms' for renderer, p50 in results.items())
+        if len(results) == 2:
+            line += f" speedup={results['JSONRenderer'] / results['ORJSONRenderer']:.1f}x"
+        print(f'{name:<30} rows={options.rows:<7} bytes={size:<10} {line}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from . import seed
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+SIZES = [1000, 10000, 100000]
+EMAIL = 'root@mail.com'
+CODE = '9999'
+PAGE_SIZE = 25
+
+def percentile(samples: list, p: float) -> float:
+    """
+    Nearest-rank percentile `p` (0-100) of `samples`.
+    """
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def setup(rows: int, latency: float, cache: bool):
+    """
+    Start Django against a memory Baserow holding `rows` instances and a throwaway database.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory.settings')
+    from inventory import settings
+    # Always benchmark the memory backend, whatever the env file selects
+    settings.BASEROW_BACKEND = 'memory'
+    settings.BASEROW_MEMORY_LATENCY = latency
+    settings.BASEROW_CACHE['ENABLED'] = cache
+    settings.BASEROW_MIRROR['ENABLED'] = False
+    settings.BASEROW_WARM_UP = False
+    with open(settings.BASEROW_MEMORY_DATA) as f:
+        data = json.load(f)
+    for name in data:
+        if name not in settings.BASEROW_TABLE_MAP:
+            settings.BASEROW_TABLE_MAP[name] = max(settings.BASEROW_TABLE_MAP.values(), default=0) + 1
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from app.baserow_client import baserow
+    from app.baserow_client.user import User
+    from baserowapi import Filter
+    baserow.data = seed.generate(data, rows)
+    baserow.reset()
+    user = User.table.get_rows(filters=[Filter('email', EMAIL)], return_single=True)
+    user.update({'auth_code': CODE, 'auth_expiry': datetime.datetime.now() + datetime.timedelta(days=1)})
+    return baserow
+
+def scenarios(rows: int, iterations: int) -> list:
+    """
+    (name, iterations, request) for every benchmarked endpoint, where request(client, i) makes the i-th request.
+    """
+    items = max(1, rows // seed.INSTANCES_PER_ITEM)
+    # Exports read every instance, so they run a tenth as often
+    exports = max(1, iterations // 10)
+
+    def search(i, total=0):
+        # Walk the first pages of a list of `total` rows, reports stay on their first page
+        pages = min(20, max(1, total // PAGE_SIZE))
+        return {'search': json.dumps({'page': i % pages, 'rows': PAGE_SIZE, 'filters': {}})}
+
+    def export(client, path):
+        response = client.get(path)
+        b''.join(response.streaming_content)
+        return response
+
+    return [
+        ('login', iterations, lambda client, i: client.post('/login/', {'email': EMAIL, 'code': CODE})),
+        ('hardware-list', iterations, lambda client, i: client.get('/hardware/', search(i, items))),
+        ('hardware-instance-list', iterations, lambda client, i: client.get('/hardware-instance/', search(i, rows))),
+        ('software-detail', iterations, lambda client, i: client.get(f'/software/{i % items + 1}/')),
+        ('hardware-csv', exports, lambda client, i: export(client, '/hardware-csv/')),
+        ('reports/software-near-expiry', iterations, lambda client, i: client.get('/reports/software-near-expiry/', search(i))),
+        ('reports/hardware-needing-maintenance', iterations, lambda client, i: client.get('/reports/hardware-needing-maintenance/', search(i))),
+        ('reports/hardware-not-assigned', iterations, lambda client, i: client.get('/reports/hardware-not-assigned/', search(i))),
+        ('reports/software-not-assigned', iterations, lambda client, i: client.get('/reports/software-not-assigned/', search(i))),
+        ('dashboard', iterations, lambda client, i: client.get('/dashboard/')),
+    ]
+
+def measure(baserow, token: str, request, iterations: int, warmup: int, concurrency: int) -> dict:
+    from django.test import Client
+
+    def timed(i):
+        client = Client(raise_request_exception=False, headers={'Authorization': f'Token {token}'})
+        start = time.perf_counter()
+        response = request(client, i)
+        return time.perf_counter() - start, response.status_code
+
+    client = Client(raise_request_exception=False, headers={'Authorization': f'Token {token}'})
+    for i in range(warmup):
+        request(client, i)
+
+    calls = baserow.request_count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        timings = list(pool.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+    calls = baserow.request_count - calls
+
+    samples = [seconds * 1000 for seconds, _ in timings]
+    return {
+        'iterations': iterations,
+        'errors': sum(1 for _, code in timings if code >= 400),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'mean_ms': round(sum(samples) / len(samples), 3),
+        'throughput_rps': round(iterations / elapsed, 2),
+        'upstream_calls': calls,
+        'upstream_calls_per_request': round(calls / iterations, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+def run_size(rows: int, options) -> list:
+    baserow = setup(rows, options.latency, options.cache)
+    from django.test import Client
+    response = Client().post('/login/', {'email': EMAIL, 'code': CODE})
+    token = response.json()['token']
+
+    results = []
+    for name, iterations, request in scenarios(rows, options.iterations):
+        if options.scenario and name not in options.scenario:
+            continue
+        # Whether the row cache answered, which leaves upstream calls near 0 after warm-up
+        result = {'scenario': name, 'rows': rows, 'cache': options.cache}
+        result.update(measure(baserow, token, request, iterations, options.warmup, options.concurrency))
+        results.append(result)
+        print(
+            f"{name:<38} rows={rows:<7} p50={result['p50_ms']:>9.2f}ms p95={result['p95_ms']:>9.2f}ms "
+            f"p99={result['p99_ms']:>9.2f}ms {result['throughput_rps']:>8.2f} req/s "
+            f"calls/req={result['upstream_calls_per_request']:<6} rss={result['peak_rss_mb']}MB errors={result['errors']}",
+            file=sys.stderr,
+        )
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Benchmark API endpoints against the memory Baserow backend and write the results as JSON.',
+    )
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES, help='Hardware and software instances to seed, one run per value')
+    parser.add_argument('--latency', type=float, default=0, help='Milliseconds added to every Baserow request')
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads sending requests')
+    parser.add_argument('--scenario', action='append', help='Only run this scenario, can be repeated')
+    parser.add_argument(
+        '--cache', action=argparse.BooleanOptionalAction,
+        help='Turn the Baserow row cache on or off, defaults to BASEROW_CACHE_ENABLED like the app',
+    )
+    parser.add_argument('--output', help='Results file, defaults to benchmarks/results/<commit>-<time>.json')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    options = parser.parse_args(argv)
+
+    if options.cache is None:
+        from inventory import settings
+        options.cache = settings.BASEROW_CACHE['ENABLED']
+
+    if options.worker:
+        # Runs a single size, so peak RSS is not carried over from a larger one
+        with open(options.worker, 'w') as f:
+            json.dump(run_size(options.rows[0], options), f)
+        return
+
+    results = []
+    for rows in options.rows:
+        with tempfile.NamedTemporaryFile(suffix='.json') as f:
+            worker = [sys.executable, '-m', 'benchmarks.run', '--worker', f.name, *(argv if argv is not None else sys.argv[1:])]
+            worker += ['--rows', str(rows), '--cache' if options.cache else '--no-cache']
+            subprocess.run(worker, cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+            with open(f.name) as result:
+                results += json.load(result)
+
+    commit = git_commit()
+    created = datetime.datetime.now(datetime.timezone.utc)
+    report = {
+        'commit': commit,
+        'created': created.isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'latency_ms': options.latency,
+        'cache': options.cache,
+        'concurrency': options.concurrency,
+        'results': results,
+    }
+    output = Path(options.output) if options.output else RESULTS_DIR / f"{commit[:10] or 'unknown'}-{created:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {output}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import copy
+import datetime
+
+# Instances per hardware or software row
+INSTANCES_PER_ITEM = 10
+
+def generate(data: dict, rows: int) -> dict:
+    """
+    Copy of the memory backend `data` with `rows` hardware instances and `rows` software instances added.
+
+    Hardware and software get one row per INSTANCES_PER_ITEM instances and
+    every software row one subscription. Instances cycle through the seeded
+    statuses and users, with every third one unassigned, and software
+    expiration dates spread over the year around today.
+    """
+    data = copy.deepcopy(data)
+    # HardwareList reads the status of each hardware's instances, which the test schema leaves out
+    data['HARDWARE']['fields'] += [
+        {'name': 'instances', 'type': 'link_row', 'link_row_table': 'HARDWARE_INSTANCE', 'link_row_related_field': 'hardware'},
+        {'name': 'status', 'type': 'lookup', 'through_field_name': 'instances', 'target_field_name': 'status'},
+    ]
+    for field in data['HARDWARE_INSTANCE']['fields']:
+        if field['name'] == 'hardware':
+            field['link_row_related_field'] = 'instances'
+    items = max(1, rows // INSTANCES_PER_ITEM)
+    statuses = [row['id'] for row in data['STATUS']['rows']]
+    users = [row['id'] for row in data['USERS']['rows']]
+    today = datetime.date.today()
+
+    data['HARDWARE']['rows'] = [
+        {
+            'id': i,
+            'name': f'Hardware {i}',
+            'brand': f'Brand {i % 20}',
+            'type': ['Laptop', 'Monitor', 'Phone', 'Printer'][i % 4],
+            'model_number': f'HW-{i:06}',
+            'description': f'Benchmark hardware {i}',
+            'for_deletion': False,
+        }
+        for i in range(1, items + 1)
+    ]
+    data['HARDWARE_INSTANCE']['rows'] = [
+        {
+            'id': i,
+            'serial_number': f'HWS-{i:08}',
+            'procurement_date': (today - datetime.timedelta(days=i % 1000)).isoformat(),
+            'hardware': [(i - 1) % items + 1],
+            'status': [statuses[i % len(statuses)]],
+            'assignee': [] if i % 3 == 0 else [users[i % len(users)]],
+        }
+        for i in range(1, rows + 1)
+    ]
+    data['SOFTWARE']['rows'] = [
+        {
+            'id': i,
+            'name': f'Software {i}',
+            'brand': f'Vendor {i % 20}',
+            'version_number': f'{i % 10}.{i % 7}',
+            'description': f'Benchmark software {i}',
+            'expiration_date': (today + datetime.timedelta(days=i % 365 - 30)).isoformat(),
+            'for_deletion': False,
+        }
+        for i in range(1, items + 1)
+    ]
+    data['SOFTWARE_INSTANCE']['rows'] = [
+        {
+            'id': i,
+            'serial_key': f'SWK-{i:08}',
+            'software': [(i - 1) % items + 1],
+            'status': [statuses[i % len(statuses)]],
+            'assignee': [] if i % 3 == 0 else [users[i % len(users)]],
+        }
+        for i in range(1, rows + 1)
+    ]
+    data['SOFTWARE_SUBSCRIPTION']['rows'] = [
+        {
+            'id': i,
+            'start': (today - datetime.timedelta(days=365)).isoformat(),
+            'end': (today + datetime.timedelta(days=i % 365)).isoformat(),
+            'number_of_licenses': INSTANCES_PER_ITEM,
+            'software': [i],
+        }
+        for i in range(1, items + 1)
+    ]
+    return data
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -64,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.middleware.BaserowTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'inventory.urls'
@@ -140,12 +142,56 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 BASEROW_TOKEN=os.environ['BASEROW_TOKEN']
+BASEROW_URL = os.environ.get('BASEROW_URL', 'https://baserow.kimpalao.com')
+
+# HTTP connection pool shared by the threads of a worker, keep it >= the thread count
+BASEROW_POOL_SIZE = int(os.environ.get('BASEROW_POOL_SIZE', 10))
+BASEROW_POOL_BLOCK = os.environ.get('BASEROW_POOL_BLOCK', 'false').lower() == 'true'
+BASEROW_CONNECT_TIMEOUT = float(os.environ.get('BASEROW_CONNECT_TIMEOUT', 3.05))
+BASEROW_READ_TIMEOUT = float(os.environ.get('BASEROW_READ_TIMEOUT', 10))
+# Client-side rate limit (requests per second per worker process, 0 for none), retries with backoff
+# for 429/5xx answers and a circuit breaker that fails fast while Baserow is down. Only
+# RETRY_METHODS are retried once Baserow may have acted on them. Waits over MAX_WAIT seconds
+# fail with a 503 instead of holding the worker thread.
+BASEROW_RESILIENCE = {
+    'RATE_LIMIT': float(os.environ.get('BASEROW_RATE_LIMIT', 0)),
+    'RATE_BURST': int(os.environ.get('BASEROW_RATE_BURST', 20)),
+    'RETRY_ATTEMPTS': int(os.environ.get('BASEROW_RETRY_ATTEMPTS', 3)),
+    'RETRY_BACKOFF': float(os.environ.get('BASEROW_RETRY_BACKOFF', 0.2)),
+    'RETRY_METHODS': [method.strip().upper() for method in os.environ.get('BASEROW_RETRY_METHODS', 'GET,DELETE').split(',') if method.strip()],
+    'MAX_WAIT': float(os.environ.get('BASEROW_MAX_WAIT', 5)),
+    'FAILURE_THRESHOLD': int(os.environ.get('BASEROW_FAILURE_THRESHOLD', 5)),
+    'RESET_TIMEOUT': float(os.environ.get('BASEROW_RESET_TIMEOUT', 30)),
+}
+# Threads per worker process running independent Baserow calls of a request in parallel,
+# and how many of those one request may use at once
+BASEROW_FANOUT_WORKERS = int(os.environ.get('BASEROW_FANOUT_WORKERS', 8))
+BASEROW_FANOUT_PER_REQUEST = int(os.environ.get('BASEROW_FANOUT_PER_REQUEST', 4))
+# Serve the list, detail and report views as async views that fetch independent rows concurrently (ASGI deployments)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'false').lower() == 'true'
+# Seconds a dashboard snapshot is served before it is computed again, 0 disables caching it
+DASHBOARD_SNAPSHOT_TTL = float(os.environ.get('DASHBOARD_SNAPSHOT_TTL', 15))
+# Requests making more Baserow calls, or spending more milliseconds waiting on Baserow, are logged
+BASEROW_CALL_BUDGET = int(os.environ.get('BASEROW_CALL_BUDGET', 20))
+BASEROW_TIME_BUDGET = float(os.environ.get('BASEROW_TIME_BUDGET', 1000))
+# `memory` answers every Baserow request from BASEROW_MEMORY_DATA instead, for offline tests and benchmarks
+BASEROW_BACKEND = os.environ.get('BASEROW_BACKEND', 'http')
+BASEROW_MEMORY_DATA = os.environ.get('BASEROW_MEMORY_DATA', str(BASE_DIR / 'app' / 'tests' / 'baserow.json'))
+# Milliseconds the memory backend waits before answering each request
+BASEROW_MEMORY_LATENCY = float(os.environ.get('BASEROW_MEMORY_LATENCY', 0))
+# Encode responses and JSON exports with orjson instead of the stdlib json module
+FAST_JSON = os.environ.get('FAST_JSON', 'false').lower() == 'true'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.ORJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'EXCEPTION_HANDLER': 'app.exceptions.exception_handler',
 }
 
 MEDIA_ROOT = os.environ["MEDIA_ROOT"]
@@ -168,6 +214,87 @@ BASEROW_TABLE_MAP = {
     )
 }
 
+# Field metadata for the tables above, written by `manage.py baserow_schema`
+BASEROW_SCHEMA_SNAPSHOT = os.environ.get('BASEROW_SCHEMA_SNAPSHOT', str(BASE_DIR / 'baserow_schema.json'))
+BASEROW_WARM_UP = os.environ.get('BASEROW_WARM_UP', 'false').lower() == 'true'
+# Seconds before the in-memory STATUS and USER_TYPES rows are reloaded in the background
+BASEROW_REFERENCE_REFRESH = float(os.environ.get('BASEROW_REFERENCE_REFRESH', 300))
+
+# Shared secret of the Baserow webhook posting to /webhooks/baserow/, empty disables the endpoint
+BASEROW_WEBHOOK_SECRET = os.environ.get('BASEROW_WEBHOOK_SECRET', '')
+
+# Local copy of Baserow tables kept current by `manage.py baserow_sync`. Views
+# listed in VIEWS answer from it once their table has been synced.
+BASEROW_MIRROR = {
+    'ENABLED': os.environ.get('BASEROW_MIRROR_ENABLED', 'false').lower() == 'true',
+    'TABLES': ['HARDWARE', 'HARDWARE_INSTANCE', 'SOFTWARE', 'SOFTWARE_INSTANCE', 'SOFTWARE_SUBSCRIPTION', 'USERS', 'ASSIGNMENT_LOG'],
+    'UPDATED_FIELD': os.environ.get('BASEROW_MIRROR_UPDATED_FIELD', 'updated_on'),
+    'VIEWS': [
+        view.strip() for view in
+        os.environ.get('BASEROW_MIRROR_VIEWS', 'HardwareList,HardwareInstanceList,SoftwareList,SoftwareInstanceList,UserList').split(',')
+        if view.strip()
+    ],
+}
+
+# Reports answered from result sets each worker keeps in memory, updated as rows are
+# written through the API and recomputed MAX_AGE seconds after they were last computed
+MATERIALIZED_REPORTS = {
+    'ENABLED': os.environ.get('MATERIALIZED_REPORTS_ENABLED', 'false').lower() == 'true',
+    'MAX_AGE': float(os.environ.get('MATERIALIZED_REPORTS_MAX_AGE', 60)),
+}
+
+# Read-through cache for Baserow row reads, off by default. The locmem backend is
+# per process, so with several workers a write only invalidates the worker that
+# made it; use BASEROW_CACHE_BACKEND=django with a shared CACHES entry in that
+# case. Edits made in Baserow itself only reach the cache through the webhook,
+# otherwise they show once the TTL runs out. The webhook needs the django backend,
+# the app refuses to start with BASEROW_WEBHOOK_SECRET and the locmem backend.
+# Tables missing from TTL (or with a TTL of 0) are never cached. USERS is left
+# out so login codes are always read fresh. DEPENDENTS need not list the
+# tables reached through other dependents, lookups of lookups follow them.
+BASEROW_CACHE = {
+    'ENABLED': os.environ.get('BASEROW_CACHE_ENABLED', 'false').lower() == 'true',
+    'BACKEND': os.environ.get('BASEROW_CACHE_BACKEND', 'locmem'),
+    'OPTIONS': {
+        'MAX_ENTRIES': int(os.environ.get('BASEROW_CACHE_MAX_ENTRIES', 2048)),
+        'ALIAS': os.environ.get('BASEROW_CACHE_ALIAS', 'default'),
+    },
+    'TTL': {
+        'HARDWARE': 30,
+        'HARDWARE_INSTANCE': 30,
+        'SOFTWARE': 30,
+        'SOFTWARE_INSTANCE': 30,
+        'SOFTWARE_SUBSCRIPTION': 30,
+        'ASSIGNMENT_LOG': 30,
+        'STATUS': 300,
+        'USER_TYPES': 300,
+    },
+    # Tables whose lookup and formula fields read from the key table
+    'DEPENDENTS': {
+        'HARDWARE': ['HARDWARE_INSTANCE', 'ASSIGNMENT_LOG'],
+        'HARDWARE_INSTANCE': ['HARDWARE', 'ASSIGNMENT_LOG'],
+        'SOFTWARE': ['SOFTWARE_INSTANCE', 'SOFTWARE_SUBSCRIPTION', 'ASSIGNMENT_LOG'],
+        'SOFTWARE_INSTANCE': ['SOFTWARE', 'ASSIGNMENT_LOG'],
+        'SOFTWARE_SUBSCRIPTION': ['SOFTWARE'],
+        'USERS': ['HARDWARE_INSTANCE', 'SOFTWARE_INSTANCE', 'ASSIGNMENT_LOG'],
+        'USER_TYPES': ['USERS'],
+        'STATUS': ['HARDWARE_INSTANCE', 'SOFTWARE_INSTANCE'],
+        'ASSIGNMENT_LOG': ['HARDWARE_INSTANCE', 'SOFTWARE_INSTANCE'],
+    },
+}
+
+# Prometheus metrics served at /metrics, off by default. With several gunicorn
+# workers, point DIRECTORY at a directory they all share (emptied on deploy) so
+# that every scrape adds up all of them; each worker writes its file there every
+# FLUSH_INTERVAL seconds. A TOKEN makes scrapers send `Authorization: Bearer <token>`,
+# and is required unless DEBUG is on.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'false').lower() == 'true',
+    'DIRECTORY': os.environ.get('METRICS_DIRECTORY', ''),
+    'FLUSH_INTERVAL': float(os.environ.get('METRICS_FLUSH_INTERVAL', 1)),
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
 ROOT_LOGIN = os.environ['ROOT_LOGIN'].lower() == 'true'
 ROOT_LOGIN_USER = os.environ['ROOT_LOGIN_USER']
 ROOT_LOGIN_CODE = os.environ['ROOT_LOGIN_CODE']
\ No newline at end of file